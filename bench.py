@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+"""Benchmark throughput batch (video per jam) dan kurva scaling.
+
+Paket konten sintetis dimasukkan ke antrian render farm lewat `cli.main()`
+(mode --enqueue), lalu diproses oleh N proses worker (`cli.py --worker`)
+dengan provider fake (lihat providers.py) sehingga layanan eksternal hanya
+menambah latensi yang dapat diatur. Untuk setiap konfigurasi (jumlah worker x
+engine render) dilaporkan throughput, persentil latensi per tahap (dari
+ledger worker), utilisasi CPU (semua proses worker dan ffmpeg), dan
+pemakaian disk puncak di temp/ dan output/.
+
+Contoh:
+    python bench.py --videos 12 --workers 1,2,4 --engines ffmpeg,numpy --voiceover
+    python bench.py --videos 12 --workers 2 --baseline temp/bench/20260101-120000/results.json
+"""
+import os
+import sys
+import math
+import json
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import resource
+import threading
+import itertools
+import subprocess
+
+from cli import main as cli_main
+from ledger import STAGES
+from providers import fake_content
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CLI_PATH = os.path.join(SCRIPT_DIR, 'cli.py')
+TEMP_DIR = os.path.join(SCRIPT_DIR, 'temp')
+BENCH_DIR = os.path.join(TEMP_DIR, 'bench')
+DISK_SAMPLE_INTERVAL = 1.0
+DEFAULT_TOLERANCE = 0.15
+
+
+def percentile(values: list, pct: float):
+    """Persentil nearest-rank, atau None jika tidak ada data."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, int(math.ceil(pct / 100.0 * len(ordered))) - 1)]
+
+
+def dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try:
+                total += os.path.getsize(os.path.join(root, f))
+            except OSError:
+                # File dihapus worker saat sedang dihitung
+                continue
+    return total
+
+
+class DiskSampler:
+    """Mengambil sampel ukuran folder secara berkala dan mencatat nilai puncaknya."""
+
+    def __init__(self, paths: dict, interval: float = DISK_SAMPLE_INTERVAL):
+        self.paths = paths
+        self.interval = interval
+        self.peak = {name: 0 for name in paths}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        for name, paths in self.paths.items():
+            self.peak[name] = max(self.peak[name], sum(dir_size(p) for p in paths))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def stage_latencies(ledger_paths: list) -> dict:
+    """Latensi per tahap (detik) dari ledger worker.
+
+    Tahap satu job berjalan berurutan, sehingga latensi sebuah tahap adalah
+    selisih waktu selesainya dengan tahap sebelumnya (atau waktu job dibuat).
+    """
+    latencies = {stage: [] for stage in STAGES[1:]}
+    latencies['job'] = []
+    for path in ledger_paths:
+        if not os.path.exists(path):
+            continue
+        conn = sqlite3.connect(path)
+        try:
+            jobs = dict(conn.execute('SELECT job_key, created_at FROM jobs').fetchall())
+            rows = conn.execute('SELECT job_key, stage, updated_at FROM stages WHERE status = ?', ('done',)).fetchall()
+        finally:
+            conn.close()
+        done = {}
+        for job_key, stage, updated_at in rows:
+            done.setdefault(job_key, {})[stage] = updated_at
+        for job_key, stages in done.items():
+            previous = jobs.get(job_key)
+            if previous is None:
+                continue
+            start = previous
+            for stage in STAGES[1:]:
+                if stage in stages:
+                    latencies[stage].append(max(0.0, stages[stage] - previous))
+                    previous = stages[stage]
+            if 'render' in stages:
+                latencies['job'].append(previous - start)
+    return latencies
+
+
+def write_packages(path: str, count: int, seed: int, scenes: int, words: int):
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(count):
+            f.write(json.dumps(fake_content(rng, i + 1, words=words, scenes=scenes), ensure_ascii=False) + '\n')
+
+
+def run_config(name: str, workers: int, engine: str, args, run_root: str) -> dict:
+    """Menjalankan satu konfigurasi benchmark sampai antrian habis."""
+    run_dir = os.path.join(run_root, name)
+    output_dir = os.path.join(run_dir, 'output')
+    os.makedirs(output_dir, exist_ok=True)
+    queue_url = f"sqlite:///{os.path.join(run_dir, 'queue.db')}"
+    packages_path = os.path.join(run_dir, 'packages.jsonl')
+    write_packages(packages_path, args.videos, args.seed, args.scenes, args.words)
+
+    common = ['--fake-providers', 'all', '--fake-seed', str(args.seed), '--no-dedupe', '--generate-images', '--engine', engine]
+    if args.fake_config:
+        common += ['--fake-config', args.fake_config]
+    if args.rate_limits:
+        common += ['--rate-limits', args.rate_limits]
+
+    # Paket masuk ke antrian lewat jalur yang sama dengan produksi (cli.main --enqueue)
+    enqueue_args = ['--json', packages_path, '--enqueue', queue_url, '--ledger', os.path.join(run_dir, 'ledger.db')] + common
+    if cli_main(enqueue_args) != 0:
+        raise RuntimeError(f"Gagal memasukkan paket ke antrian {queue_url}")
+
+    worker_args = common + ['--output', output_dir, '--duration', str(args.duration)]
+    if args.voiceover:
+        worker_args.append('--voiceover')
+    if args.no_zoom:
+        worker_args.append('--no-zoom')
+    if args.dark_overlay:
+        worker_args.append('--dark-overlay')
+    if args.upload:
+        worker_args.append('--youtube')
+    if not args.render_cache:
+        worker_args.append('--no-render-cache')
+    worker_args += args.extra
+
+    worker_ids = [f"bench-{os.path.basename(run_root)}-{name}-{i+1}" for i in range(workers)]
+    worker_roots = [os.path.join(TEMP_DIR, 'workers', worker_id) for worker_id in worker_ids]
+    usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.monotonic()
+    with DiskSampler({'temp': worker_roots, 'output': [output_dir]}) as disk:
+        processes = []
+        for worker_id in worker_ids:
+            log_file = open(os.path.join(run_dir, f"{worker_id}.log"), 'w', encoding='utf-8')
+            command = [sys.executable, CLI_PATH, '--worker', queue_url, '--worker-id', worker_id] + worker_args
+            processes.append((subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT), log_file))
+        for process, log_file in processes:
+            process.wait()
+            log_file.close()
+    wall = time.monotonic() - start
+    usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_seconds = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+
+    latencies = stage_latencies([os.path.join(root, 'ledger.db') for root in worker_roots])
+    completed = len(latencies['job'])
+    if not args.keep:
+        for root in worker_roots:
+            shutil.rmtree(root, ignore_errors=True)
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    return {
+        'name': name,
+        'workers': workers,
+        'engine': engine,
+        'videos': args.videos,
+        'completed': completed,
+        'wall_seconds': round(wall, 2),
+        'videos_per_hour': round(completed / wall * 3600, 2) if wall > 0 else 0,
+        'cpu_seconds': round(cpu_seconds, 2),
+        'cpu_utilisation': round(cpu_seconds / (wall * (os.cpu_count() or 1)), 3) if wall > 0 else 0,
+        'peak_temp_mb': round(disk.peak['temp'] / 1024 / 1024, 1),
+        'peak_output_mb': round(disk.peak['output'] / 1024 / 1024, 1),
+        'stages': {
+            stage: {'p50': percentile(values, 50), 'p90': percentile(values, 90), 'p99': percentile(values, 99)}
+            for stage, values in latencies.items()
+        },
+    }
+
+
+def _fmt(value) -> str:
+    return '-' if value is None else f"{value:.1f}"
+
+
+def print_results(results: list):
+    print(f"\n{'konfigurasi':<18} {'selesai':>7} {'detik':>8} {'video/jam':>10} {'CPU':>6} {'temp MB':>8} {'output MB':>9}")
+    for r in results:
+        print(f"{r['name']:<18} {r['completed']:>3}/{r['videos']:<3} {r['wall_seconds']:>8.1f} {r['videos_per_hour']:>10.1f} "
+              f"{r['cpu_utilisation'] * 100:>5.0f}% {r['peak_temp_mb']:>8.1f} {r['peak_output_mb']:>9.1f}")
+    stages = list(STAGES[1:]) + ['job']
+    print("\nLatensi per tahap, detik (p50 / p90 / p99)")
+    print(f"{'konfigurasi':<18} " + ' '.join(f"{stage:>20}" for stage in stages))
+    for r in results:
+        cells = []
+        for stage in stages:
+            s = r['stages'][stage]
+            cells.append(f"{_fmt(s['p50'])} / {_fmt(s['p90'])} / {_fmt(s['p99'])}".rjust(20))
+        print(f"{r['name']:<18} " + ' '.join(cells))
+
+
+def compare_baseline(results: list, baseline_path: str, tolerance: float) -> bool:
+    """Membandingkan throughput dengan hasil sebelumnya; False jika ada regresi melebihi toleransi."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {r['name']: r for r in json.load(f)['results']}
+    ok = True
+    print(f"\nPerbandingan dengan baseline {baseline_path} (toleransi {tolerance:.0%})")
+    for r in results:
+        base = baseline.get(r['name'])
+        if not base or not base['videos_per_hour']:
+            print(f"  {r['name']}: tidak ada di baseline")
+            continue
+        change = r['videos_per_hour'] / base['videos_per_hour'] - 1
+        regressed = change < -tolerance
+        ok = ok and not regressed
+        print(f"  {r['name']}: {base['videos_per_hour']:.1f} -> {r['videos_per_hour']:.1f} video/jam "
+              f"({change:+.0%}){' REGRESI' if regressed else ''}")
+    return ok
+
+
+def parse_list(spec: str, cast=str) -> list:
+    return [cast(v.strip()) for v in spec.split(',') if v.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark throughput batch dan kurva scaling worker')
+    parser.add_argument('--videos', type=int, default=8, help='Jumlah paket konten sintetis per konfigurasi (default: 8)')
+    parser.add_argument('--workers', default='1,2,4', help='Daftar jumlah worker yang diuji (default: 1,2,4)')
+    parser.add_argument('--engines', default='ffmpeg', help='Daftar render engine yang diuji (default: ffmpeg)')
+    parser.add_argument('--scenes', type=int, default=5, help='Jumlah image prompt per paket (default: 5)')
+    parser.add_argument('--words', type=int, default=120, help='Jumlah kata voiceover per paket (default: 120)')
+    parser.add_argument('--duration', type=int, default=3, help='Durasi setiap gambar tanpa voiceover (default: 3)')
+    parser.add_argument('--voiceover', action='store_true', help='Sertakan tahap TTS dan caption')
+    parser.add_argument('--no-zoom', action='store_true', help='Tanpa efek zoom')
+    parser.add_argument('--dark-overlay', action='store_true', help='Sertakan overlay gelap')
+    parser.add_argument('--upload', action='store_true', help='Sertakan tahap upload (YouTube fake)')
+    parser.add_argument('--render-cache', action='store_true', help='Izinkan cache render (default: nonaktif agar setiap run merender penuh)')
+    parser.add_argument('--fake-config', help='File JSON konfigurasi latensi/kegagalan provider fake')
+    parser.add_argument('--rate-limits', help='File JSON konfigurasi rate limit per provider')
+    parser.add_argument('--seed', type=int, default=0, help='Seed paket sintetis dan provider fake (default: 0)')
+    parser.add_argument('--baseline', help='File results.json sebelumnya untuk mendeteksi regresi throughput')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'Penurunan throughput maksimum terhadap baseline (default: {DEFAULT_TOLERANCE})')
+    parser.add_argument('--keep', action='store_true', help='Simpan output video dan direktori worker')
+    parser.add_argument('extra', nargs=argparse.REMAINDER, help='Argumen tambahan untuk worker cli.py (setelah --)')
+    args = parser.parse_args(argv)
+    if args.extra and args.extra[0] == '--':
+        args.extra = args.extra[1:]
+
+    run_root = os.path.join(BENCH_DIR, time.strftime('%Y%m%d-%H%M%S'))
+    os.makedirs(run_root, exist_ok=True)
+    print(f"Benchmark: {args.videos} video per konfigurasi, hasil di {run_root}")
+
+    results = []
+    for workers, engine in itertools.product(parse_list(args.workers, int), parse_list(args.engines)):
+        name = f"w{workers}-{engine}"
+        print(f"\n=== {name} ===")
+        results.append(run_config(name, workers, engine, args, run_root))
+        print(f"{name}: {results[-1]['completed']}/{args.videos} video dalam {results[-1]['wall_seconds']:.1f} detik "
+              f"({results[-1]['videos_per_hour']:.1f} video/jam)")
+
+    results_path = os.path.join(run_root, 'results.json')
+    with open(results_path, 'w', encoding='utf-8') as f:
+        json.dump({'args': {k: v for k, v in vars(args).items()}, 'cpu_count': os.cpu_count(), 'results': results}, f, indent=2)
+    print_results(results)
+    print(f"\nHasil disimpan di: {results_path}")
+
+    if args.baseline and not compare_baseline(results, args.baseline, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,374 @@
+#!/usr/bin/env python
+"""Menjalankan beberapa campaign (niche) dalam satu proses dengan fair share.
+
+Setiap campaign adalah satu konfigurasi cli.py (file prompt atau JSON,
+folder musik, pengaturan YouTube, argumen tambahan). Satu video adalah satu
+unit kerja: proses `cli.py ... --limit 1` yang dijalankan di pool worker
+bersama. Campaign berikutnya dipilih dengan weighted fair share (waktu
+virtual = detik worker yang dipakai / weight), sehingga campaign yang lambat
+mendapat giliran lebih jarang alih-alih memonopoli worker. Setiap campaign
+memiliki quota video per run, batas percobaan, dan circuit breaker: setelah
+beberapa kegagalan berturut-turut campaign diistirahatkan selama cooldown,
+lalu dicoba lagi dengan satu video.
+
+Contoh campaigns.json:
+    {
+      "workers": 3,
+      "defaults": {"args": ["--generate-images", "--no-zoom", "--duration", "2"]},
+      "campaigns": [
+        {"name": "fashion", "weight": 2, "quota": 4, "prompt": "prompts/fashion.txt", "music": "music/fashion",
+         "args": ["--youtube", "--client-secret", "secrets/fashion.json", "--privacy", "public"]},
+        {"name": "cars", "quota": 2, "json": "data/cars.jsonl", "timeout": 1800}
+      ]
+    }
+
+Menjalankan:
+    python campaigns.py campaigns.json [--workers N] [--only fashion,cars]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CLI_PATH = os.path.join(SCRIPT_DIR, 'cli.py')
+CAMPAIGN_DIR = os.path.join(SCRIPT_DIR, 'temp', 'campaigns')
+OUTPUT_FOLDER = os.path.join(SCRIPT_DIR, 'output')
+
+DEFAULT_WORKERS = 2
+CAMPAIGN_DEFAULTS = {
+    'weight': 1.0,
+    'quota': 1,                 # video berhasil per run
+    'max_attempts': None,       # default: 2x quota
+    'max_concurrency': 1,       # video campaign ini yang boleh berjalan bersamaan
+    'failure_threshold': 3,     # kegagalan berturut-turut sebelum circuit breaker terbuka
+    'cooldown': 300,            # detik campaign diistirahatkan setelah breaker terbuka
+    'timeout': None,            # batas waktu satu video (detik)
+    'args': [],
+}
+# Perkiraan durasi satu video sebelum ada data, untuk menghitung giliran
+DEFAULT_ESTIMATE = 120.0
+
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half-open'
+
+
+def load_campaigns(path: str) -> tuple:
+    """Membaca file campaign.
+
+    Path prompt, json, dan music relatif terhadap folder file campaign.
+    Argumen di `defaults.args` ditaruh sebelum argumen campaign.
+
+    Returns:
+        tuple: (list campaign, jumlah worker dari file atau None)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    defaults = dict(CAMPAIGN_DEFAULTS)
+    defaults.update(data.get('defaults', {}))
+
+    campaigns = []
+    seen = set()
+    for raw in data.get('campaigns', []):
+        campaign = dict(defaults)
+        campaign.update(raw)
+        campaign['args'] = list(defaults.get('args', [])) + list(raw.get('args', []))
+        name = campaign.get('name')
+        if not name:
+            raise ValueError("Setiap campaign wajib memiliki 'name'")
+        if name in seen:
+            raise ValueError(f"Nama campaign duplikat: {name}")
+        seen.add(name)
+        if bool(campaign.get('prompt')) == bool(campaign.get('json')):
+            raise ValueError(f"Campaign {name}: isi salah satu dari 'prompt' atau 'json'")
+        for key in ('prompt', 'json', 'music'):
+            if campaign.get(key):
+                campaign[key] = os.path.join(base_dir, campaign[key])
+        campaign['weight'] = float(campaign['weight'])
+        if campaign['weight'] <= 0:
+            raise ValueError(f"Campaign {name}: weight harus lebih dari 0")
+        campaign['quota'] = int(campaign['quota'])
+        campaign['max_attempts'] = int(campaign['max_attempts'] or campaign['quota'] * 2)
+        campaign['max_concurrency'] = max(1, int(campaign['max_concurrency']))
+        campaigns.append(campaign)
+    if not campaigns:
+        raise ValueError(f"Tidak ada campaign di {path}")
+    return campaigns, data.get('workers')
+
+
+class CampaignState:
+    """Status satu campaign selama run: quota, waktu virtual, dan circuit breaker."""
+
+    def __init__(self, campaign: dict, entries: list = None):
+        self.campaign = campaign
+        self.name = campaign['name']
+        self.weight = campaign['weight']
+        # Untuk campaign JSON: antrian entri yang belum selesai
+        self.entries = entries
+        self.done = 0
+        self.failed = 0
+        self.attempts = 0
+        self.running = 0
+        self.consecutive_failures = 0
+        self.breaker = BREAKER_CLOSED
+        self.open_until = 0.0
+        self.vtime = 0.0
+        self.busy_seconds = 0.0
+        self.durations = []
+
+    @property
+    def estimate(self) -> float:
+        recent = self.durations[-5:]
+        return sum(recent) / len(recent) if recent else DEFAULT_ESTIMATE
+
+    def finished(self) -> bool:
+        """True jika campaign tidak akan menjalankan video lagi pada run ini."""
+        if self.done >= self.campaign['quota'] or self.attempts >= self.campaign['max_attempts']:
+            return True
+        return self.entries is not None and not self.entries and self.running == 0
+
+    def eligible(self, now: float) -> bool:
+        if self.finished() or self.running >= self.campaign['max_concurrency']:
+            return False
+        if self.done + self.running >= self.campaign['quota'] or self.attempts >= self.campaign['max_attempts']:
+            return False
+        if self.entries is not None and not self.entries:
+            return False
+        if self.breaker == BREAKER_OPEN:
+            if now < self.open_until:
+                return False
+            self.breaker = BREAKER_HALF_OPEN
+        # Setengah terbuka: hanya satu video percobaan
+        return self.breaker != BREAKER_HALF_OPEN or self.running == 0
+
+
+class FairShareScheduler:
+    """Memilih campaign berikutnya dengan weighted fair share.
+
+    Waktu virtual campaign bertambah sebesar durasi video / weight. Video yang
+    sedang berjalan dihitung dengan perkiraan durasinya, sehingga campaign
+    dengan video lambat tidak mendapat worker lagi sebelum campaign lain
+    menyusul. Campaign yang baru aktif kembali (mis. setelah cooldown) mulai
+    dari waktu virtual minimum campaign aktif, tidak menagih giliran yang
+    terlewat.
+    """
+
+    def __init__(self, states: list, log_callback=print):
+        self.states = states
+        self.log_callback = log_callback
+        self._lock = threading.Lock()
+
+    def _virtual_start(self, state: CampaignState) -> float:
+        return state.vtime + state.running * state.estimate / state.weight
+
+    def pick(self, now: float = None):
+        """Mengembalikan campaign berikutnya yang boleh menjalankan video, atau None."""
+        now = now or time.monotonic()
+        with self._lock:
+            candidates = [s for s in self.states if s.eligible(now)]
+            if not candidates:
+                return None
+            active = [s.vtime for s in self.states if s.running > 0]
+            floor = min(active) if active else None
+            for state in candidates:
+                if state.running == 0 and floor is not None:
+                    state.vtime = max(state.vtime, floor)
+            state = min(candidates, key=lambda s: (self._virtual_start(s), -s.weight, s.name))
+            state.running += 1
+            state.attempts += 1
+            return state
+
+    def finish(self, state: CampaignState, ok: bool, elapsed: float, now: float = None):
+        """Mencatat hasil satu video dan memperbarui circuit breaker campaign."""
+        now = now or time.monotonic()
+        with self._lock:
+            state.running -= 1
+            state.busy_seconds += elapsed
+            state.vtime += elapsed / state.weight
+            state.durations.append(elapsed)
+            if ok:
+                state.done += 1
+                state.consecutive_failures = 0
+                if state.breaker != BREAKER_CLOSED:
+                    self.log_callback(f"[{state.name}] Circuit breaker tertutup kembali")
+                state.breaker = BREAKER_CLOSED
+                return
+            state.failed += 1
+            state.consecutive_failures += 1
+            if state.breaker == BREAKER_HALF_OPEN or state.consecutive_failures >= state.campaign['failure_threshold']:
+                state.breaker = BREAKER_OPEN
+                state.open_until = now + state.campaign['cooldown']
+                self.log_callback(f"[{state.name}] {state.consecutive_failures} kegagalan berturut-turut, "
+                                  f"campaign diistirahatkan {state.campaign['cooldown']:.0f} detik")
+
+    def next_wakeup(self, now: float = None):
+        """Detik sampai campaign yang sedang cooldown boleh dicoba lagi, atau None."""
+        now = now or time.monotonic()
+        with self._lock:
+            waits = [s.open_until - now for s in self.states
+                     if s.breaker == BREAKER_OPEN and not s.finished() and s.running == 0]
+        return max(0.0, min(waits)) if waits else None
+
+
+def _has_option(args: list, option: str) -> bool:
+    return any(arg == option or arg.startswith(option + '=') for arg in args)
+
+
+def campaign_root(campaign: dict) -> str:
+    return os.path.join(CAMPAIGN_DIR, campaign['name'])
+
+
+def pending_entries(campaign: dict) -> list:
+    """Entri file JSON campaign yang belum tuntas menurut ledger campaign."""
+    from cli import iter_content_from_file
+    from ledger import JobLedger, job_key_for, required_stages_for
+
+    upload = _has_option(campaign['args'], '--youtube') or _has_option(campaign['args'], '--channels')
+    ledger = JobLedger(os.path.join(campaign_root(campaign), 'ledger.db'))
+    try:
+        return [
+            entry for entry in iter_content_from_file(campaign['json'], lambda message: None)
+            if not ledger.is_job_complete(job_key_for(entry), required_stages_for(upload))
+        ]
+    finally:
+        ledger.close()
+
+
+def build_command(campaign: dict, entry: dict = None, entry_path: str = None) -> list:
+    """Perintah cli.py untuk satu video campaign."""
+    root = campaign_root(campaign)
+    args = list(campaign['args'])
+    command = [sys.executable, CLI_PATH]
+    if entry is not None:
+        with open(entry_path, 'w', encoding='utf-8') as f:
+            json.dump([entry], f, ensure_ascii=False)
+        command += ['--json', entry_path, '--resume']
+    else:
+        command += ['--generate', '--prompt', campaign['prompt']]
+        # Lanjutkan job yang belum selesai; hanya aman jika video campaign tidak berjalan bersamaan
+        if campaign['max_concurrency'] == 1:
+            command.append('--resume')
+    if campaign.get('music'):
+        command += ['--music', campaign['music']]
+    if not _has_option(args, '--output'):
+        command += ['--output', os.path.join(OUTPUT_FOLDER, campaign['name'])]
+    if not _has_option(args, '--ledger'):
+        command += ['--ledger', os.path.join(root, 'ledger.db')]
+    return command + args + ['--limit', '1']
+
+
+def run_video(campaign: dict, command: list, log_path: str) -> bool:
+    """Menjalankan satu proses cli.py dan mengembalikan True jika berhasil."""
+    with open(log_path, 'w', encoding='utf-8') as log_file:
+        process = subprocess.Popen(command, stdout=log_file, stderr=subprocess.STDOUT, cwd=SCRIPT_DIR)
+        try:
+            return process.wait(timeout=campaign.get('timeout')) == 0
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+            log_file.write(f"\nDihentikan: melebihi batas waktu {campaign['timeout']} detik\n")
+            return False
+
+
+def run_campaigns(campaigns: list, workers: int, log_callback=print) -> list:
+    """Menjalankan semua campaign di pool worker bersama sampai quota atau percobaan habis.
+
+    Returns:
+        list: CampaignState setiap campaign
+    """
+    states = []
+    for campaign in campaigns:
+        os.makedirs(os.path.join(campaign_root(campaign), 'logs'), exist_ok=True)
+        entries = pending_entries(campaign) if campaign.get('json') else None
+        states.append(CampaignState(campaign, entries))
+        log_callback(f"[{campaign['name']}] weight {campaign['weight']:g}, quota {campaign['quota']} video"
+                     + (f", {len(entries)} entri belum selesai" if entries is not None else ''))
+    scheduler = FairShareScheduler(states, log_callback=log_callback)
+
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='campaign') as pool:
+        while True:
+            while len(running) < workers:
+                state = scheduler.pick()
+                if state is None:
+                    break
+                entry = state.entries.pop(0) if state.entries is not None else None
+                number = state.attempts
+                entry_path = os.path.join(campaign_root(state.campaign), f"entry_{number}.json")
+                command = build_command(state.campaign, entry, entry_path)
+                log_path = os.path.join(campaign_root(state.campaign), 'logs', f"{time.strftime('%Y%m%d-%H%M%S')}-{number}.log")
+                log_callback(f"[{state.name}] Video #{number} dimulai" + (f": {entry.get('title')}" if entry else '')
+                             + f" (log: {log_path})")
+                future = pool.submit(run_video, state.campaign, command, log_path)
+                running[future] = (state, entry, time.monotonic())
+
+            if not running:
+                delay = scheduler.next_wakeup()
+                if delay is None:
+                    break
+                log_callback(f"Menunggu {delay:.0f} detik sampai campaign selesai cooldown...")
+                time.sleep(delay)
+                continue
+
+            completed, _ = wait(list(running), timeout=scheduler.next_wakeup(), return_when=FIRST_COMPLETED)
+            for future in completed:
+                state, entry, started = running.pop(future)
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    log_callback(f"[{state.name}] Error menjalankan video: {e}")
+                    ok = False
+                elapsed = time.monotonic() - started
+                scheduler.finish(state, ok, elapsed)
+                if not ok and entry is not None:
+                    # Entri yang gagal dicoba lagi di akhir antrian campaign
+                    state.entries.append(entry)
+                log_callback(f"[{state.name}] Video {'berhasil' if ok else 'gagal'} dalam {elapsed:.0f} detik "
+                             f"({state.done}/{state.campaign['quota']} selesai, {state.failed} gagal)")
+    return states
+
+
+def print_summary(states: list):
+    total_busy = sum(s.busy_seconds for s in states) or 1.0
+    total_weight = sum(s.weight for s in states)
+    print(f"\n{'campaign':<20} {'weight':>6} {'selesai':>8} {'gagal':>6} {'porsi':>7} {'target':>7} {'breaker':>10}")
+    for s in states:
+        print(f"{s.name:<20} {s.weight:>6g} {s.done:>4}/{s.campaign['quota']:<3} {s.failed:>6} "
+              f"{s.busy_seconds / total_busy:>7.0%} {s.weight / total_weight:>7.0%} {s.breaker:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Menjalankan beberapa campaign dengan pool worker bersama dan fair share')
+    parser.add_argument('config', help='File JSON daftar campaign')
+    parser.add_argument('--workers', type=int, help=f'Jumlah video yang dirender bersamaan (default: dari file atau {DEFAULT_WORKERS})')
+    parser.add_argument('--only', help='Hanya jalankan campaign ini (dipisahkan koma)')
+    args = parser.parse_args(argv)
+
+    try:
+        campaigns, file_workers = load_campaigns(args.config)
+    except (ValueError, OSError) as e:
+        print(f"Error file campaign {args.config}: {e}")
+        return 1
+    if args.only:
+        names = [n.strip() for n in args.only.split(',') if n.strip()]
+        missing = sorted(set(names) - {c['name'] for c in campaigns})
+        if missing:
+            print(f"Error: Campaign tidak ditemukan: {', '.join(missing)}")
+            return 1
+        campaigns = [c for c in campaigns if c['name'] in names]
+    workers = max(1, args.workers or file_workers or DEFAULT_WORKERS)
+
+    print(f"Menjalankan {len(campaigns)} campaign dengan {workers} worker")
+    states = run_campaigns(campaigns, workers)
+    print_summary(states)
+    return 0 if all(s.done >= s.campaign['quota'] for s in states) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
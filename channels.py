@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+"""Registry channel YouTube untuk publish ke beberapa channel sekaligus.
+
+Setiap channel memiliki kredensial sendiri (client_secret dan token),
+privacy default, template judul/deskripsi, tags, budget quota harian, dan
+batas upload paralel. Satu batch dirender sekali, lalu setiap video
+diupload ke semua channel secara paralel lewat ChannelUploader. Pemakaian
+quota dicatat per channel per hari quota YouTube (reset tengah malam waktu
+Pasifik) di SQLite + WAL sehingga beberapa run tidak melebihi budget.
+
+Contoh channels.json:
+    {
+      "defaults": {"privacy": "private", "daily_quota": 10000},
+      "channels": [
+        {"name": "fashion", "client_secret": "secrets/fashion.json", "tags": "fashion,style"},
+        {"name": "fashion-id", "client_secret": "secrets/fashion_id.json", "concurrency": 2,
+         "title_template": "{title} #shorts"}
+      ]
+    }
+
+Pemakaian quota:
+    python channels.py usage [path_quota_db]
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+except Exception:
+    QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+
+# Biaya quota YouTube Data API untuk satu videos.insert
+UPLOAD_QUOTA_COST = 1600
+DEFAULT_DAILY_QUOTA = 10000
+
+CHANNEL_DEFAULTS = {
+    'token': None,
+    'privacy': 'private',
+    'title_template': '{title}',
+    'description': '{description}',
+    'tags': '',
+    'daily_quota': DEFAULT_DAILY_QUOTA,
+    'concurrency': 1,
+}
+
+
+def load_channels(path: str, defaults: dict = None) -> list:
+    """Membaca registry channel dari file JSON.
+
+    File berisi list channel atau {"defaults": {...}, "channels": [...]}.
+    Nilai yang tidak diisi diambil dari `defaults` file, lalu dari `defaults`
+    argumen (mis. opsi CLI), lalu dari CHANNEL_DEFAULTS. Path kredensial
+    relatif terhadap folder file registry; token default adalah
+    token_<name>.json di folder client_secret.
+
+    Returns:
+        list: Channel (dict) dengan semua field terisi
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        data = {'channels': data}
+    base_dir = os.path.dirname(os.path.abspath(path))
+    merged_defaults = dict(CHANNEL_DEFAULTS)
+    merged_defaults.update({k: v for k, v in (defaults or {}).items() if v is not None})
+    merged_defaults.update(data.get('defaults', {}))
+
+    channels = []
+    seen = set()
+    for raw in data.get('channels', []):
+        channel = dict(merged_defaults)
+        channel.update(raw)
+        name = channel.get('name')
+        if not name:
+            raise ValueError("Setiap channel wajib memiliki 'name'")
+        if name in seen:
+            raise ValueError(f"Nama channel duplikat: {name}")
+        seen.add(name)
+        if isinstance(channel['tags'], list):
+            channel['tags'] = ','.join(channel['tags'])
+        channel['concurrency'] = max(1, int(channel['concurrency']))
+        channel['daily_quota'] = int(channel['daily_quota'])
+        if channel.get('client_secret'):
+            channel['client_secret'] = os.path.join(base_dir, channel['client_secret'])
+            if not channel['token']:
+                channel['token'] = os.path.join(os.path.dirname(channel['client_secret']), f"token_{name}.json")
+        if channel['token']:
+            channel['token'] = os.path.join(base_dir, channel['token'])
+        channels.append(channel)
+    if not channels:
+        raise ValueError(f"Tidak ada channel di {path}")
+    return channels
+
+
+def select_channels(channels: list, names: list = None) -> list:
+    """Memilih subset channel berdasarkan nama (semua channel jika `names` kosong)."""
+    if not names:
+        return channels
+    by_name = {c['name']: c for c in channels}
+    missing = [n for n in names if n not in by_name]
+    if missing:
+        raise ValueError(f"Channel tidak ditemukan: {', '.join(missing)}")
+    return [by_name[n] for n in names]
+
+
+def channel_config(channel: dict) -> dict:
+    """Konfigurasi upload (format youtube_config di cli.py) untuk satu channel."""
+    return {
+        'enabled': True,
+        'channel': channel['name'],
+        'client_secret_path': channel.get('client_secret'),
+        'token_path': channel.get('token'),
+        'title_template': channel['title_template'],
+        'description': channel['description'],
+        'tags': channel['tags'],
+        'privacy': channel['privacy'],
+    }
+
+
+def quota_day(now: datetime = None) -> str:
+    """Tanggal hari quota YouTube (quota direset tengah malam waktu Pasifik)."""
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(QUOTA_TIMEZONE).strftime('%Y-%m-%d')
+
+
+class QuotaLedger:
+    """Pemakaian quota per channel per hari (SQLite + WAL, aman untuk beberapa proses)."""
+
+    def __init__(self, db_path: str):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS usage (
+                channel TEXT NOT NULL,
+                day TEXT NOT NULL,
+                units INTEGER NOT NULL DEFAULT 0,
+                uploads INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL,
+                PRIMARY KEY (channel, day)
+            )
+        ''')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def reserve(self, channel: str, units: int, budget: int) -> bool:
+        """Memesan `units` quota jika sisa budget hari ini mencukupi."""
+        day = quota_day()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            row = self._conn.execute('SELECT units FROM usage WHERE channel = ? AND day = ?', (channel, day)).fetchone()
+            used = row[0] if row else 0
+            if used + units > budget:
+                self._conn.execute('ROLLBACK')
+                return False
+            self._conn.execute(
+                'INSERT INTO usage (channel, day, units, uploads, updated_at) VALUES (?, ?, ?, 1, ?) '
+                'ON CONFLICT(channel, day) DO UPDATE SET units = units + excluded.units, uploads = uploads + 1, '
+                'updated_at = excluded.updated_at',
+                (channel, day, units, time.time())
+            )
+            self._conn.execute('COMMIT')
+        return True
+
+    def release(self, channel: str, units: int):
+        """Mengembalikan quota yang dipesan untuk upload yang gagal sebelum diterima YouTube."""
+        with self._lock:
+            self._conn.execute(
+                'UPDATE usage SET units = MAX(0, units - ?), uploads = MAX(0, uploads - 1), updated_at = ? '
+                'WHERE channel = ? AND day = ?',
+                (units, time.time(), channel, quota_day())
+            )
+
+    def usage(self, day: str = None) -> dict:
+        """Pemakaian per channel: {channel: {'units', 'uploads'}}."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT channel, units, uploads FROM usage WHERE day = ?', (day or quota_day(),)
+            ).fetchall()
+        return {channel: {'units': units, 'uploads': uploads} for channel, units, uploads in rows}
+
+
+class ChannelUploader:
+    """Mengupload video ke beberapa channel secara paralel.
+
+    Satu thread pool dipakai bersama semua channel; semaphore per channel
+    membatasi upload yang berjalan bersamaan ke channel yang sama sesuai
+    `concurrency` channel tersebut. Upload berjalan di background sehingga
+    video berikutnya dapat dirender sambil upload video sebelumnya berjalan.
+    """
+
+    def __init__(self, channels: list, upload_fn, quota: QuotaLedger = None, log_callback=print):
+        """
+        Args:
+            channels (list): Channel dari load_channels
+            upload_fn: Function(row, output_path, youtube_config, log_callback) -> video ID atau None
+            quota (QuotaLedger): Pencatat pemakaian quota (opsional)
+            log_callback: Function untuk logging
+        """
+        self.channels = channels
+        self.upload_fn = upload_fn
+        self.quota = quota
+        self.log_callback = log_callback
+        self._semaphores = {c['name']: threading.BoundedSemaphore(c['concurrency']) for c in channels}
+        self._executor = ThreadPoolExecutor(max_workers=sum(c['concurrency'] for c in channels),
+                                            thread_name_prefix='upload')
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+
+    def _upload_one(self, channel: dict, row, output_path: str, extra_config: dict, track: str):
+        name = channel['name']
+
+        def channel_log(message):
+            self.log_callback(f"[{name}] {message}")
+
+        with self._semaphores[name]:
+            if self.quota and not self.quota.reserve(name, UPLOAD_QUOTA_COST, channel['daily_quota']):
+                channel_log(f"Budget quota harian ({channel['daily_quota']}) habis, upload ditunda ke run berikutnya")
+                return None
+            config = channel_config(channel)
+            config.update(extra_config or {})
+            try:
+                with tracing.track(f"{track} / {name}"), tracing.span('upload', channel=name):
+                    video_id = self.upload_fn(row, output_path, config, channel_log)
+            except Exception as e:
+                channel_log(f"Error saat upload ke YouTube: {e}")
+                video_id = None
+            if not video_id and self.quota:
+                self.quota.release(name, UPLOAD_QUOTA_COST)
+            return video_id
+
+    def submit(self, row, output_path: str, extra_config: dict = None, done: dict = None, on_complete=None):
+        """Menjadwalkan upload satu video ke semua channel yang belum selesai.
+
+        Args:
+            row: Data video (lihat upload_video_entry di cli.py)
+            output_path (str): Path video
+            extra_config (dict): Tambahan konfigurasi upload, mis. content_tags
+            done (dict): {channel: video ID} yang sudah diupload pada run sebelumnya
+            on_complete: Function(results) dipanggil setelah semua channel selesai,
+                dengan results {channel: video ID atau None}
+        """
+        results = dict(done or {})
+        targets = [c for c in self.channels if not results.get(c['name'])]
+        if not targets:
+            if on_complete:
+                on_complete(results)
+            return
+        remaining = [len(targets)]
+        lock = threading.Lock()
+        track = tracing.current_track()
+
+        def finished(name, future):
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                self.log_callback(f"[{name}] Error saat upload ke YouTube: {e}")
+                results[name] = None
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last and on_complete:
+                try:
+                    on_complete(results)
+                except Exception as e:
+                    self.log_callback(f"Error setelah upload selesai: {e}")
+            with self._pending_lock:
+                self._pending.discard(future)
+
+        for channel in targets:
+            future = self._executor.submit(self._upload_one, channel, row, output_path, extra_config, track)
+            with self._pending_lock:
+                self._pending.add(future)
+            future.add_done_callback(lambda f, name=channel['name']: finished(name, f))
+
+    def wait(self):
+        """Menunggu semua upload yang sedang berjalan selesai."""
+        while True:
+            with self._pending_lock:
+                pending = list(self._pending)
+            if not pending:
+                return
+            for future in pending:
+                try:
+                    future.result()
+                except Exception:
+                    pass
+            # Beri kesempatan callback selesai sebelum memeriksa ulang
+            time.sleep(0.01)
+
+    def close(self):
+        self.wait()
+        self._executor.shutdown(wait=True)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3) or sys.argv[1] != 'usage':
+        print("Penggunaan: python channels.py usage [path_quota_db]")
+        sys.exit(1)
+    db_path = sys.argv[2] if len(sys.argv) == 3 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp', 'channel_quota.db')
+    print(json.dumps({'day': quota_day(), 'usage': QuotaLedger(db_path).usage()}, indent=2))
+    sys.exit(0)
@@ -1,46 +1,63 @@
 #!/usr/bin/env python
 import os
+import math
 import random
+import re
 import pandas as pd
 import csv
-from gtts import gTTS
 import requests
 import subprocess
 import shlex
 import time
 import json
+import itertools
+from datetime import datetime, timedelta
 import argparse
 import sys
 import shutil
-from openai import OpenAI
 from dotenv import load_dotenv
 
+from ledger import JobLedger, STATUS_DONE, STATUS_FAILED, job_key_for, required_stages_for
+from dedupe import ContentIndex
+from image_prep import CANVAS_WIDTH, CANVAS_HEIGHT, normalize_images
+from farm import DEFAULT_LEASE_SECONDS, default_worker_id, open_queue, run_worker, wait_for_queue
+from compositor import ENGINE_FFMPEG, ENGINE_NUMPY, ENGINES, FPS, render_scenes
+from render_plan import (RenderCache, build_render_plan, file_digest, list_music_files, node_hash, prompts_digest, save_plan,
+                         seed_for)
+from render_check import validate_render, validate_video
+from image_library import DEFAULT_LIBRARY_DIR, DEFAULT_REUSE_THRESHOLD, get_library
+from ffmpeg_runner import DEFAULT_STALL_TIMEOUT, configure as configure_ffmpeg, format_progress, run_ffmpeg
+from channels import ChannelUploader, QuotaLedger, load_channels, select_channels
+from stream_upload import FRAGMENT_MOVFLAGS, StreamingUpload
+from scratch import DEFAULT_BUDGET_GB as DEFAULT_SCRATCH_BUDGET_GB, configure as configure_scratch, estimate_bytes, get_scratch
+import tracing
+from predict import DEFAULT_HISTORY_DB, RenderPredictor, content_features, get_history, machine_load, plan_features
+from scheduler import (DEFAULT_MAX_DEPTH, DEFAULT_MIN_DEPTH, DEFAULT_OFF_PEAK, DEFAULT_PUBLISH_SLOTS, PublishBuffer,
+                       next_slots, parse_slots, parse_window, plan_production, to_rfc3339)
+from ratelimit import get_limiter, load_config_file, snapshot_all, format_stats
+from providers import (HttpError, PROVIDER_KINDS, YOUTUBE_API_AVAILABLE, configure as configure_providers, get_provider,
+                       is_fake, load_config_file as load_provider_config, parse_kinds)
+
 # Load environment variables from .env file
 load_dotenv()
 
-# YouTube API imports (will be installed via requirements)
-try:
-    from googleapiclient.discovery import build
-    from googleapiclient.errors import HttpError
-    from googleapiclient.http import MediaFileUpload
-    from google_auth_oauthlib.flow import InstalledAppFlow
-    from google.auth.transport.requests import Request
-    from google.oauth2.credentials import Credentials
-    YOUTUBE_API_AVAILABLE = True
-except ImportError:
-    YOUTUBE_API_AVAILABLE = False
-    print("Warning: YouTube API libraries not installed. Auto-upload feature will be disabled.")
-    print("Install with: pip install google-api-python-client google-auth-httplib2 google-auth-oauthlib")
-
 # Konfigurasi
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_FOLDER = os.path.join(SCRIPT_DIR, 'output')
 TEMP_DIR = os.path.join(SCRIPT_DIR, 'temp')
 IMAGE_OUTPUT_DIR = os.path.join(TEMP_DIR, 'images')
+# Gambar dan frame per set image prompts, dipakai bersama oleh job dengan prompt yang sama
+IMAGE_SETS_DIR = os.path.join(TEMP_DIR, 'image_sets')
+
+# Kebijakan generate gambar per prompt
+IMAGE_PROMPT_TIMEOUT = 180      # detik per panggilan imagefx
+IMAGE_PROMPT_RETRIES = 2        # percobaan ulang per prompt setelah percobaan pertama
+IMAGE_RETRY_BACKOFF = 5         # detik, dikali 2 setiap percobaan ulang
+MAX_MISSING_SCENES = 1          # jumlah prompt gagal yang masih boleh dirender (N-1 scene)
 
 # Konfigurasi direktori
 
-def generate_image_from_prompt(prompt: str, output_dir: str = None, count: int = 4, log_callback=print, skip_validation: bool = False):
+def generate_image_from_prompt(prompt: str, output_dir: str = None, count: int = 4, log_callback=print, skip_validation: bool = False, timeout: float = None):
     """
     Menghasilkan gambar dari prompt menggunakan ImageFX.
     
@@ -50,6 +67,7 @@ def generate_image_from_prompt(prompt: str, output_dir: str = None, count: int =
         count (int): Jumlah gambar yang akan digenerate
         log_callback: Function untuk logging
         skip_validation (bool): Jika True, lewati validasi dan gunakan placeholder image
+        timeout (float): Batas waktu satu panggilan imagefx dalam detik (None = tanpa batas)
         
     Returns:
         bool: True jika berhasil, False jika gagal
@@ -95,58 +113,42 @@ def generate_image_from_prompt(prompt: str, output_dir: str = None, count: int =
                 log_callback(f"✅ {count} file dummy berhasil dibuat di folder: {output_dir}")
                 return True
         
-        # Mode normal dengan ImageFX
-        # Ambil Google cookie dari environment variable
-        google_cookie = os.environ.get("GOOGLE_COOKIE")
-        if not google_cookie:
-            log_callback("Error: GOOGLE_COOKIE tidak ditemukan di environment variable atau file .env")
-            return False
-            
-        # Konfigurasi default dari environment variable atau gunakan nilai default
-        model = os.getenv("DEFAULT_MODEL", "IMAGEN_3_5")
-        size = os.getenv("DEFAULT_SIZE", "PORTRAIT")
-        
-        # Siapkan command untuk imagefx
-        cmd = [
-            "imagefx", "generate",
-            "--prompt", prompt,
-            "--cookie", google_cookie,
-            "--model", model,
-            "--size", size,
-            "--count", str(count),
-            "--dir", output_dir
-        ]
+        # Mode normal dengan provider gambar (ImageFX, atau fake untuk pengujian beban)
+        provider = get_provider('image')
+        log_callback(f"🚀 Menjalankan generate image ({provider.name}) dengan prompt: {prompt[:50]}...")
         
-        log_callback(f"🚀 Menjalankan generate image dengan prompt: {prompt[:50]}...")
-        result = subprocess.run(cmd, check=True)
+        # Jalankan provider di bawah rate limiter bersama (retry otomatis saat throttling)
+        get_limiter('imagefx').call(provider.generate, prompt, output_dir, count, timeout=timeout, log_callback=log_callback)
         
-        if result.returncode == 0:
-            log_callback(f"✅ {count} gambar berhasil digenerate, tersimpan di folder: {output_dir}")
-            return True
-        else:
-            log_callback(f"❌ Gagal generate gambar, kode error: {result.returncode}")
-            return False
+        log_callback(f"✅ {count} gambar berhasil digenerate, tersimpan di folder: {output_dir}")
+        return True
             
     except subprocess.CalledProcessError as e:
-        log_callback(f"Error saat menjalankan imagefx: {e}")
+        log_callback(f"Error saat menjalankan imagefx: {e} {e.stderr or ''}")
+        return False
+    except subprocess.TimeoutExpired:
+        log_callback(f"Error: imagefx melebihi batas waktu {timeout} detik")
         return False
     except Exception as e:
         log_callback(f"Error saat generate gambar: {e}")
         return False
 
-def generate_gtts_audio(text: str):
+def generate_gtts_audio(text: str, output_dir: str = None, lang: str = 'en'):
     """Menghasilkan file audio dari teks menggunakan Google TTS.
     
     Args:
         text (str): Teks yang akan dikonversi menjadi audio
+        output_dir (str): Direktori untuk menyimpan audio (default: TEMP_DIR)
+        lang (str): Kode bahasa gTTS, mis. 'en', 'id', 'es'
     """
     try:
-        if not os.path.exists(TEMP_DIR):
-            os.makedirs(TEMP_DIR)
-        temp_audio_path = os.path.join(TEMP_DIR, f"temp_audio_{random.randint(1,1000)}.mp3")
+        output_dir = output_dir or TEMP_DIR
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        provider = get_provider('speech')
+        temp_audio_path = os.path.join(output_dir, f"temp_audio_{lang}_{random.randint(1,1000)}{provider.extension}")
         
-        tts = gTTS(text, lang='en')
-        tts.save(temp_audio_path)
+        get_limiter('gtts').call(provider.synthesize, text, temp_audio_path, lang=lang)
         
         return temp_audio_path
     except Exception as e:
@@ -156,8 +158,12 @@ def generate_gtts_audio(text: str):
 # Fungsi generate_elevenlabs_audio telah dihapus karena tidak dibutuhkan lagi
 # Voice over hanya menggunakan Google Text to Speech
 
-def run_ffmpeg_command(command: list, log_callback):
-    """Menjalankan perintah ffmpeg dan mencatat lognya."""
+def run_ffmpeg_command(command: list, log_callback, stage: str = None):
+    """Menjalankan perintah ffmpeg dan mencatat lognya.
+    
+    Progress (frame, fps, speed, out_time) dibaca live; watchdog menghentikan
+    proses yang macet atau melebihi batas waktu tahap `stage`.
+    """
     # Gunakan cara yang kompatibel dengan Windows dan Unix untuk menampilkan command
     if os.name == 'nt':  # Windows
         # Pada Windows, gunakan quotes sederhana untuk logging
@@ -167,16 +173,45 @@ def run_ffmpeg_command(command: list, log_callback):
     
     log_callback(f"Menjalankan perintah FFmpeg:\n{command_str}\n")
     try:
-        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        stdout, stderr = process.communicate()
-        if process.returncode != 0:
+        result = run_ffmpeg(command, stage=stage, log_callback=log_callback)
+        if not result.ok:
+            stderr = '\n'.join(result.stderr_tail)
             log_callback(f"FFmpeg Error:\n{stderr}")
             return False
+        log_callback(f"FFmpeg [{stage or 'ffmpeg'}] selesai dalam {result.elapsed:.1f} detik ({format_progress(result.progress)})")
         return True
     except FileNotFoundError:
         log_callback("Error: FFmpeg tidak ditemukan. Pastikan FFmpeg terinstal dan ada di PATH sistem Anda.")
         return False
 
+def find_keyframe_after(video_path: str, min_time: float, max_time: float):
+    """Mencari keyframe pertama pada atau setelah `min_time` detik.
+    
+    Hanya header paket yang dibaca (tanpa decode), sampai `max_time` detik.
+    
+    Returns:
+        float: Waktu keyframe dalam detik, atau None jika tidak ditemukan
+    """
+    command = [
+        'ffprobe', '-v', 'quiet', '-select_streams', 'v:0', '-read_intervals', f'%+{max_time}',
+        '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', os.path.normpath(video_path)
+    ]
+    try:
+        result = tracing.run(command, capture_output=True, text=True)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    keyframes = []
+    for line in result.stdout.splitlines():
+        pts_time, _, flags = line.partition(',')
+        try:
+            if 'K' in flags and float(pts_time) >= min_time:
+                keyframes.append(float(pts_time))
+        except ValueError:
+            continue
+    return min(keyframes) if keyframes else None
+
 def get_audio_duration(audio_path: str) -> float:
     """Menghitung durasi audio dalam detik menggunakan ffprobe.
     
@@ -193,13 +228,12 @@ def get_audio_duration(audio_path: str) -> float:
             'ffprobe', '-v', 'quiet', '-show_entries', 'format=duration',
             '-of', 'csv=p=0', normalized_path
         ]
-        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        stdout, stderr = process.communicate()
+        result = tracing.run(command, capture_output=True, text=True)
         
-        if process.returncode == 0 and stdout.strip():
-            return float(stdout.strip())
+        if result.returncode == 0 and result.stdout.strip():
+            return float(result.stdout.strip())
         else:
-            print(f"Error getting audio duration: {stderr}")
+            print(f"Error getting audio duration: {result.stderr}")
             return 0.0
     except Exception as e:
         print(f"Error in get_audio_duration: {e}")
@@ -215,47 +249,9 @@ def authenticate_youtube(client_secret_path: str, token_path: str = None):
     Returns:
         googleapiclient.discovery.Resource: YouTube API service object
     """
-    if not YOUTUBE_API_AVAILABLE:
-        raise ImportError("YouTube API libraries not installed")
-    
-    SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
-    creds = None
-    
-    # Load existing token if provided
-    if token_path and os.path.exists(token_path):
-        try:
-            creds = Credentials.from_authorized_user_file(token_path, SCOPES)
-        except Exception as e:
-            print(f"Error loading token: {e}")
-    
-    # If there are no (valid) credentials available, let the user log in
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            try:
-                creds.refresh(Request())
-            except Exception as e:
-                print(f"Error refreshing token: {e}")
-                creds = None
-        
-        if not creds:
-            if not os.path.exists(client_secret_path):
-                raise FileNotFoundError(f"Client secret file not found: {client_secret_path}")
-            
-            flow = InstalledAppFlow.from_client_secrets_file(client_secret_path, SCOPES)
-            creds = flow.run_local_server(port=0)
-        
-        # Save the credentials for the next run
-        if token_path:
-            try:
-                with open(token_path, 'w') as token:
-                    token.write(creds.to_json())
-                print(f"Token berhasil disimpan di: {token_path}")
-            except Exception as e:
-                print(f"Error menyimpan token: {e}")
-    
-    return build('youtube', 'v3', credentials=creds)
+    return get_provider('upload').authenticate(client_secret_path, token_path)
 
-def upload_to_youtube(youtube_service, video_path: str, title: str, description: str, tags: list, privacy_status: str, log_callback):
+def upload_to_youtube(youtube_service, video_path: str, title: str, description: str, tags: list, privacy_status: str, log_callback, publish_at: str = None, source=None):
     """Upload video ke YouTube.
     
     Args:
@@ -266,6 +262,8 @@ def upload_to_youtube(youtube_service, video_path: str, title: str, description:
         tags (list): List tags
         privacy_status (str): Status privacy (private, unlisted, public)
         log_callback: Function untuk logging
+        publish_at (str): Waktu publish terjadwal (RFC3339, UTC); video diupload sebagai private
+        source: GrowingFile untuk upload streaming selagi video masih ditulis encoder (opsional)
         
     Returns:
         str: Video ID jika berhasil, None jika gagal
@@ -290,42 +288,40 @@ def upload_to_youtube(youtube_service, video_path: str, title: str, description:
             }
         }
         
-        # Create MediaFileUpload object
-        media = MediaFileUpload(video_path, chunksize=-1, resumable=True, mimetype='video/mp4')
+        # YouTube hanya menerima publishAt untuk video private
+        if publish_at:
+            body['status']['privacyStatus'] = 'private'
+            body['status']['publishAt'] = publish_at
+            log_callback(f"Video dijadwalkan publish pada: {publish_at}")
         
         log_callback(f"Memulai upload video: {title}")
         
         # Call the API's videos.insert method to create and upload the video
-        insert_request = youtube_service.videos().insert(
-            part=','.join(body.keys()),
-            body=body,
-            media_body=media
-        )
+        if source:
+            insert_request = get_provider('upload').insert_stream(youtube_service, source, body)
+        else:
+            insert_request = get_provider('upload').insert(youtube_service, video_path, body)
         
         response = None
-        error = None
-        retry = 0
+        limiter = get_limiter('youtube')
         
         while response is None:
             try:
-                status, response = insert_request.next_chunk()
-                if status:
+                # Tunggu chunk berikutnya ditulis encoder di luar slot rate limiter
+                if source:
+                    source.wait_ready(getattr(insert_request, 'resumable_progress', 0))
+                # Error 5xx dan throttling (429/quota) dicoba ulang oleh rate limiter bersama
+                status, response = limiter.call(insert_request.next_chunk, log_callback=log_callback)
+                if status and getattr(status, 'total_size', 1) is None:
+                    log_callback(f"Upload progress: {status.resumable_progress / (1024 * 1024):.1f} MB (encoder masih berjalan)")
+                elif status:
                     progress = int(status.progress() * 100)
                     log_callback(f"Upload progress: {progress}%")
-            except HttpError as e:
-                if e.resp.status in [500, 502, 503, 504]:
-                    error = f"A retriable HTTP error {e.resp.status} occurred: {e.content}"
-                    retry += 1
-                    if retry > 3:
-                        log_callback(f"Upload failed after 3 retries: {error}")
-                        return None
-                    log_callback(f"Retrying upload... ({retry}/3)")
-                    time.sleep(2 ** retry)
-                else:
-                    log_callback(f"A non-retriable HTTP error occurred: {e}")
-                    return None
             except Exception as e:
-                log_callback(f"An error occurred during upload: {e}")
+                if HttpError and isinstance(e, HttpError):
+                    log_callback(f"Upload failed with HTTP error {e.resp.status}: {e}")
+                else:
+                    log_callback(f"An error occurred during upload: {e}")
                 return None
         
         if response:
@@ -399,34 +395,13 @@ def generate_content_with_qwen(prompt_file_path: str, log_callback):
         os.makedirs(TEMP_DIR)
         log_callback(f"Membuat direktori temp: {TEMP_DIR}")
     try:
-        # Cek API key dari environment variable
-        api_key = os.getenv("DASHSCOPE_API_KEY")
-        if not api_key:
-            log_callback("Error: DASHSCOPE_API_KEY tidak ditemukan di environment variable")
-            return None
-            
         # Baca file prompt
         with open(prompt_file_path, 'r', encoding='utf-8') as f:
             prompt_content = f.read()
             
-        log_callback("Menginisialisasi OpenAI client untuk Qwen API...")
-        client = OpenAI(
-            api_key=api_key,
-            base_url="https://dashscope-intl.aliyuncs.com/compatible-mode/v1"
-        )
-        
-        log_callback("Mengirim permintaan ke Qwen API...")
-        completion = client.chat.completions.create(
-            model="qwen-plus-latest",
-            messages=[
-                {"role": "user", "content": prompt_content}
-            ],
-            temperature=0.7,  # Sedikit kreativitas untuk variasi konten
-            max_tokens=1000   # Batasi panjang respons
-        )
-        
-        # Ambil respons dari API
-        response_content = completion.choices[0].message.content
+        provider = get_provider('content')
+        log_callback(f"Mengirim permintaan ke Qwen API ({provider.name})...")
+        response_content = get_limiter('qwen').call(provider.complete, prompt_content, log_callback=log_callback)
         log_callback("Respons diterima dari Qwen API")
         
         # Coba parse respons sebagai JSON
@@ -443,22 +418,9 @@ def generate_content_with_qwen(prompt_file_path: str, log_callback):
             content_data = json.loads(json_content)
             
             # Validasi struktur JSON
-            required_fields = ['title', 'voiceover', 'description', 'image_prompts']
-            for field in required_fields:
-                if field not in content_data:
-                    log_callback(f"Error: Field '{field}' tidak ditemukan dalam respons JSON")
-                    return None
-            
-            # Pastikan image_prompts adalah array dengan minimal 1 item
-            if not isinstance(content_data['image_prompts'], list) or len(content_data['image_prompts']) < 1:
-                log_callback("Error: Field 'image_prompts' harus berupa array dengan minimal 1 item")
+            if validate_content_entry(content_data, "respons JSON", log_callback) is None:
                 return None
                 
-            # Field 'tags' bersifat opsional
-            if 'tags' in content_data and not isinstance(content_data['tags'], list):
-                log_callback("Warning: Field 'tags' harus berupa array. Menggunakan array kosong sebagai default.")
-                content_data['tags'] = []
-                
             log_callback(f"Konten berhasil dihasilkan dengan judul: {content_data['title']}")
             
             # Simpan output.json di folder temp secara default
@@ -481,81 +443,900 @@ def generate_content_with_qwen(prompt_file_path: str, log_callback):
         log_callback(f"Error menghasilkan konten dengan Qwen API: {e}")
         return None
 
-def load_content_from_json(json_file_path: str, log_callback):
-    """Membaca konten untuk video dari file JSON.
+REQUIRED_CONTENT_FIELDS = ['title', 'voiceover', 'description', 'image_prompts']
+
+def validate_content_entry(item, label: str, log_callback):
+    """Memvalidasi satu entri konten dalam satu kali jalan.
     
     Args:
-        json_file_path (str): Path ke file JSON
+        item: Objek hasil parsing JSON untuk satu entri
+        label (str): Label entri untuk pesan log (mis. "entri #3" atau "baris 12")
         log_callback: Function untuk logging
         
     Returns:
-        list: Daftar konten yang dibaca dari file JSON, atau None jika gagal
+        dict: Entri yang sudah divalidasi, atau None jika tidak valid
     """
-    try:
-        # Baca file JSON
+    if not isinstance(item, dict):
+        log_callback(f"Error: {label} bukan objek JSON")
+        return None
+    
+    for field in REQUIRED_CONTENT_FIELDS:
+        if field not in item:
+            log_callback(f"Error: Field '{field}' tidak ditemukan dalam {label}")
+            return None
+    
+    if not isinstance(item['image_prompts'], list) or len(item['image_prompts']) < 1:
+        log_callback(f"Error: Field 'image_prompts' pada {label} harus berupa array dengan minimal 1 item")
+        return None
+    
+    # Field 'tags' bersifat opsional
+    if 'tags' in item and not isinstance(item['tags'], list):
+        log_callback(f"Warning: Field 'tags' pada {label} harus berupa array. Menggunakan array kosong sebagai default.")
+        item['tags'] = []
+    
+    # Field 'variants' bersifat opsional: setiap varian wajib punya nama unik yang aman untuk nama file
+    if 'variants' in item:
+        variants = item['variants']
+        names = [v.get('name') if isinstance(v, dict) else None for v in variants] if isinstance(variants, list) else [None]
+        if not all(isinstance(n, str) and re.fullmatch(r'[A-Za-z0-9_-]+', n) for n in names) or len(set(names)) != len(names):
+            log_callback(f"Warning: Field 'variants' pada {label} harus berupa array objek dengan 'name' unik (huruf, angka, - atau _). Varian diabaikan.")
+            item['variants'] = []
+    
+    return item
+
+def _detect_content_format(json_file_path: str):
+    """Menentukan format file konten: 'jsonl', 'array', atau 'object'."""
+    if json_file_path.lower().endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    
+    with open(json_file_path, 'r', encoding='utf-8') as f:
+        first_line = ''
+        for line in f:
+            if line.strip():
+                first_line = line.strip()
+                break
+        if first_line.startswith('['):
+            return 'array'
+        # Objek tunggal yang ditulis dalam satu baris bisa diperlakukan sebagai JSONL
+        try:
+            json.loads(first_line)
+            return 'jsonl'
+        except json.JSONDecodeError:
+            return 'object'
+
+def iter_content_from_file(json_file_path: str, log_callback, limit: int = None):
+    """Membaca entri konten secara bertahap (generator) dari file JSON atau JSON Lines.
+    
+    Format JSON Lines dibaca baris per baris sehingga file besar tidak dimuat
+    seluruhnya ke memori. Entri yang tidak valid dilewati dengan pesan error
+    per baris, dan pembacaan berhenti begitu `limit` entri valid tercapai.
+    Format array JSON dan objek tunggal tetap didukung.
+    
+    Args:
+        json_file_path (str): Path ke file JSON / JSONL
+        log_callback: Function untuk logging
+        limit (int): Jumlah maksimal entri valid yang dihasilkan (opsional)
+        
+    Yields:
+        dict: Entri konten yang valid
+    """
+    content_format = _detect_content_format(json_file_path)
+    log_callback(f"Membaca konten dari file: {json_file_path} (format: {content_format})")
+    
+    yielded = 0
+    skipped = 0
+    
+    if content_format == 'jsonl':
+        with open(json_file_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                if limit and yielded >= limit:
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError as e:
+                    log_callback(f"Error parsing JSON pada baris {line_number}: {e}. Baris dilewati.")
+                    skipped += 1
+                    continue
+                item = validate_content_entry(item, f"baris {line_number}", log_callback)
+                if item is None:
+                    skipped += 1
+                    continue
+                yielded += 1
+                yield item
+    else:
         with open(json_file_path, 'r', encoding='utf-8') as f:
             content_data = json.load(f)
         
-        log_callback(f"Membaca konten dari file JSON: {json_file_path}")
-        
-        # Periksa apakah content_data adalah list atau objek tunggal
-        if isinstance(content_data, list):
-            # Format array objek JSON
+        if content_format == 'array' and isinstance(content_data, list):
             log_callback(f"Format JSON: Array dengan {len(content_data)} entri")
-            
-            # Validasi setiap objek dalam array
-            for i, item in enumerate(content_data):
-                # Validasi struktur JSON untuk setiap item
-                required_fields = ['title', 'voiceover', 'description', 'image_prompts']
-                for field in required_fields:
-                    if field not in item:
-                        log_callback(f"Error: Field '{field}' tidak ditemukan dalam entri #{i+1} file JSON")
-                        return None
-                
-                # Field 'tags' bersifat opsional dalam file JSON
-                if 'tags' in item and not isinstance(item['tags'], list):
-                    log_callback(f"Warning: Field 'tags' pada entri #{i+1} harus berupa array. Menggunakan array kosong sebagai default.")
-                    item['tags'] = []
+            items = content_data
         else:
             # Format objek JSON tunggal (untuk kompatibilitas mundur)
             log_callback("Format JSON: Objek tunggal (bukan array)")
+            items = [content_data]
+        
+        for i, item in enumerate(items):
+            if limit and yielded >= limit:
+                break
+            item = validate_content_entry(item, f"entri #{i+1}", log_callback)
+            if item is None:
+                skipped += 1
+                continue
+            yielded += 1
+            yield item
+    
+    if skipped:
+        log_callback(f"Warning: {skipped} entri tidak valid dilewati")
+    log_callback(f"{yielded} entri valid dibaca dari {json_file_path}")
+
+def resolve_font_path(log_callback):
+    """Mengembalikan path absolut font Anton-Regular.ttf, atau font sistem sebagai fallback."""
+    # Path ke font Anton-Regular.ttf dengan kompatibilitas cross-platform
+    font_path = os.path.join(SCRIPT_DIR, 'fonts', 'Anton-Regular.ttf')
+    
+    # Periksa keberadaan font, gunakan fallback jika tidak ada
+    if not os.path.exists(font_path):
+        # Coba buat direktori fonts jika belum ada
+        fonts_dir = os.path.join(SCRIPT_DIR, 'fonts')
+        if not os.path.exists(fonts_dir):
+            os.makedirs(fonts_dir)
+        log_callback("Warning: Font Anton-Regular.ttf tidak ditemukan, menggunakan font sistem")
+        # Gunakan font default sistem berdasarkan OS
+        if os.name == 'nt':  # Windows
+            font_path = 'C:\\Windows\\Fonts\\Arial.ttf'
+        else:  # macOS/Unix
+            font_path = '/System/Library/Fonts/Helvetica.ttc'
+    
+    # Gunakan normpath untuk memastikan path kompatibel dengan sistem operasi
+    return os.path.normpath(os.path.abspath(font_path))
+
+def build_title_filter(title: str, font_absolute_path: str) -> str:
+    """Membuat filter drawtext untuk judul besar di awal video (0.75 detik pertama)."""
+    title_text = title.upper()
+    # Escape karakter khusus untuk FFmpeg
+    title_text = escape_ffmpeg_text(title_text)
+    
+    # Bagi judul menjadi beberapa baris jika terlalu panjang
+    max_chars_per_line = 15
+    words = title_text.split()
+    lines = []
+    current_line = ""
+    
+    for word in words:
+        if len(current_line) + len(word) + 1 <= max_chars_per_line:
+            if current_line:
+                current_line += " " + word
+            else:
+                current_line = word
+        else:
+            lines.append(current_line)
+            current_line = word
+    
+    if current_line:
+        lines.append(current_line)
+    
+    # Gabungkan baris dengan newline untuk FFmpeg
+    multiline_title = "\n".join(lines)
+    
+    # Atur ukuran font untuk judul (lebih besar dari sebelumnya)
+    title_font_size = 130 if len(lines) > 1 else 150
+    
+    return f"drawtext=fontfile='{font_absolute_path}':text='{multiline_title}':fontcolor=yellow:fontsize={title_font_size}:x=(w-text_w)/2:y=(h-text_h)/2:text_align=center:borderw=5:bordercolor=black:enable='between(t,0,0.75)'"
+
+def caption_filter(segment: dict, font_absolute_path: str) -> str:
+    """Membuat filter drawtext untuk satu segmen caption (lihat segment_captions)."""
+    # Escape karakter khusus untuk FFmpeg
+    segment_text = escape_ffmpeg_text(segment['text'])
+    margin_horizontal = 40  # Margin kiri dan kanan 40px
+    # Posisi x dengan margin: center dalam area yang tersisa setelah dikurangi margin
+    x_position = f"({margin_horizontal}+(w-{margin_horizontal*2}-text_w)/2)"
+    # Teks multi-baris memakai line_spacing
+    line_spacing = ":line_spacing=10" if segment['wrapped'] else ""
+    return f"drawtext=fontfile='{font_absolute_path}':text='{segment_text}':fontcolor=yellow:fontsize=70:x={x_position}:y=(h-text_h)/2{line_spacing}:text_align=center:borderw=3:bordercolor=black:enable='between(t,{segment['start']:.2f},{segment['end']:.2f})'"
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+def _list_images(folder):
+    """Daftar path gambar di `folder` (tidak rekursif), urut nama."""
+    if not os.path.isdir(folder):
+        return []
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS))
+
+def _prompt_folder_matches(prompt_folder, prompt):
+    """True jika folder prompt berisi gambar yang sudah lengkap untuk prompt yang sama."""
+    marker = os.path.join(prompt_folder, 'prompt.txt')
+    if not os.path.exists(marker) or not _list_images(prompt_folder):
+        return False
+    with open(marker, 'r', encoding='utf-8') as f:
+        return f.read() == prompt
+
+def prepare_entry_images(image_prompts, images_folder, generate_images, skip_image_validation, log_callback, retries=IMAGE_PROMPT_RETRIES, timeout=IMAGE_PROMPT_TIMEOUT, max_missing=MAX_MISSING_SCENES, library=None, reuse_threshold=None):
+    """Menyiapkan gambar untuk satu entri (tahap 'images').
+    
+    Setiap prompt memakai subfolder sendiri (prompt_01, prompt_02, ...). Gambar
+    yang sudah berhasil dipertahankan sehingga percobaan ulang atau --resume
+    hanya men-generate prompt yang belum berhasil.
+    
+    Args:
+        image_prompts: List prompt untuk generate gambar
+        images_folder: Folder tempat gambar hasil generate disimpan
+        generate_images: Flag untuk menghasilkan gambar menggunakan ImageFX
+        skip_image_validation: Flag untuk melewati validasi ImageFX (hanya untuk pengujian)
+        log_callback: Function untuk logging
+        retries: Jumlah percobaan ulang per prompt
+        timeout: Batas waktu satu panggilan imagefx dalam detik
+        max_missing: Jumlah prompt gagal yang masih boleh dirender dengan scene lebih sedikit
+        library: ImageLibrary untuk mengindeks gambar hasil generate (opsional)
+        reuse_threshold: Jika diisi, prompt yang mirip (>= threshold) dengan prompt di
+            pustaka memakai gambar pustaka alih-alih memanggil imagefx
+        
+    Returns:
+        list: Daftar path gambar, atau None jika gagal
+    """
+    os.makedirs(images_folder, exist_ok=True)
+    
+    # Hapus file lepas di folder gambar (hasil run lama tanpa subfolder per prompt)
+    for f in os.listdir(images_folder):
+        path = os.path.join(images_folder, f)
+        if os.path.isfile(path):
+            os.remove(path)
+    
+    log_callback(f"Menggunakan folder temp untuk gambar: {images_folder}")
+    
+    all_images = []
+    
+    # Generate gambar dari image_prompts jika diminta
+    if generate_images:
+        log_callback(f"Menggunakan {len(image_prompts)} image prompts untuk generate gambar")
+        failed_prompts = []
+        # Gambar pustaka yang sudah dipakai entri ini, agar satu gambar tidak muncul dua kali
+        library_paths = set()
+        
+        # Generate **satu** gambar untuk setiap prompt
+        for i, prompt in enumerate(image_prompts):
+            prompt_folder = os.path.join(images_folder, f"prompt_{i+1:02d}")
             
-            # Validasi struktur JSON
-            required_fields = ['title', 'voiceover', 'description', 'image_prompts']
-            for field in required_fields:
-                if field not in content_data:
-                    log_callback(f"Error: Field '{field}' tidak ditemukan dalam file JSON")
-                    return None
-                    
-            # Field 'tags' bersifat opsional dalam file JSON
-            if 'tags' in content_data and not isinstance(content_data['tags'], list):
-                log_callback("Warning: Field 'tags' harus berupa array. Menggunakan array kosong sebagai default.")
-                content_data['tags'] = []
+            # Gunakan ulang gambar yang sudah berhasil untuk prompt yang sama
+            if _prompt_folder_matches(prompt_folder, prompt):
+                log_callback(f"Prompt {i+1}: menggunakan gambar yang sudah ada")
+                all_images.extend(_list_images(prompt_folder))
+                continue
+            
+            # Gunakan gambar dari pustaka jika ada prompt yang cukup mirip
+            match = library.lookup(prompt, reuse_threshold, exclude_paths=library_paths) if library is not None and reuse_threshold is not None else None
+            if match:
+                shutil.rmtree(prompt_folder, ignore_errors=True)
+                os.makedirs(prompt_folder, exist_ok=True)
+                shutil.copy(match['path'], os.path.join(prompt_folder, f"library{os.path.splitext(match['path'])[1]}"))
+                with open(os.path.join(prompt_folder, 'prompt.txt'), 'w', encoding='utf-8') as f:
+                    f.write(prompt)
+                library_paths.add(match['path'])
+                log_callback(f"Prompt {i+1}: menggunakan gambar pustaka (kemiripan {match['similarity']:.2f}): {match['prompt'][:60]}")
+                all_images.extend(_list_images(prompt_folder))
+                continue
+            
+            log_callback(f"Prompt {i+1}: {prompt}")
+            images = []
+            for attempt in range(retries + 1):
+                # Buang sisa percobaan sebelumnya (mis. file setengah jadi)
+                shutil.rmtree(prompt_folder, ignore_errors=True)
+                os.makedirs(prompt_folder, exist_ok=True)
                 
-        # Validasi image_prompts
-        if isinstance(content_data, list):
-            # Validasi image_prompts untuk setiap item dalam array
-            for i, item in enumerate(content_data):
-                if not isinstance(item['image_prompts'], list) or len(item['image_prompts']) < 1:
-                    log_callback(f"Error: Field 'image_prompts' pada entri #{i+1} harus berupa array dengan minimal 1 item")
-                    return None
-        else:
-            # Validasi image_prompts untuk objek tunggal
-            if not isinstance(content_data['image_prompts'], list) or len(content_data['image_prompts']) < 1:
-                log_callback("Error: Field 'image_prompts' harus berupa array dengan minimal 1 item")
+                success = generate_image_from_prompt(
+                    prompt=prompt,
+                    output_dir=prompt_folder,
+                    count=1,  # Mengubah count menjadi 1
+                    log_callback=log_callback,
+                    skip_validation=skip_image_validation,
+                    timeout=timeout
+                )
+                images = _list_images(prompt_folder) if success else []
+                if images:
+                    break
+                if attempt < retries:
+                    delay = IMAGE_RETRY_BACKOFF * (2 ** attempt)
+                    log_callback(f"⚠️ Prompt {i+1} gagal, mencoba ulang dalam {delay} detik ({attempt + 1}/{retries})")
+                    time.sleep(delay)
+            
+            if images:
+                with open(os.path.join(prompt_folder, 'prompt.txt'), 'w', encoding='utf-8') as f:
+                    f.write(prompt)
+                all_images.extend(images)
+                # Simpan ke pustaka agar prompt serupa di kemudian hari tidak perlu generate ulang
+                if library is not None and not skip_image_validation:
+                    for image in images:
+                        try:
+                            library_path, stored = library.add(prompt, image)
+                            library_paths.add(library_path)
+                            if not stored:
+                                log_callback(f"Prompt {i+1}: gambar mirip sudah ada di pustaka, prompt dicatat sebagai alias")
+                        except Exception as e:
+                            log_callback(f"⚠️ Gagal menyimpan gambar ke pustaka: {e}")
+            else:
+                log_callback(f"❌ Gagal generate gambar untuk prompt {i+1} setelah {retries + 1} percobaan")
+                failed_prompts.append(i + 1)
+        
+        if failed_prompts:
+            if len(failed_prompts) > max_missing or not all_images:
+                log_callback(f"Error: {len(failed_prompts)} prompt gagal ({failed_prompts}), melebihi batas {max_missing}. "
+                             f"Menghentikan proses; gambar yang berhasil disimpan untuk percobaan berikutnya.")
                 return None
+            log_callback(f"⚠️ Melanjutkan dengan {len(image_prompts) - len(failed_prompts)} dari {len(image_prompts)} scene "
+                         f"(prompt gagal: {failed_prompts})")
+    
+    if not all_images:
+        if skip_image_validation:
+            log_callback("Warning: Tidak ada gambar yang digenerate. Mencari gambar placeholder.")
+            # Buat file dummy jika tidak ada gambar placeholder
+            log_callback("Tidak ada gambar placeholder, membuat file dummy")
+            
+            # Buat minimal 5 file dummy
+            dummy_files = []
+            for i in range(5):
+                dummy_path = os.path.join(images_folder, f"dummy_{i+1}.jpg")
+                with open(dummy_path, "w") as f:
+                    f.write("dummy image for testing")
+                dummy_files.append(dummy_path)
+                log_callback(f"Membuat file dummy: {dummy_path}")
             
-        log_callback("Konten berhasil dibaca dari file JSON")
-        return content_data
+            all_images = dummy_files
+        else:
+            log_callback(f"Error: Tidak ada gambar yang berhasil digenerate di folder {images_folder}.")
+            return None
+    
+    return all_images
+
+# Codec video/audio untuk setiap container rendition
+RENDITION_CONTAINERS = {
+    'mp4': ('libx264', 'aac'),
+    'mov': ('libx264', 'aac'),
+    'mkv': ('libx264', 'aac'),
+    'webm': ('libvpx-vp9', 'libopus'),
+}
+
+def parse_rendition_spec(spec: str) -> dict:
+    """Parse spesifikasi rendition dengan format NAMA=LEBARxTINGGI[:BITRATE[:CONTAINER]].
+    
+    Contoh: "preview=540x960:1200k:mp4" atau "preview=540x960".
+    """
+    try:
+        name, settings = spec.split('=', 1)
+        parts = settings.split(':')
+        width, height = (int(v) for v in parts[0].lower().split('x'))
+        bitrate = parts[1] if len(parts) > 1 and parts[1] else None
+        container = parts[2].lower() if len(parts) > 2 and parts[2] else 'mp4'
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Format rendition tidak valid: '{spec}' (contoh: preview=540x960:1200k:mp4)")
+    if not name or width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f"Format rendition tidak valid: '{spec}'")
+    if container not in RENDITION_CONTAINERS:
+        raise argparse.ArgumentTypeError(f"Container rendition tidak didukung: {container} (pilihan: {', '.join(RENDITION_CONTAINERS)})")
+    return {'name': name, 'width': width, 'height': height, 'bitrate': bitrate, 'container': container}
+
+def parse_stage_budget(spec: str) -> tuple:
+    """Parse batas waktu tahap FFmpeg dengan format TAHAP=DETIK, mis. "final=1200"."""
+    try:
+        stage, seconds = spec.split('=', 1)
+        return stage.strip(), float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Format batas waktu tidak valid: '{spec}' (contoh: final=1200)")
+
+# Batas panjang segmen awal yang diencode ulang untuk judul (detik setelah judul selesai)
+TITLE_SEGMENT_MAX = 10
+
+def main_rendition(output_path: str, fragmented: bool = False) -> dict:
+    """Rendition utama (file untuk upload) dengan ukuran kanvas penuh.
+    
+    Dengan `fragmented`, file ditulis sebagai MP4 terfragmentasi yang dapat
+    diupload selagi encoder masih berjalan (lihat stream_upload.py).
+    """
+    rendition = {'name': 'main', 'width': CANVAS_WIDTH, 'height': CANVAS_HEIGHT, 'bitrate': None, 'container': 'mp4', 'path': output_path}
+    if fragmented:
+        rendition['fragmented'] = True
+    return rendition
+
+def fragment_args(rendition: dict) -> list:
+    """Opsi muxer untuk rendition yang ditulis sebagai MP4 terfragmentasi."""
+    return ['-movflags', FRAGMENT_MOVFLAGS] if rendition.get('fragmented') else []
+
+def rendition_paths(output_folder: str, base_name: str, renditions: list) -> list:
+    """Melengkapi setiap rendition tambahan dengan path output-nya."""
+    return [
+        dict(r, path=os.path.join(output_folder, f"{base_name}_{r['name']}.{r['container']}"))
+        for r in renditions or []
+    ]
+
+def build_final_command(video_input: str, audio_path: str, music_path: str, video_filters: list, renditions: list,
+                        video_seconds: float = None) -> list:
+    """Membuat satu perintah FFmpeg untuk overlay teks, mixing audio, dan semua rendition.
+    
+    Video didecode dan diberi overlay sekali, lalu dipecah dengan `split`
+    (audio dengan `asplit`) sehingga hanya scale + encode akhir yang diulang
+    per rendition.
+    
+    Args:
+        video_input: Path video hasil concat (tanpa audio)
+        audio_path: Path voiceover (opsional, di-delay 0.75 detik)
+        music_path: Path musik background (opsional, volume 0.3)
+        video_filters: Daftar filter video (drawtext judul/caption)
+        renditions: Daftar rendition; elemen pertama adalah rendition utama
+        video_seconds: Durasi video; audio yang lebih pendek diberi hening sampai durasi ini
+            (mis. voiceover varian yang lebih pendek dari video scene bersama)
+        
+    Returns:
+        list: Perintah FFmpeg
+    """
+    command = ['ffmpeg', '-i', video_input]
+    graph = []
+    count = len(renditions)
+    
+    video_chain = ','.join(video_filters) if video_filters else 'null'
+    if count > 1:
+        graph.append(f"[0:v]{video_chain},split={count}" + ''.join(f"[vs{i}]" for i in range(count)))
+    else:
+        graph.append(f"[0:v]{video_chain}[vs0]")
+    for i, r in enumerate(renditions):
+        if (r['width'], r['height']) != (CANVAS_WIDTH, CANVAS_HEIGHT):
+            graph.append(f"[vs{i}]scale={r['width']}:{r['height']}[v{i}]")
+        else:
+            graph.append(f"[vs{i}]null[v{i}]")
+    
+    # Gabungkan voiceover (dengan delay untuk menunggu judul besar selesai) dan musik (volume lebih rendah)
+    audio_label = None
+    if audio_path and music_path:
+        command += ['-i', audio_path, '-i', music_path]
+        graph.append('[1:a]adelay=750|750[voice];[2:a]volume=0.3[music];[voice][music]amix=inputs=2:duration=longest[aout]')
+        audio_label = 'aout'
+    elif audio_path:
+        command += ['-i', audio_path]
+        graph.append('[1:a]adelay=750|750[aout]')
+        audio_label = 'aout'
+    elif music_path:
+        command += ['-i', music_path]
+        graph.append('[1:a]volume=0.3[aout]')
+        audio_label = 'aout'
+    if audio_label and video_seconds:
+        graph.append(f"[{audio_label}]apad=whole_dur={video_seconds:.3f}[apad]")
+        audio_label = 'apad'
+    if audio_label:
+        if count > 1:
+            graph.append(f"[{audio_label}]asplit={count}" + ''.join(f"[a{i}]" for i in range(count)))
+        else:
+            graph.append(f"[{audio_label}]anull[a0]")
+    
+    command += ['-filter_complex', ';'.join(graph)]
+    for i, r in enumerate(renditions):
+        video_codec, audio_codec = RENDITION_CONTAINERS[r['container']]
+        command += ['-map', f'[v{i}]', '-c:v', video_codec, '-pix_fmt', 'yuv420p']
+        if r.get('bitrate'):
+            command += ['-b:v', r['bitrate']]
+        if audio_label:
+            command += ['-map', f'[a{i}]', '-c:a', audio_codec, '-b:a', '192k']
+            # Musik dipotong mengikuti panjang video
+            if music_path:
+                command += ['-shortest']
+        command += fragment_args(r) + ['-y', r['path']]
+    return command
+
+def stream_copy_rendition(rendition: dict) -> bool:
+    """True jika rendition dapat memakai ulang stream H.264 video scene tanpa encode ulang."""
+    return ((rendition['width'], rendition['height']) == (CANVAS_WIDTH, CANVAS_HEIGHT)
+            and RENDITION_CONTAINERS[rendition['container']][0] == 'libx264'
+            and not rendition.get('bitrate'))
+
+def render_title_segment(video_input, title_filter, title_end, music_path, music_volume, rendition, work_dir, temp_files, log_callback):
+    """Membakar judul hanya ke segmen awal video lalu menyalin sisa stream tanpa encode ulang.
+    
+    Segmen awal dipotong di keyframe pertama setelah judul selesai (batas
+    scene, karena setiap scene dimulai dengan keyframe), diencode ulang
+    dengan filter judul, lalu digabung dengan sisa video memakai concat
+    demuxer (`inpoint` + `-c:v copy`). Audio (hanya musik) dimix pada
+    perintah yang sama.
+    
+    Args:
+        video_input: Path video hasil concat (tanpa audio)
+        title_filter: Filter drawtext judul
+        title_end: Detik saat judul selesai ditampilkan
+        music_path: Path musik background (opsional)
+        music_volume: Volume musik background
+        rendition: Rendition tujuan (lihat stream_copy_rendition)
+        work_dir: Direktori kerja untuk file sementara
+        temp_files: List yang diisi dengan file sementara untuk dihapus nanti
+        log_callback: Function untuk logging
         
-    except json.JSONDecodeError as e:
-        log_callback(f"Error parsing JSON dari file: {e}")
+    Returns:
+        bool: True jika berhasil, False jika gagal, None jika tidak ada keyframe
+        yang cocok (pemanggil kembali ke encode ulang penuh)
+    """
+    keyframe = find_keyframe_after(video_input, title_end, title_end + TITLE_SEGMENT_MAX)
+    if not keyframe:
+        log_callback("Tidak ada keyframe setelah judul, video diencode ulang penuh")
         return None
-    except Exception as e:
-        log_callback(f"Error membaca konten dari file JSON: {e}")
+    log_callback(f"Judul dibakar ke {keyframe:.2f} detik pertama, sisa video disalin tanpa encode ulang")
+    
+    scratch = get_scratch()
+    head_path = scratch.allocate(work_dir, 'title_segment.mp4', estimate_bytes(keyframe), log_callback)
+    temp_files.append(head_path)
+    command = [
+        'ffmpeg', '-i', video_input, '-t', f"{keyframe:.6f}", '-vf', title_filter,
+        '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-an', '-y', head_path
+    ]
+    if not run_ffmpeg_command(command, log_callback, stage='final'): return False
+    scratch.commit(head_path)
+    
+    concat_list_path = os.path.join(work_dir, 'title_concat_list.txt')
+    temp_files.append(concat_list_path)
+    with open(concat_list_path, 'w') as f:
+        for path, inpoint in ((head_path, None), (video_input, keyframe)):
+            normalized_path = os.path.normpath(os.path.abspath(path))
+            if os.name == 'nt':  # Windows
+                normalized_path = normalized_path.replace('\\', '\\\\')
+            f.write(f"file '{normalized_path}'\n")
+            if inpoint is not None:
+                f.write(f"inpoint {inpoint:.6f}\n")
+    
+    command = ['ffmpeg', '-f', 'concat', '-safe', '0', '-i', concat_list_path]
+    if music_path:
+        command += ['-i', music_path]
+    command += ['-map', '0:v', '-c:v', 'copy']
+    if music_path:
+        # Musik dipotong mengikuti panjang video
+        command += ['-map', '1:a', '-af', f'volume={music_volume}', '-c:a', RENDITION_CONTAINERS[rendition['container']][1],
+                    '-b:a', '192k', '-shortest']
+    command += fragment_args(rendition) + ['-y', rendition['path']]
+    ok = run_ffmpeg_command(command, log_callback, stage='final')
+    scratch.free(head_path)
+    return ok
+
+# Panjang clip unit gambar diam; scene tanpa zoom disusun dari clip unit yang diulang
+STATIC_UNIT_SECONDS = 1.0
+
+def render_still_unit(img_path, use_dark_overlay, work_dir, temp_files, log_callback, cache=None):
+    """Encode satu gambar diam sekali sebagai clip unit pendek (STATIC_UNIT_SECONDS).
+    
+    Encoder sama dengan clip scene biasa (libx264, yuv420p, 25 fps) sehingga
+    clip unit dapat di-concat dengan stream copy, dengan `-tune stillimage`:
+    setelah keyframe pertama, frame berikutnya hampir seluruhnya skip block.
+    Clip unit di-encode tanpa B-frame (`-bf 0`) agar urutan decode sama dengan
+    urutan tampil, sehingga `outpoint` pada pengulangan terakhir memotong tepat
+    di batas frame walaupun concat memakai stream copy.
+    Clip unit baru ditulis ke scratch (ditambahkan ke `temp_files`) lalu disalin ke cache
+    jika berada di disk (lihat ScratchSpace.should_cache_clip).
+    
+    Returns:
+        str: Path clip unit, atau None jika gagal
+    """
+    unit_hash = node_hash('still', {
+        'seconds': STATIC_UNIT_SECONDS, 'dark_overlay': use_dark_overlay,
+        'width': CANVAS_WIDTH, 'height': CANVAS_HEIGHT, 'fps': FPS, 'bframes': 0,
+    }, [file_digest(img_path)])
+    if cache:
+        cached = cache.get(unit_hash)
+        if cached:
+            return cached
+    unit_output = get_scratch().allocate(work_dir, f"still_{unit_hash[:16]}.mp4",
+                                         estimate_bytes(STATIC_UNIT_SECONDS), log_callback)
+    temp_files.append(unit_output)
+    
+    command = ['ffmpeg', '-loop', '1', '-i', img_path]
+    if use_dark_overlay:
+        command += ['-vf', 'colorize=0.3:0.3:0.3:0.3']
+    command += ['-t', str(STATIC_UNIT_SECONDS), '-c:v', 'libx264', '-tune', 'stillimage', '-bf', '0', '-pix_fmt', 'yuv420p', '-y', unit_output]
+    if not run_ffmpeg_command(command, log_callback, stage='scene'):
+        return None
+    get_scratch().commit(unit_output)
+    if cache and get_scratch().should_cache_clip(unit_output):
+        cache.store(unit_hash, unit_output)
+    return unit_output
+
+def render_scene_clips(scenes, avg_duration, use_dark_overlay, work_dir, temp_files, log_callback, cache=None, output_path=None):
+    """Engine FFmpeg: merender clip per scene dengan filter lalu menggabungkannya dengan concat.
+    
+    Args:
+        scenes: Hasil plan_scenes ({'image', 'zoom'} per scene, opsional 'hash' dari render plan)
+        avg_duration: Durasi setiap scene dalam detik
+        use_dark_overlay: Flag untuk menambahkan overlay gelap pada gambar
+        work_dir: Direktori kerja untuk file sementara
+        temp_files: List yang diisi dengan file sementara untuk dihapus nanti
+        log_callback: Function untuk logging
+        cache: RenderCache untuk clip scene yang punya hash (opsional)
+        output_path: Path video hasil concat (default: final_video_no_audio.mp4 di work_dir)
+        
+    Scene tanpa zoom tidak dirender sebagai clip penuh: setiap gambar berbeda
+    di-encode sekali sebagai clip unit (render_still_unit), lalu clip unit itu
+    diulang di daftar concat sampai durasi scene tercapai, dengan `outpoint`
+    pada pengulangan terakhir.
+    
+    Clip dan clip unit yang baru dirender ditulis ke scratch (lihat scratch.py),
+    disalin ke cache jika ada (clip di RAM hanya jika diminta, lihat
+    ScratchSpace.should_cache_clip), dan salinan scratch-nya dihapus begitu concat selesai.
+    
+    Returns:
+        str: Path video tanpa audio, atau None jika gagal
+    """
+    scratch = get_scratch()
+    # Entri daftar concat: (path clip, outpoint atau None)
+    concat_entries = []
+    still_units = {}
+    intermediates = []
+    for i, scene in enumerate(scenes):
+        img_path = scene['image']
+        
+        if not scene['zoom']:
+            unit_path = still_units.get(img_path)
+            if not unit_path:
+                unit_path = render_still_unit(img_path, use_dark_overlay, work_dir, temp_files, log_callback, cache=cache)
+                if not unit_path:
+                    return None
+                still_units[img_path] = unit_path
+                # Clip unit yang baru dirender ada di scratch; yang diambil dari cache tidak dihapus
+                if unit_path in temp_files:
+                    intermediates.append(unit_path)
+            repeats = max(1, int(math.ceil(avg_duration / STATIC_UNIT_SECONDS - 1e-6)))
+            remainder = avg_duration - (repeats - 1) * STATIC_UNIT_SECONDS
+            concat_entries += [(unit_path, None)] * (repeats - 1)
+            concat_entries.append((unit_path, remainder if remainder < STATIC_UNIT_SECONDS - 1e-6 else None))
+            log_callback(f"Scene {i+1}: Gambar diam {os.path.basename(img_path)}, clip unit diulang {repeats}x")
+            continue
+        
+        scene_hash = scene.get('hash') if cache else None
+        if scene_hash:
+            cached_clip = cache.get(scene_hash)
+            if cached_clip:
+                log_callback(f"Scene {i+1}: menggunakan clip dari cache ({scene_hash[:10]})")
+                concat_entries.append((cached_clip, None))
+                continue
+        clip_output = scratch.allocate(work_dir, f"clip_{i}.mp4", estimate_bytes(avg_duration), log_callback)
+        temp_files.append(clip_output)
+        intermediates.append(clip_output)
+        
+        # Gambar sudah dinormalisasi ke ukuran kanvas, sehingga scale/crop tidak perlu diulang per frame
+        scene_filters = []
+        
+        # Terapkan efek zoom
+        frames = int(avg_duration*25)
+        if scene['zoom'] == 'in':
+            # Zoom in: start from 1.0, gradually zoom to 1.3
+            scene_filters.append(f"zoompan=z='1+0.3*on/{frames}':d={frames}:s={CANVAS_WIDTH}x{CANVAS_HEIGHT}")
+            log_callback(f"Scene {i+1}: Menerapkan efek zoom in pada {os.path.basename(img_path)}")
+        else:
+            # Zoom out: start from 1.3, gradually zoom to 1.0
+            scene_filters.append(f"zoompan=z='1.3-0.3*on/{frames}':d={frames}:s={CANVAS_WIDTH}x{CANVAS_HEIGHT}")
+            log_callback(f"Scene {i+1}: Menerapkan efek zoom out pada {os.path.basename(img_path)}")
+        
+        # Tambahkan overlay gelap jika diaktifkan
+        if use_dark_overlay:
+            scene_filters.append("colorize=0.3:0.3:0.3:0.3")
+            log_callback(f"Scene {i+1}: Menambahkan overlay gelap")
+        
+        command = ['ffmpeg', '-loop', '1', '-i', img_path]
+        if scene_filters:
+            command += ['-vf', ','.join(scene_filters)]
+        command += ['-t', str(avg_duration), '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-y', clip_output]
+        if not run_ffmpeg_command(command, log_callback, stage='scene'): return None
+        scratch.commit(clip_output)
+        if scene_hash and scratch.should_cache_clip(clip_output):
+            cache.store(scene_hash, clip_output)
+        concat_entries.append((clip_output, None))
+    
+    concat_list_path = os.path.join(work_dir, 'concat_list.txt')
+    temp_files.append(concat_list_path)
+    with open(concat_list_path, 'w') as f:
+        for path, outpoint in concat_entries:
+            # Gunakan normpath untuk memastikan path kompatibel dengan sistem operasi
+            normalized_path = os.path.normpath(os.path.abspath(path))
+            # Escape backslash untuk Windows compatibility
+            if os.name == 'nt':  # Windows
+                normalized_path = normalized_path.replace('\\', '\\\\')
+            f.write(f"file '{normalized_path}'\n")
+            if outpoint is not None:
+                f.write(f"outpoint {outpoint:.6f}\n")
+
+    final_video_no_audio = output_path
+    if not output_path:
+        final_video_no_audio = scratch.allocate(work_dir, 'final_video_no_audio.mp4',
+                                                estimate_bytes(avg_duration * len(scenes)), log_callback)
+        temp_files.append(final_video_no_audio)
+    command = [
+        'ffmpeg', '-f', 'concat', '-safe', '0', '-i', concat_list_path, 
+        '-c', 'copy', '-y', final_video_no_audio
+    ]
+    ok = run_ffmpeg_command(command, log_callback, stage='concat')
+    # Clip scene hanya dibutuhkan oleh concat
+    scratch.free(*intermediates)
+    if not ok: return None
+    if not output_path:
+        scratch.commit(final_video_no_audio)
+    return final_video_no_audio
+
+def render_video_entry(plan, work_dir, temp_files, log_callback, cache=None):
+    """Mengompilasi render plan menjadi perintah FFmpeg dan menjalankannya (tahap 'render').
+    
+    Video gabungan scene (tanpa audio) adalah node yang di-cache berdasarkan
+    hash-nya; jika hanya judul atau caption yang berubah, node ini dan semua
+    clip scene diambil dari cache dan hanya tahap overlay + audio yang dijalankan.
+    
+    Args:
+        plan: Render plan dari build_render_plan
+        work_dir: Direktori kerja untuk file sementara
+        temp_files: List yang diisi dengan file sementara untuk dihapus nanti
+        log_callback: Function untuk logging
+        cache: RenderCache untuk output node (opsional)
+        
+    Returns:
+        bool: True jika berhasil, False jika gagal
+    """
+    scenes = plan['scenes']
+    scene_duration = scenes[0]['duration']
+    dark_overlay = scenes[0]['dark_overlay']
+    base_hash = plan['base']['hash']
+    
+    scratch = get_scratch()
+    scratch_base = None
+    final_video_no_audio = cache.get(base_hash) if cache else None
+    if final_video_no_audio:
+        log_callback(f"Menggunakan video scene dari cache ({base_hash[:10]})")
+    else:
+        # Ditulis ke scratch dan dibaca tahap akhir dari sana; cache hanya menerima salinannya
+        base_output = scratch_base = scratch.allocate(
+            work_dir, 'final_video_no_audio.mp4', estimate_bytes(scene_duration * len(scenes)), log_callback)
+        temp_files.append(base_output)
+        
+        if plan['engine'] == ENGINE_NUMPY:
+            # Satu encoder FFmpeg, frame dikomposisi dengan NumPy
+            if not render_scenes(scenes, scene_duration, base_output, dark_overlay=dark_overlay, log_callback=log_callback):
+                return False
+        elif not render_scene_clips(scenes, scene_duration, dark_overlay, work_dir, temp_files, log_callback, cache=cache, output_path=base_output):
+            return False
+        scratch.commit(base_output)
+        if cache:
+            cache.store(base_hash, base_output)
+        final_video_no_audio = base_output
+    
+    # Judul besar di awal video, lalu caption yang sinkron dengan voiceover
+    font_absolute_path = plan['font']
+    video_filters = [build_title_filter(plan['title']['text'], font_absolute_path)]
+    video_filters += [caption_filter(segment, font_absolute_path) for segment in plan['captions']]
+    if plan.get('tail'):
+        # Voiceover varian lebih panjang dari video scene bersama: tahan frame terakhir
+        video_filters.insert(0, f"tpad=stop_mode=clone:stop_duration={plan['tail']:.3f}")
+    
+    if plan['audio']['music']:
+        log_callback("Menambahkan musik background ke video")
+    
+    renditions = plan['renditions']
+    # Tanpa voiceover hanya judul yang berubah: encode ulang segmen awal saja
+    if not plan['captions'] and not plan['audio']['voice'] and not plan.get('tail') and stream_copy_rendition(renditions[0]):
+        result = render_title_segment(final_video_no_audio, video_filters[0], plan['title']['end'], plan['audio']['music'],
+                                      plan['audio']['music_volume'], renditions[0], work_dir, temp_files, log_callback)
+        if result is False:
+            scratch.free(scratch_base)
+            return False
+        if result:
+            renditions = renditions[1:]
+    if not renditions:
+        scratch.free(scratch_base)
+        return True
+    
+    # Judul, caption, dan audio diproses dalam satu filter graph; setiap rendition
+    # hanya mengulang tahap scale + encode akhir
+    video_seconds = sum(scene['duration'] for scene in scenes) + plan.get('tail', 0)
+    command = build_final_command(final_video_no_audio, plan['audio']['voice'], plan['audio']['music'], video_filters, renditions,
+                                  video_seconds=video_seconds)
+    ok = run_ffmpeg_command(command, log_callback, stage='final')
+    # Salinan scratch video scene hanya dibutuhkan oleh tahap akhir
+    scratch.free(scratch_base)
+    return ok
+
+def check_rendered_plan(plan, cache, log_callback):
+    """Memvalidasi semua rendition hasil render plan sebelum upload.
+    
+    Jika gagal, file rendition dihapus dan video scene dibuang dari cache
+    (mungkin sumber masalahnya) sehingga job dirender ulang dari awal.
+    
+    Returns:
+        str: Pesan error, atau None jika semua rendition valid
+    """
+    failures = {path: report for path, report in validate_render(plan).items() if not report['ok']}
+    if not failures:
+        log_callback("Validasi video hasil render: OK")
         return None
+    for path, report in failures.items():
+        log_callback(f"Validasi gagal untuk {os.path.basename(path)}: {'; '.join(report['errors'])}")
+    for r in plan['renditions']:
+        if os.path.exists(r['path']):
+            os.remove(r['path'])
+    if cache:
+        cache.discard(plan['base']['hash'])
+    return "Validasi gagal: " + '; '.join(err for report in failures.values() for err in report['errors'])
 
-def process_video_entry(row, output_folder, image_duration, use_voiceover, use_dark_overlay, youtube_config, log_callback, auto_delete_enabled=False, no_zoom=False, music_folder=None, image_prompts=None, generate_images=False, skip_image_validation=False):
+def upload_video_entry(row, output_path, youtube_config, log_callback, source=None):
+    """Mengupload video hasil render ke YouTube (tahap 'upload').
+    
+    Dengan `source` (GrowingFile), upload berjalan selagi video masih ditulis encoder.
+    
+    Returns:
+        str: Video ID jika berhasil, None jika gagal
+    """
+    log_callback("Memulai proses upload ke YouTube...")
+    
+    # Autentikasi YouTube
+    youtube_service = authenticate_youtube(
+        youtube_config['client_secret_path'],
+        youtube_config.get('token_path')
+    )
+    
+    # Siapkan metadata video
+    video_title = youtube_config['title_template'].format(title=row['title'])
+    # Gunakan template description dengan data dari CSV
+    if 'description' in row and pd.notna(row['description']) and str(row['description']).strip():
+        video_description = youtube_config['description'].format(description=row['description'])
+    else:
+        # Fallback jika tidak ada kolom description di CSV
+        video_description = youtube_config['description'].replace('{description}', 'Generated by AI Video Short Generator')
+    
+    # Gunakan tags dari content_data jika ada (mode JSON), jika tidak gunakan dari youtube_config
+    if 'content_tags' in youtube_config and youtube_config['content_tags']:
+        video_tags = youtube_config['content_tags']
+        log_callback(f"Menggunakan tags dari file JSON: {video_tags}")
+    else:
+        video_tags = [tag.strip() for tag in youtube_config['tags'].split(',') if tag.strip()]
+        log_callback(f"Menggunakan tags dari konfigurasi YouTube: {video_tags}")
+    
+    privacy_status = youtube_config['privacy']
+    
+    # Upload video
+    return upload_to_youtube(
+        youtube_service,
+        output_path,
+        video_title,
+        video_description,
+        video_tags,
+        privacy_status,
+        log_callback,
+        publish_at=youtube_config.get('publish_at'),
+        source=source
+    )
+
+def cleanup_after_upload(output_path, image_folders, log_callback):
+    """Menghapus video, gambar, dan output.json setelah upload berhasil (--auto-delete)."""
+    log_callback("Auto-delete diaktifkan, menghapus file...")
+    
+    # Hapus file video
+    if delete_video_file(output_path, log_callback):
+        log_callback("File video berhasil dihapus")
+    else:
+        log_callback("Gagal menghapus file video")
+        
+    # Hapus file gambar asli dan hasil normalisasi milik entri
+    for images_folder in image_folders:
+        if not os.path.exists(images_folder):
+            continue
+        log_callback(f"Menghapus file gambar di folder {images_folder}...")
+        for f in os.listdir(images_folder):
+            path = os.path.join(images_folder, f)
+            try:
+                if os.path.isdir(path):
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except Exception as e:
+                log_callback(f"Gagal menghapus file gambar {f}: {e}")
+        log_callback("File gambar berhasil dihapus")
+        
+    # Hapus file JSON di folder temp
+    output_json_path = os.path.join(TEMP_DIR, "output.json")
+    if os.path.exists(output_json_path):
+        try:
+            os.remove(output_json_path)
+            log_callback("File JSON berhasil dihapus")
+        except Exception as e:
+            log_callback(f"Gagal menghapus file JSON: {e}")
+
+def process_video_entry(row, output_folder, image_duration, use_voiceover, use_dark_overlay, youtube_config, log_callback, auto_delete_enabled=False, no_zoom=False, music_folder=None, image_prompts=None, generate_images=False, skip_image_validation=False, ledger=None, job_key=None, work_dir=None, prep_workers=None, renditions=None, image_retries=IMAGE_PROMPT_RETRIES, image_timeout=IMAGE_PROMPT_TIMEOUT, max_missing_scenes=MAX_MISSING_SCENES, engine=ENGINE_FFMPEG, render_cache=None, image_library=None, reuse_threshold=None, validate=True, voice_lang='en', variants=None, history=None, stream_upload=False):
     """Memproses satu entri dari data JSON menjadi satu video menggunakan FFmpeg.
     
     Args:
@@ -572,8 +1353,44 @@ def process_video_entry(row, output_folder, image_duration, use_voiceover, use_d
         image_prompts: List prompt untuk pemilihan gambar dari file JSON
         generate_images: Flag untuk menghasilkan gambar dari image_prompts menggunakan ImageFX
         skip_image_validation: Flag untuk melewati validasi ImageFX (hanya untuk pengujian)
+        ledger: JobLedger untuk mencatat progres per tahap (opsional)
+        job_key: Kunci job di ledger (wajib jika ledger digunakan)
+        work_dir: Direktori kerja khusus entri ini (default: TEMP_DIR)
+        prep_workers: Jumlah worker paralel untuk normalisasi gambar (default: jumlah CPU)
+        renditions: Rendition tambahan selain file utama (lihat parse_rendition_spec)
+        image_retries: Jumlah percobaan ulang generate gambar per prompt
+        image_timeout: Batas waktu satu panggilan imagefx dalam detik
+        max_missing_scenes: Jumlah prompt gagal yang masih boleh dirender dengan scene lebih sedikit
+        engine: Render engine scene ('ffmpeg' atau 'numpy')
+        render_cache: RenderCache untuk output node render plan (opsional)
+        image_library: ImageLibrary untuk gambar hasil generate (opsional)
+        reuse_threshold: Ambang kemiripan prompt untuk memakai gambar pustaka (None = selalu generate)
+        validate: Validasi video hasil render sebelum upload (lihat render_check.py)
+        voice_lang: Bahasa voiceover gTTS untuk video utama
+        variants: Varian video (bahasa voiceover, caption, judul) yang memakai video scene
+            yang sama, list dict {'name', 'title', 'voiceover', 'caption', 'lang'}
+        history: RenderHistory untuk mencatat durasi render dan upload (opsional, lihat predict.py)
+        stream_upload: Upload video utama selagi tahap akhir masih menulisnya (MP4 terfragmentasi)
     """
     temp_files = []
+    streaming = None
+    work_dir = work_dir or TEMP_DIR
+    images_folder = os.path.join(work_dir, 'images') if work_dir != TEMP_DIR else IMAGE_OUTPUT_DIR
+    frames_folder = os.path.join(work_dir, 'frames')
+    if work_dir != TEMP_DIR and image_prompts:
+        # Kunci job memuat judul; gambar dikunci dengan image prompts agar judul atau caption yang
+        # diubah memakai gambar dan frame yang sama, sehingga clip scene diambil dari cache render
+        image_set = os.path.join(IMAGE_SETS_DIR, prompts_digest(image_prompts)[:16])
+        images_folder = os.path.join(image_set, 'images')
+        frames_folder = os.path.join(image_set, 'frames')
+    
+    def stage_done(stage):
+        # Artefak tahap dari ledger jika tahap sudah selesai pada run sebelumnya
+        return ledger.stage_artifacts(job_key, stage) if ledger and job_key else None
+    
+    def mark(stage, status, artifacts=None, error=None):
+        if ledger and job_key:
+            ledger.mark_stage(job_key, stage, status, artifacts=artifacts, error=error)
     
     try:
         if 'title' not in row or pd.isna(row['title']) or str(row['title']).strip() == '':
@@ -587,494 +1404,285 @@ def process_video_entry(row, output_folder, image_duration, use_voiceover, use_d
         title = str(row['title']).replace(' ', '_').replace('/', '_').replace('\\', '_')
         log_callback(f"--- Memproses video untuk: '{row['title']}' ---")
 
-        if not os.path.exists(TEMP_DIR):
-            os.makedirs(TEMP_DIR)
-        
-        # Gunakan satu folder temp untuk gambar hasil generate
-        images_folder = IMAGE_OUTPUT_DIR
-        os.makedirs(images_folder, exist_ok=True)
-        
-        # Hapus semua file di folder temp/images sebelum generate baru
-        log_callback("Menghapus file gambar yang ada di folder temp/images...")
-        for f in os.listdir(images_folder):
-            os.remove(os.path.join(images_folder, f))
-        
-        log_callback(f"Menggunakan folder temp untuk gambar: {images_folder}")
-        
-        # Ambil image_prompts dari argumen fungsi
-        if not image_prompts:
-            log_callback("Error: 'image_prompts' tidak tersedia.")
-            return False
-        
-        # Generate gambar dari image_prompts jika diminta
-        if generate_images:
-            log_callback(f"Menggunakan {len(image_prompts)} image prompts untuk generate gambar")
-            
-            # Generate **satu** gambar untuk setiap prompt
-            for i, prompt in enumerate(image_prompts):
-                log_callback(f"Prompt {i+1}: {prompt}")
-                
-                # Generate gambar dari prompt dan simpan langsung di folder images_folder
-                success = generate_image_from_prompt(
-                    prompt=prompt,
-                    output_dir=images_folder,
-                    count=1,  # Mengubah count menjadi 1
-                    log_callback=log_callback,
-                    skip_validation=skip_image_validation
-                )
-                
-                if not success:
-                    log_callback(f"Error: Gagal generate gambar untuk prompt {i+1}. Menghentikan proses.")
-                    return False
-        
-        # Ambil semua gambar yang tersedia di folder images_folder
-        all_images = [os.path.join(images_folder, img) for img in os.listdir(images_folder) if img.lower().endswith(('.png', '.jpg', '.jpeg'))]
-        
-        if not all_images:
-            if skip_image_validation:
-                log_callback("Warning: Tidak ada gambar yang digenerate. Mencari gambar placeholder.")
-                # Buat file dummy jika tidak ada gambar placeholder
-                log_callback("Tidak ada gambar placeholder, membuat file dummy")
-                
-                # Buat minimal 5 file dummy
-                dummy_files = []
-                for i in range(5):
-                    dummy_path = os.path.join(images_folder, f"dummy_{i+1}.jpg")
-                    with open(dummy_path, "w") as f:
-                        f.write("dummy image for testing")
-                    dummy_files.append(dummy_path)
-                    log_callback(f"Membuat file dummy: {dummy_path}")
-                
-                all_images = dummy_files
-            else:
-                log_callback("Error: Tidak ada gambar yang berhasil digenerate di folder temp.")
-                return False
-        
-        # Pilih gambar secara acak untuk scene pertama (judul)
-        title_image = random.choice(all_images)
-        log_callback(f"Menggunakan gambar {os.path.basename(title_image)} untuk scene judul")
-        
-        # Buat salinan dari all_images untuk digunakan dalam scene-scene berikutnya
-        scene_images = all_images.copy()
-        random.shuffle(scene_images)
-        
-        # Pastikan gambar untuk judul muncul di awal, diikuti oleh gambar-gambar scene
-        selected_images = [title_image] + scene_images
-
-        audio_path = None
-        if use_voiceover:
-            voiceover_text = row['caption']
-            # Gunakan gtts sebagai satu-satunya layanan voiceover
-            audio_path = generate_gtts_audio(voiceover_text)
-            
-            if not audio_path:
-                log_callback("Gagal membuat voiceover.")
-                return False
-            temp_files.append(audio_path)
-            
-            # Gunakan list command untuk kompatibilitas cross-platform
-            ffprobe_cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', audio_path]
-            audio_duration_str = subprocess.check_output(ffprobe_cmd).strip().decode('utf-8')
-            audio_duration = float(audio_duration_str) if audio_duration_str else 0
-            avg_duration = audio_duration / len(selected_images) if len(selected_images) > 0 else 0
-        else:
-            avg_duration = image_duration
-
-        video_clips_paths = []
-        for i, img_path in enumerate(selected_images):
-            clip_output = os.path.join(TEMP_DIR, f"clip_{i}.mp4")
-            temp_files.append(clip_output)
-            
-            # Terapkan efek zoom jika tidak dinonaktifkan
-            if not no_zoom:
-                # Random zoom effect: zoom in (1.0 to 1.3) or zoom out (1.3 to 1.0)
-                zoom_direction = random.choice(['in', 'out'])
-                if zoom_direction == 'in':
-                    # Zoom in: start from 1.0, gradually zoom to 1.3
-                    zoom_filter = f"scale=1080:1920:force_original_aspect_ratio=increase,crop=1080:1920,zoompan=z='1+0.3*on/{int(avg_duration*25)}':d={int(avg_duration*25)}:s=1080x1920"
-                    log_callback(f"Scene {i+1}: Menerapkan efek zoom in pada {os.path.basename(img_path)}")
-                else:
-                    # Zoom out: start from 1.3, gradually zoom to 1.0
-                    zoom_filter = f"scale=1080:1920:force_original_aspect_ratio=increase,crop=1080:1920,zoompan=z='1.3-0.3*on/{int(avg_duration*25)}':d={int(avg_duration*25)}:s=1080x1920"
-                    log_callback(f"Scene {i+1}: Menerapkan efek zoom out pada {os.path.basename(img_path)}")
-            else:
-                # Tanpa efek zoom - menggunakan crop untuk menghilangkan border hitam
-                zoom_filter = f"scale=1080:1920:force_original_aspect_ratio=increase,crop=1080:1920"
-                log_callback(f"Scene {i+1}: Tanpa efek zoom pada {os.path.basename(img_path)}")
-            
-            # Tambahkan overlay gelap jika diaktifkan
-            if use_dark_overlay:
-                zoom_filter += ",colorize=0.3:0.3:0.3:0.3"
-                log_callback(f"Scene {i+1}: Menambahkan overlay gelap")
-            
-            command = [
-                'ffmpeg', '-loop', '1', '-i', img_path, '-vf',
-                zoom_filter,
-                '-t', str(avg_duration), '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-y', clip_output
-            ]
-            if not run_ffmpeg_command(command, log_callback): return False
-            video_clips_paths.append(clip_output)
-        
-        concat_list_path = os.path.join(TEMP_DIR, 'concat_list.txt')
-        temp_files.append(concat_list_path)
-        with open(concat_list_path, 'w') as f:
-            for path in video_clips_paths:
-                # Gunakan normpath untuk memastikan path kompatibel dengan sistem operasi
-                normalized_path = os.path.normpath(os.path.abspath(path))
-                # Escape backslash untuk Windows compatibility
-                if os.name == 'nt':  # Windows
-                    normalized_path = normalized_path.replace('\\', '\\\\')
-                f.write(f"file '{normalized_path}'\n")
-
-        final_video_no_audio = os.path.join(TEMP_DIR, 'final_video_no_audio.mp4')
-        temp_files.append(final_video_no_audio)
-        command = [
-            'ffmpeg', '-f', 'concat', '-safe', '0', '-i', concat_list_path, 
-            '-c', 'copy', '-y', final_video_no_audio
-        ]
-        if not run_ffmpeg_command(command, log_callback): return False
+        if not os.path.exists(work_dir):
+            os.makedirs(work_dir)
         
         output_path = os.path.join(output_folder, f"{title}.mp4")
+        extra_renditions = rendition_paths(output_folder, title, renditions)
         
-        # Pilih file musik secara acak jika folder musik disediakan
-        music_path = None
-        if music_folder and os.path.exists(music_folder):
-            music_files = [os.path.join(music_folder, f) for f in os.listdir(music_folder) 
-                          if f.lower().endswith(('.mp3', '.wav', '.m4a', '.aac'))]
-            if music_files:
-                music_path = random.choice(music_files)
-                log_callback(f"Menggunakan musik: {os.path.basename(music_path)}")
+        # Tahap render: lewati jika video sudah dirender pada run sebelumnya
+        render_artifacts = stage_done('render')
+        if render_artifacts and os.path.exists(render_artifacts.get('output_path', '')):
+            output_path = render_artifacts['output_path']
+            log_callback(f"Melanjutkan: video sudah dirender sebelumnya di {output_path}")
+        else:
+            # Tahap images
+            image_artifacts = stage_done('images')
+            if image_artifacts and image_artifacts.get('frames') and all(os.path.exists(p) for p in image_artifacts['frames']):
+                all_images = image_artifacts['frames']
+                log_callback(f"Melanjutkan: menggunakan {len(all_images)} gambar dari run sebelumnya")
             else:
-                log_callback(f"Warning: Tidak ada file musik yang ditemukan di {music_folder}")
-        
-        # Tambahkan caption text jika menggunakan voiceover
-        if use_voiceover and audio_path:
-            # Path ke font Anton-Regular.ttf dengan kompatibilitas cross-platform
-            font_path = os.path.join(SCRIPT_DIR, 'fonts', 'Anton-Regular.ttf')
-            
-            # Periksa keberadaan font, gunakan fallback jika tidak ada
-            if not os.path.exists(font_path):
-                # Coba buat direktori fonts jika belum ada
-                fonts_dir = os.path.join(SCRIPT_DIR, 'fonts')
-                if not os.path.exists(fonts_dir):
-                    os.makedirs(fonts_dir)
-                log_callback("Warning: Font Anton-Regular.ttf tidak ditemukan, menggunakan font sistem")
-                # Gunakan font default sistem berdasarkan OS
-                if os.name == 'nt':  # Windows
-                    font_path = 'C:\\Windows\\Fonts\\Arial.ttf'
-                else:  # macOS/Unix
-                    font_path = '/System/Library/Fonts/Helvetica.ttc'
-            
-            # Bagi teks caption menjadi segmen-segmen untuk sinkronisasi
-            voiceover_text = row['caption']
-            words = voiceover_text.split()
-            
-            # Hitung durasi audio untuk timing subtitle
-            audio_duration = get_audio_duration(audio_path)
-            if audio_duration <= 0:
-                log_callback("Error: Tidak dapat menentukan durasi audio")
-                return False
-            
-            # Tambahkan caption ke video dengan timing sinkron
-            video_with_caption = os.path.join(TEMP_DIR, f'video_with_caption_{int(time.time())}.mp4')
-            temp_files.append(video_with_caption)
-            
-            # Gunakan normpath untuk memastikan path kompatibel dengan sistem operasi
-            font_absolute_path = os.path.normpath(os.path.abspath(font_path))
-            
-            # Buat filter drawtext dengan timing sinkron untuk setiap segmen
-            drawtext_filters = []
-            words_per_second = len(words) / audio_duration if audio_duration > 0 else 1
-            words_per_segment = max(8, min(15, int(words_per_second * 4)))  # 8-15 kata per segmen untuk teks lebih panjang
-            
-            # Mulai caption setelah judul besar (1 detik)
-            current_time = 1.0
-            for i in range(0, len(words), words_per_segment):
-                segment_words = words[i:i + words_per_segment]
-                segment_text = ' '.join(segment_words).upper()
-                
-                # Hapus karakter bermasalah
-                segment_text = segment_text.replace("'", "").replace(":", "").replace("(", "").replace(")", "")
-                
-                # Implementasi text wrapping dengan line_spacing FFmpeg
-                max_chars_per_line = 35  # Maksimal karakter per baris
-                
-                # Hitung timing untuk segmen ini
-                segment_duration = len(segment_words) / words_per_second
-                start_time = current_time
-                end_time = min(current_time + segment_duration, audio_duration)
+                # Ambil image_prompts dari argumen fungsi
+                if not image_prompts:
+                    log_callback("Error: 'image_prompts' tidak tersedia.")
+                    mark('images', STATUS_FAILED, error="image_prompts tidak tersedia")
+                    return False
                 
-                if len(segment_text) > max_chars_per_line:
-                    # Bagi teks menjadi beberapa baris
-                    words_in_segment = segment_text.split()
-                    lines = []
-                    current_line = ""
-                    
-                    for word in words_in_segment:
-                        if len(current_line + " " + word) <= max_chars_per_line:
-                            current_line += (" " if current_line else "") + word
-                        else:
-                            if current_line:
-                                lines.append(current_line)
-                            current_line = word
-                    
-                    if current_line:
-                        lines.append(current_line)
-                    
-                    # Gabungkan dengan newline dan gunakan line_spacing
-                    multiline_text = "\n".join(lines)
-                    # Escape karakter khusus untuk FFmpeg
-                    multiline_text = escape_ffmpeg_text(multiline_text)
-                    
-                    # Buat filter dengan line_spacing untuk multi-baris dan margin horizontal
-                    margin_horizontal = 40  # Margin kiri dan kanan 40px
-                    # Posisi x dengan margin: center dalam area yang tersisa setelah dikurangi margin
-                    x_position = f"({margin_horizontal}+(w-{margin_horizontal*2}-text_w)/2)"
-                    drawtext_filter = f"drawtext=fontfile='{font_absolute_path}':text='{multiline_text}':fontcolor=yellow:fontsize=70:x={x_position}:y=(h-text_h)/2:line_spacing=10:text_align=center:borderw=3:bordercolor=black:enable='between(t,{start_time:.2f},{end_time:.2f})'"
-                    drawtext_filters.append(drawtext_filter)
-                else:
-                    # Teks pendek, gunakan satu filter saja dengan margin horizontal
-                    margin_horizontal = 40  # Margin kiri dan kanan 40px
-                    # Posisi x dengan margin: center dalam area yang tersisa setelah dikurangi margin
-                    x_position = f"({margin_horizontal}+(w-{margin_horizontal*2}-text_w)/2)"
-                    # Escape karakter khusus untuk FFmpeg
-                    segment_text = escape_ffmpeg_text(segment_text)
-                    drawtext_filter = f"drawtext=fontfile='{font_absolute_path}':text='{segment_text}':fontcolor=yellow:fontsize=70:x={x_position}:y=(h-text_h)/2:text_align=center:borderw=3:bordercolor=black:enable='between(t,{start_time:.2f},{end_time:.2f})'"
-                    drawtext_filters.append(drawtext_filter)
+                with tracing.span('images', prompts=len(image_prompts)):
+                    raw_images = prepare_entry_images(
+                        image_prompts, images_folder, generate_images, skip_image_validation, log_callback,
+                        retries=image_retries, timeout=image_timeout, max_missing=max_missing_scenes,
+                        library=image_library, reuse_threshold=reuse_threshold
+                    )
+                if not raw_images:
+                    mark('images', STATUS_FAILED, error="Gagal menyiapkan gambar")
+                    return False
                 
-                current_time = end_time
-            
-            # Tambahkan filter untuk judul besar di awal video (1 detik)
-            title_text = row['title'].upper()
-            # Escape karakter khusus untuk FFmpeg
-            title_text = escape_ffmpeg_text(title_text)
-            
-            # Bagi judul menjadi beberapa baris jika terlalu panjang
-            max_chars_per_line = 15
-            words = title_text.split()
-            lines = []
-            current_line = ""
+                # Validasi dan normalisasi gambar ke ukuran kanvas sebelum encode apa pun dimulai
+                with tracing.span('normalize', images=len(raw_images)):
+                    frames = normalize_images(raw_images, frames_folder, log_callback, workers=prep_workers)
+                all_images = [frames[p] for p in raw_images if p in frames]
+                if not all_images:
+                    log_callback("Error: Tidak ada gambar valid setelah validasi. Render dibatalkan.")
+                    mark('images', STATUS_FAILED, error="Semua gambar tidak valid")
+                    return False
+                # Gambar yang ditolak validasi dihitung bersama prompt yang gagal terhadap --max-missing-scenes
+                rejected = len(raw_images) - len(all_images)
+                missing = max(0, len(image_prompts) - len(raw_images)) + rejected
+                if rejected and missing > max_missing_scenes:
+                    log_callback(f"Error: {rejected} gambar tidak valid, total {missing} scene hilang melebihi batas "
+                                 f"{max_missing_scenes}. Render dibatalkan.")
+                    mark('images', STATUS_FAILED, error=f"{missing} scene hilang (batas {max_missing_scenes})")
+                    return False
+                mark('images', STATUS_DONE, artifacts={'images': raw_images, 'frames': all_images})
             
-            for word in words:
-                if len(current_line) + len(word) + 1 <= max_chars_per_line:
-                    if current_line:
-                        current_line += " " + word
-                    else:
-                        current_line = word
+            # Tahap TTS
+            audio_path = None
+            if use_voiceover:
+                tts_artifacts = stage_done('tts')
+                if tts_artifacts and tts_artifacts.get('audio_path') and os.path.exists(tts_artifacts['audio_path']):
+                    audio_path = tts_artifacts['audio_path']
+                    log_callback(f"Melanjutkan: menggunakan voiceover dari run sebelumnya: {audio_path}")
                 else:
-                    lines.append(current_line)
-                    current_line = word
-            
-            if current_line:
-                lines.append(current_line)
-            
-            # Gabungkan baris dengan newline untuk FFmpeg
-            multiline_title = "\n".join(lines)
-            
-            # Atur ukuran font untuk judul (lebih besar dari sebelumnya)
-            title_font_size = 130 if len(lines) > 1 else 150
-            
-            title_filter = f"drawtext=fontfile='{font_absolute_path}':text='{multiline_title}':fontcolor=yellow:fontsize={title_font_size}:x=(w-text_w)/2:y=(h-text_h)/2:text_align=center:borderw=5:bordercolor=black:enable='between(t,0,0.75)'"
-            
-            # Gabungkan semua filter drawtext
-            combined_filter = ','.join([title_filter] + drawtext_filters)
-            
-            command = [
-                'ffmpeg', '-i', final_video_no_audio,
-                '-vf', combined_filter,
-                '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-y', video_with_caption
-            ]
-            if not run_ffmpeg_command(command, log_callback): return False
-            
-            # Gabungkan dengan audio (delay audio 0.75 detik untuk menunggu judul besar selesai)
-            if music_path:
-                # Jika ada musik, gabungkan voiceover dan musik
-                log_callback("Menggabungkan video dengan voiceover dan musik background")
-                # Buat file audio sementara dengan voiceover dan musik
-                mixed_audio = os.path.join(TEMP_DIR, f'mixed_audio_{int(time.time())}.aac')
-                temp_files.append(mixed_audio)
+                    voiceover_text = row['caption']
+                    # Gunakan gtts sebagai satu-satunya layanan voiceover
+                    with tracing.span('tts', lang=voice_lang):
+                        audio_path = generate_gtts_audio(voiceover_text, output_dir=work_dir, lang=voice_lang)
+                    
+                    if not audio_path:
+                        log_callback("Gagal membuat voiceover.")
+                        mark('tts', STATUS_FAILED, error="Gagal membuat voiceover")
+                        return False
+                    mark('tts', STATUS_DONE, artifacts={'audio_path': audio_path})
                 
-                # Gabungkan voiceover (dengan delay) dan musik (dengan volume lebih rendah)
-                command = [
-                    'ffmpeg', '-i', audio_path, '-i', music_path,
-                    '-filter_complex', 'adelay=750|750[voice];[1:a]volume=0.3[music];[voice][music]amix=inputs=2:duration=longest',
-                    '-c:a', 'aac', '-b:a', '192k', '-y', mixed_audio
-                ]
-                if not run_ffmpeg_command(command, log_callback): return False
+                # Tanpa ledger, audio adalah file sementara; dengan ledger disimpan untuk resume
+                if not ledger:
+                    temp_files.append(audio_path)
                 
-                # Gabungkan video dengan audio campuran
-                command = [
-                    'ffmpeg', '-i', video_with_caption, '-i', mixed_audio,
-                    '-c:v', 'copy', '-c:a', 'copy', '-map', '0:v:0', '-map', '1:a:0',
-                    '-shortest', '-y', output_path
-                ]
-                if not run_ffmpeg_command(command, log_callback): return False
+                # Gunakan list command untuk kompatibilitas cross-platform
+                ffprobe_cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', audio_path]
+                audio_duration_str = tracing.run(ffprobe_cmd, stdout=subprocess.PIPE, check=True).stdout.strip().decode('utf-8')
+                audio_duration = float(audio_duration_str) if audio_duration_str else 0
+                if audio_duration <= 0:
+                    log_callback("Error: Tidak dapat menentukan durasi audio")
+                    mark('render', STATUS_FAILED, error="Durasi audio tidak diketahui")
+                    return False
+                # Scene judul ditambah satu scene untuk setiap gambar
+                avg_duration = audio_duration / (len(all_images) + 1)
             else:
-                # Hanya voiceover tanpa musik
-                command = [
-                    'ffmpeg', '-i', video_with_caption, '-i', audio_path, 
-                    '-c:v', 'copy', '-c:a', 'aac', '-map', '0:v:0', '-map', '1:a:0',
-                    '-af', 'adelay=750|750', '-y', output_path
-                ]
-                if not run_ffmpeg_command(command, log_callback): return False
-        else:
-            # Tambahkan judul besar di awal video meskipun tidak menggunakan voiceover
-            font_path = os.path.join(SCRIPT_DIR, 'fonts', 'Anton-Regular.ttf')
+                mark('tts', STATUS_DONE, artifacts={})
+                audio_duration = 0
+                avg_duration = image_duration
             
-            # Periksa keberadaan font, gunakan fallback jika tidak ada
-            if not os.path.exists(font_path):
-                # Coba buat direktori fonts jika belum ada
-                fonts_dir = os.path.join(SCRIPT_DIR, 'fonts')
-                if not os.path.exists(fonts_dir):
-                    os.makedirs(fonts_dir)
-                log_callback("Warning: Font Anton-Regular.ttf tidak ditemukan, menggunakan font sistem")
-                # Gunakan font default sistem berdasarkan OS
-                if os.name == 'nt':  # Windows
-                    font_path = 'C:\\Windows\\Fonts\\Arial.ttf'
-                else:  # macOS/Unix
-                    font_path = '/System/Library/Fonts/Helvetica.ttc'
+            music_files = list_music_files(music_folder)
+            if music_folder and os.path.exists(music_folder) and not music_files:
+                log_callback(f"Warning: Tidak ada file musik yang ditemukan di {music_folder}")
             
-            # Gunakan normpath untuk memastikan path kompatibel dengan sistem operasi
-            font_absolute_path = os.path.normpath(os.path.abspath(font_path))
+            # Semua keputusan acak (gambar judul, urutan scene, zoom, musik) diambil dari
+            # RNG ber-seed dan dicatat di render plan
+            font_path = resolve_font_path(log_callback)
             
-            # Siapkan teks judul
-            title_text = row['title'].upper()
-            # Escape karakter khusus untuk FFmpeg
-            title_text = escape_ffmpeg_text(title_text)
+            def plan_for(plan_title, caption, voice_path, voice_duration, plan_renditions, tail=0):
+                # Seed, gambar, dan durasi scene yang sama menghasilkan video scene (base) yang sama
+                return build_render_plan(
+                    seed_for(image_prompts),
+                    plan_title,
+                    caption,
+                    all_images,
+                    avg_duration,
+                    voice_path=voice_path,
+                    voice_duration=voice_duration,
+                    music_files=music_files,
+                    no_zoom=no_zoom,
+                    dark_overlay=use_dark_overlay,
+                    engine=engine,
+                    renditions=plan_renditions,
+                    font_path=font_path,
+                    tail=tail
+                )
             
-            # Bagi judul menjadi beberapa baris jika terlalu panjang
-            max_chars_per_line = 15
-            words = title_text.split()
-            lines = []
-            current_line = ""
+            # Upload streaming hanya untuk upload satu channel yang belum selesai pada run sebelumnya
+            stream_enabled = bool(stream_upload and youtube_config and youtube_config.get('enabled')
+                                  and not youtube_config.get('uploader') and not (stage_done('upload') or {}).get('video_id'))
+            plan = plan_for(row['title'], row['caption'], audio_path, audio_duration,
+                            [main_rendition(output_path, fragmented=stream_enabled)] + extra_renditions)
+            plan_path = os.path.join(work_dir, 'render_plan.json')
+            save_plan(plan, plan_path)
+            log_callback(f"Render plan (video scene {plan['base']['hash'][:10]}) disimpan di: {plan_path}")
+            log_callback(f"Menggunakan gambar {os.path.basename(plan['scenes'][0]['image'])} untuk scene judul")
+            if plan['audio']['music']:
+                log_callback(f"Menggunakan musik: {os.path.basename(plan['audio']['music'])}")
             
-            for word in words:
-                if len(current_line) + len(word) + 1 <= max_chars_per_line:
-                    if current_line:
-                        current_line += " " + word
-                    else:
-                        current_line = word
-                else:
-                    lines.append(current_line)
-                    current_line = word
+            # Varian memakai video scene yang sama: tanpa cache render, simpan di cache sementara job ini
+            scene_cache = render_cache
+            if variants and not scene_cache:
+                scene_cache = RenderCache(os.path.join(work_dir, 'variant_cache'))
             
-            if current_line:
-                lines.append(current_line)
+            # Upload dimulai sebelum encode; chunk dikirim begitu encoder menulisnya
+            if stream_enabled:
+                if os.path.exists(output_path):
+                    os.remove(output_path)
+                streaming = StreamingUpload(output_path, lambda source: upload_video_entry(
+                    row, output_path, youtube_config, log_callback, source=source), log_callback=log_callback)
+                log_callback("Upload streaming dimulai, video diupload selagi dirender")
             
-            # Gabungkan baris dengan newline untuk FFmpeg
-            multiline_title = "\n".join(lines)
+            # Tahap render
+            render_load = machine_load()
+            render_started = time.monotonic()
+            with tracing.span('render', engine=plan['engine'], scenes=len(plan['scenes']), base=plan['base']['hash'][:10]) as trace_args:
+                rendered = trace_args['ok'] = render_video_entry(plan, work_dir, temp_files, log_callback, cache=scene_cache)
+            if not rendered:
+                mark('render', STATUS_FAILED, error="Perintah FFmpeg gagal")
+                return False
             
-            # Atur ukuran font untuk judul (lebih besar dari sebelumnya)
-            title_font_size = 130 if len(lines) > 1 else 150
+            # Validasi sebelum upload: video yang gagal dirender ulang, tidak diupload
+            with tracing.span('validate'):
+                error = check_rendered_plan(plan, scene_cache, log_callback) if validate else None
+            if error:
+                mark('render', STATUS_FAILED, error=error)
+                return False
+            # Ukuran total baru dinyatakan ke server setelah video lolos validasi
+            if streaming:
+                streaming.finish()
+            if history:
+                history.record_render(job_key or plan['base']['hash'], plan_features(plan, render_load),
+                                      time.monotonic() - render_started)
             
-            # Buat filter untuk judul besar di awal video (0.75 detik pertama)
-            title_filter = f"drawtext=fontfile='{font_absolute_path}':text='{multiline_title}':fontcolor=yellow:fontsize={title_font_size}:x=(w-text_w)/2:y=(h-text_h)/2:text_align=center:borderw=5:bordercolor=black:enable='between(t,0,0.75)'"
+            # Setiap varian hanya menambahkan audio, overlay judul/caption, dan mux di atas video scene bersama
+            variant_outputs = {}
+            scene_total = sum(scene['duration'] for scene in plan['scenes'])
+            for variant in variants or []:
+                variant_title = variant.get('title') or row['title']
+                variant_text = variant.get('voiceover') or row['caption']
+                variant_lang = variant.get('lang') or voice_lang
+                variant_voice, variant_duration = audio_path, audio_duration
+                if audio_path and (variant_text != row['caption'] or variant_lang != voice_lang):
+                    variant_voice = generate_gtts_audio(variant_text, output_dir=work_dir, lang=variant_lang)
+                    variant_duration = get_audio_duration(variant_voice) if variant_voice else 0
+                    if not variant_voice or variant_duration <= 0:
+                        log_callback(f"Gagal membuat voiceover varian '{variant['name']}' ({variant_lang})")
+                        mark('render', STATUS_FAILED, error=f"Voiceover varian {variant['name']} gagal")
+                        return False
+                    temp_files.append(variant_voice)
+                variant_path = os.path.join(output_folder, f"{title}_{variant['name']}.mp4")
+                tail = max(0.0, variant_duration - scene_total) if variant_voice else 0
+                variant_plan = plan_for(variant_title, variant.get('caption') or variant_text, variant_voice,
+                                        variant_duration, [main_rendition(variant_path)], tail=tail)
+                log_callback(f"Merender varian '{variant['name']}' (bahasa {variant_lang}): {variant_title}")
+                with tracing.span('render variant', variant=variant['name'], lang=variant_lang):
+                    rendered = render_video_entry(variant_plan, work_dir, temp_files, log_callback, cache=scene_cache)
+                if not rendered:
+                    mark('render', STATUS_FAILED, error=f"Perintah FFmpeg gagal untuk varian {variant['name']}")
+                    return False
+                with tracing.span('validate', variant=variant['name']):
+                    error = check_rendered_plan(variant_plan, scene_cache, log_callback) if validate else None
+                if error:
+                    mark('render', STATUS_FAILED, error=f"Varian {variant['name']}: {error}")
+                    return False
+                variant_outputs[variant['name']] = variant_path
+            if scene_cache is not render_cache:
+                shutil.rmtree(scene_cache.cache_dir, ignore_errors=True)
             
-            video_with_title = os.path.join(TEMP_DIR, f'video_with_title_{int(time.time())}.mp4')
-            temp_files.append(video_with_title)
+            mark('render', STATUS_DONE, artifacts={
+                'output_path': output_path,
+                'renditions': {r['name']: r['path'] for r in extra_renditions},
+                'variants': variant_outputs,
+            })
+
+            log_callback(f"Video berhasil disimpan di: {output_path}")
+            for r in extra_renditions:
+                log_callback(f"Rendition '{r['name']}' ({r['width']}x{r['height']}) disimpan di: {r['path']}")
+            for name, path in variant_outputs.items():
+                log_callback(f"Varian '{name}' disimpan di: {path}")
+        
+        # Upload ke beberapa channel secara paralel di background
+        if youtube_config and youtube_config.get('uploader'):
+            previous = ledger.get_stage(job_key, 'upload') if ledger and job_key else None
+            done_channels = (previous or {}).get('artifacts', {}).get('channels', {})
             
-            # Tambahkan judul ke video
-            command = [
-                'ffmpeg', '-i', final_video_no_audio,
-                '-vf', title_filter,
-                '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-y', video_with_title
-            ]
-            if not run_ffmpeg_command(command, log_callback): return False
+            upload_started = time.monotonic()
             
-            # Tambahkan musik jika ada
-            if music_path:
-                log_callback("Menambahkan musik background ke video")
-                command = [
-                    'ffmpeg', '-i', video_with_title, '-i', music_path,
-                    '-c:v', 'copy', '-c:a', 'aac', '-map', '0:v:0', '-map', '1:a:0',
-                    '-shortest', '-af', 'volume=0.3', '-y', output_path
-                ]
-                if not run_ffmpeg_command(command, log_callback): return False
-            else:
-                # Tanpa musik, gunakan video dengan judul saja
-                command = ['ffmpeg', '-i', video_with_title, '-c:v', 'copy', '-y', output_path]
-                if not run_ffmpeg_command(command, log_callback): return False
-
-        log_callback(f"Video berhasil disimpan di: {output_path}")
+            def uploads_finished(results):
+                uploaded = {name: video_id for name, video_id in results.items() if video_id}
+                failed_channels = sorted(name for name, video_id in results.items() if not video_id)
+                for name, video_id in uploaded.items():
+                    if name not in done_channels:
+                        log_callback(f"Video '{row['title']}' diupload ke channel {name} dengan ID: {video_id}")
+                artifacts = {'channels': uploaded, 'output_path': output_path}
+                if failed_channels:
+                    log_callback(f"Upload '{row['title']}' gagal untuk channel: {', '.join(failed_channels)}")
+                    mark('upload', STATUS_FAILED, artifacts=artifacts, error=f"Upload gagal: {', '.join(failed_channels)}")
+                    return
+                mark('upload', STATUS_DONE, artifacts=artifacts)
+                if history and job_key and len(uploaded) > len(done_channels):
+                    history.record_upload(job_key, time.monotonic() - upload_started)
+                if auto_delete_enabled:
+                    cleanup_after_upload(output_path, [images_folder, frames_folder], log_callback)
+                if ledger and job_key and work_dir != TEMP_DIR and ledger.is_job_complete(job_key, required_stages_for(True)):
+                    shutil.rmtree(work_dir, ignore_errors=True)
+            
+            extra_config = {'content_tags': youtube_config['content_tags']} if youtube_config.get('content_tags') else None
+            youtube_config['uploader'].submit(row, output_path, extra_config=extra_config, done=done_channels,
+                                              on_complete=uploads_finished)
+            return True
         
         # Upload ke YouTube jika diaktifkan
         if youtube_config and youtube_config.get('enabled', False):
-            try:
-                log_callback("Memulai proses upload ke YouTube...")
-                
-                # Autentikasi YouTube
-                youtube_service = authenticate_youtube(
-                    youtube_config['client_secret_path'],
-                    youtube_config.get('token_path')
-                )
-                
-                # Siapkan metadata video
-                video_title = youtube_config['title_template'].format(title=row['title'])
-                # Gunakan template description dengan data dari CSV
-                if 'description' in row and pd.notna(row['description']) and str(row['description']).strip():
-                    video_description = youtube_config['description'].format(description=row['description'])
-                else:
-                    # Fallback jika tidak ada kolom description di CSV
-                    video_description = youtube_config['description'].replace('{description}', 'Generated by AI Video Short Generator')
-                
-                # Gunakan tags dari content_data jika ada (mode JSON), jika tidak gunakan dari youtube_config
-                if 'content_tags' in youtube_config and youtube_config['content_tags']:
-                    video_tags = youtube_config['content_tags']
-                    log_callback(f"Menggunakan tags dari file JSON: {video_tags}")
-                else:
-                    video_tags = [tag.strip() for tag in youtube_config['tags'].split(',') if tag.strip()]
-                    log_callback(f"Menggunakan tags dari konfigurasi YouTube: {video_tags}")
-                
-                privacy_status = youtube_config['privacy']
-                
-                # Upload video
-                video_id = upload_to_youtube(
-                    youtube_service,
-                    output_path,
-                    video_title,
-                    video_description,
-                    video_tags,
-                    privacy_status,
-                    log_callback
-                )
-                
-                if video_id:
-                    log_callback(f"Video berhasil diupload ke YouTube dengan ID: {video_id}")
+            upload_artifacts = stage_done('upload')
+            if upload_artifacts and upload_artifacts.get('video_id'):
+                log_callback(f"Melanjutkan: video sudah diupload sebelumnya dengan ID: {upload_artifacts['video_id']}")
+            else:
+                try:
+                    upload_started = time.monotonic()
+                    if streaming:
+                        log_callback("Menunggu sisa upload streaming selesai...")
+                        with tracing.span('upload wait'):
+                            video_id = streaming.wait()
+                    else:
+                        with tracing.span('upload'):
+                            video_id = upload_video_entry(row, output_path, youtube_config, log_callback)
                     
-                    # Auto-delete jika diaktifkan
-                    if auto_delete_enabled:
-                        log_callback("Auto-delete diaktifkan, menghapus file...")
+                    if video_id:
+                        log_callback(f"Video berhasil diupload ke YouTube dengan ID: {video_id}")
+                        mark('upload', STATUS_DONE, artifacts={'video_id': video_id, 'output_path': output_path})
+                        if history and job_key:
+                            history.record_upload(job_key, time.monotonic() - upload_started)
                         
-                        # Hapus file video
-                        if delete_video_file(output_path, log_callback):
-                            log_callback("File video berhasil dihapus")
-                        else:
-                            log_callback("Gagal menghapus file video")
-                            
-                        # Hapus file gambar di folder temp/images
-                        if os.path.exists(IMAGE_OUTPUT_DIR):
-                            log_callback("Menghapus file gambar di folder temp/images...")
-                            for f in os.listdir(IMAGE_OUTPUT_DIR):
-                                try:
-                                    os.remove(os.path.join(IMAGE_OUTPUT_DIR, f))
-                                except Exception as e:
-                                    log_callback(f"Gagal menghapus file gambar {f}: {e}")
-                            log_callback("File gambar berhasil dihapus")
-                            
-                        # Hapus file JSON di folder temp
-                        output_json_path = os.path.join(TEMP_DIR, "output.json")
-                        if os.path.exists(output_json_path):
-                            try:
-                                os.remove(output_json_path)
-                                log_callback("File JSON berhasil dihapus")
-                            except Exception as e:
-                                log_callback(f"Gagal menghapus file JSON: {e}")
-
-                else:
-                    log_callback("Upload ke YouTube gagal")
-                    
-            except Exception as e:
-                log_callback(f"Error saat upload ke YouTube: {e}")
+                        # Auto-delete jika diaktifkan
+                        if auto_delete_enabled:
+                            cleanup_after_upload(output_path, [images_folder, frames_folder], log_callback)
+                    else:
+                        log_callback("Upload ke YouTube gagal")
+                        mark('upload', STATUS_FAILED, error="Upload ke YouTube gagal")
+                        
+                except Exception as e:
+                    log_callback(f"Error saat upload ke YouTube: {e}")
+                    mark('upload', STATUS_FAILED, error=str(e))
+        
+        # Bersihkan direktori kerja entri setelah semua tahap selesai
+        if ledger and job_key and work_dir != TEMP_DIR:
+            if ledger.is_job_complete(job_key, required_stages_for(bool(youtube_config and youtube_config.get('enabled')))):
+                shutil.rmtree(work_dir, ignore_errors=True)
         
         return True
 
@@ -1082,15 +1690,338 @@ def process_video_entry(row, output_folder, image_duration, use_voiceover, use_d
         log_callback(f"Error dalam proses: {e}")
         return False
     finally:
+        # Render atau validasi gagal: upload streaming dibatalkan sebelum ukuran total dinyatakan
+        if streaming:
+            streaming.abort("render dibatalkan")
+        get_scratch().release_job(work_dir)
         for f in temp_files:
             if os.path.exists(f):
                 os.remove(f)
 
+def write_json_atomic(path: str, data):
+    """Menulis data JSON secara atomik (file sementara lalu os.replace)."""
+    output_dir = os.path.dirname(path)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def content_to_row(content_data):
+    """Konversi paket konten menjadi format yang kompatibel dengan process_video_entry."""
+    return pd.Series({
+        'title': content_data['title'],
+        'caption': content_data['voiceover'],
+        'description': content_data['description']
+        # Tidak perlu memasukkan image_prompts ke Series untuk menghindari konflik
+    })
+
+def process_content_entry(content_data, args, youtube_config, ledger, job_key, work_dir, output_folder, log_callback):
+    """Memproses satu paket konten dengan pengaturan dari argumen CLI.
+    
+    Args:
+        content_data (dict): Paket konten (title, voiceover, description, image_prompts, tags)
+        args: Hasil parsing argumen CLI
+        youtube_config: Konfigurasi upload YouTube (atau None)
+        ledger: JobLedger untuk mencatat progres
+        job_key (str): Kunci job di ledger
+        work_dir (str): Direktori kerja entri
+        output_folder (str): Folder untuk video hasil
+        log_callback: Function untuk logging
+        
+    Returns:
+        bool: True jika berhasil, False jika gagal
+    """
+    row = content_to_row(content_data)
+    render_cache = None if args.no_render_cache else RenderCache(args.render_cache)
+    
+    # Tambahkan tags jika ada dalam content_data, jika tidak gunakan list kosong
+    # Ini akan digunakan nanti dalam proses upload YouTube
+    tags = content_data.get('tags', [])
+    
+    # Tambahkan tags ke youtube_config jika ada
+    if youtube_config and tags:
+        youtube_config = youtube_config.copy()
+        youtube_config['content_tags'] = tags
+    
+    return process_video_entry(
+        row,
+        output_folder,
+        args.duration,
+        args.voiceover,
+        args.dark_overlay,
+        youtube_config,
+        log_callback,
+        auto_delete_enabled=args.auto_delete,
+        no_zoom=args.no_zoom,
+        music_folder=args.music,
+        # Gunakan image_prompts langsung dari content_data
+        image_prompts=content_data['image_prompts'],
+        generate_images=args.generate_images,
+        skip_image_validation=args.skip_image_validation if hasattr(args, 'skip_image_validation') else False,
+        ledger=ledger,
+        job_key=job_key,
+        work_dir=work_dir,
+        prep_workers=args.prep_workers,
+        renditions=args.rendition,
+        image_retries=args.image_retries,
+        image_timeout=args.image_timeout,
+        max_missing_scenes=args.max_missing_scenes,
+        engine=args.engine,
+        render_cache=render_cache,
+        image_library=None if args.no_image_library else get_library(args.image_library),
+        reuse_threshold=args.reuse_threshold if args.reuse_images else None,
+        validate=not args.no_validate,
+        voice_lang=args.lang,
+        variants=content_data.get('variants'),
+        history=None if args.no_history else get_history(args.history_db),
+        stream_upload=args.stream_upload
+    )
+
+def run_farm_worker(args, youtube_config):
+    """Menjalankan worker render farm sampai antrian kosong.
+    
+    Setiap worker memakai direktori kerja dan ledger sendiri di
+    temp/workers/<worker_id>, lalu memindahkan hasil render ke folder
+    output bersama (--output) setelah job selesai.
+    """
+    queue = open_queue(args.worker)
+    worker_id = args.worker_id or default_worker_id()
+    worker_root = os.path.join(TEMP_DIR, 'workers', worker_id)
+    staging_folder = os.path.join(worker_root, 'outgoing')
+    os.makedirs(staging_folder, exist_ok=True)
+    ledger = JobLedger(os.path.join(worker_root, 'ledger.db'))
+    
+    def worker_log(message):
+        print(f"[{worker_id}] {message}")
+    
+    def process_job(job):
+        content_data = job['payload']['content']
+        worker_log(f"Memproses job {job['job_id']}: {content_data.get('title', 'Tanpa judul')}")
+        # Percobaan ulang oleh worker yang sama melanjutkan progres di ledger lokal
+        job_key = ledger.register_job(content_data, source=args.worker, fresh=job['attempts'] == 1)
+        with tracing.track(f"{worker_id}: {content_data.get('title', job_key)}"), tracing.span('entry', job=job['job_id']) as trace_args:
+            success = trace_args['ok'] = process_content_entry(content_data, args, youtube_config, ledger, job_key,
+                                                               os.path.join(worker_root, 'jobs', job_key), staging_folder, worker_log)
+        if youtube_config and youtube_config.get('uploader'):
+            # Output baru boleh dipindahkan setelah upload ke semua channel selesai
+            youtube_config['uploader'].wait()
+        if not success:
+            return None
+        
+        # Pindahkan hasil ke folder output bersama; rename dari .part agar file tidak terlihat setengah jadi
+        render_artifacts = ledger.stage_artifacts(job_key, 'render') or {}
+        upload_artifacts = ledger.stage_artifacts(job_key, 'upload') or {}
+        outputs = []
+        for path in ([render_artifacts.get('output_path')] + list(render_artifacts.get('renditions', {}).values())
+                     + list(render_artifacts.get('variants', {}).values())):
+            if path and os.path.exists(path):
+                shared_path = os.path.join(args.output, os.path.basename(path))
+                shutil.move(path, f"{shared_path}.part")
+                os.replace(f"{shared_path}.part", shared_path)
+                outputs.append(shared_path)
+                worker_log(f"Output dipindahkan ke: {shared_path}")
+        return {'worker_id': worker_id, 'outputs': outputs, 'video_id': upload_artifacts.get('video_id'),
+                'channels': upload_artifacts.get('channels')}
+    
+    worker_log(f"Worker render farm aktif, antrian: {args.worker}")
+    done, failed = run_worker(queue, process_job, worker_id=worker_id, lease_seconds=args.lease_seconds,
+                              max_jobs=args.limit if args.limit and args.limit > 0 else None, log_callback=console_log)
+    if youtube_config and youtube_config.get('uploader'):
+        youtube_config['uploader'].close()
+    ledger.close()
+    queue.close()
+    prune_render_cache(args)
+    report_rate_limits(args.rate_stats)
+    return 0 if failed == 0 else 1
+
+def prune_render_cache(args):
+    """Membatasi ukuran cache render sesuai --render-cache-size."""
+    if args.no_render_cache or not os.path.isdir(args.render_cache):
+        return
+    remaining = RenderCache(args.render_cache).prune(int(args.render_cache_size * 1024 ** 3))
+    print(f"Cache render: {remaining / 1024 ** 2:.1f} MB di {args.render_cache}")
+
+def build_youtube_config(args):
+    """Menyiapkan konfigurasi upload YouTube dari argumen CLI, atau None jika tidak diaktifkan.
+    
+    Dengan --channels, video diupload ke setiap channel di registry lewat
+    ChannelUploader; opsi --privacy, --title-template, --description, dan
+    --tags menjadi nilai default channel.
+    """
+    if not args.youtube and not args.channels:
+        return None
+    if not YOUTUBE_API_AVAILABLE and not is_fake('upload'):
+        print("Warning: YouTube API libraries tidak terinstall. Auto-upload dinonaktifkan.")
+        print("Install dengan: pip install google-api-python-client google-auth-httplib2 google-auth-oauthlib")
+        return None
+    
+    if args.channels:
+        channels = select_channels(load_channels(args.channels, defaults={
+            'privacy': args.privacy, 'title_template': args.title_template,
+            'description': args.description, 'tags': args.tags,
+        }), args.channel)
+        for channel in channels:
+            print(f"Channel {channel['name']}: privacy {channel['privacy']}, "
+                  f"quota harian {channel['daily_quota']}, upload paralel {channel['concurrency']}")
+        uploader = ChannelUploader(channels, upload_video_entry, quota=QuotaLedger(args.quota_db), log_callback=console_log)
+        print(f"Auto-upload YouTube diaktifkan untuk {len(channels)} channel")
+        return {'enabled': True, 'channels': [c['name'] for c in channels], 'uploader': uploader}
+    
+    # Auto-generate token path if not provided
+    token_path = args.token
+    if not token_path and args.client_secret:
+        # Create token.json in same directory as client_secret.json
+        client_secret_dir = os.path.dirname(args.client_secret)
+        token_path = os.path.join(client_secret_dir, 'token.json')
+    
+    print("Auto-upload YouTube diaktifkan")
+    print(f"Token akan disimpan di: {token_path}")
+    return {
+        'enabled': True,
+        'client_secret_path': args.client_secret,
+        'token_path': token_path,
+        'title_template': args.title_template,
+        'description': args.description,
+        'tags': args.tags,
+        'privacy': args.privacy
+    }
+
+def probe_video(path: str) -> bool:
+    """Validasi video sebelum masuk buffer: container, stream, sinkron A/V, dan frame hitam."""
+    report = validate_video(path)
+    if not report['ok']:
+        print(f"Validasi gagal untuk {os.path.basename(path)}: {'; '.join(report['errors'])}")
+    return report['ok']
+
+def add_to_publish_buffer(buffer, ledger, job_key, content_data, render_seconds):
+    """Memasukkan video yang sudah dirender dan lolos validasi ke buffer publish."""
+    render_artifacts = ledger.stage_artifacts(job_key, 'render') or {}
+    output_path = render_artifacts.get('output_path')
+    if not output_path or not probe_video(output_path):
+        print(f"Video untuk '{content_data.get('title')}' tidak valid, tidak dimasukkan ke buffer")
+        return False
+    buffer.add(job_key, content_data, output_path, render_seconds=render_seconds)
+    print(f"Video dimasukkan ke buffer publish ({buffer.depth()} siap): {output_path}")
+    return True
+
+def parse_deadline(spec: str) -> float:
+    """Parse batas waktu batch: jam "HH:MM" (hari ini, atau besok jika sudah lewat) atau jumlah menit dari sekarang.
+
+    Returns:
+        float: Batas waktu dalam detik epoch
+    """
+    now = datetime.now()
+    try:
+        if ':' in spec:
+            deadline = datetime.combine(now.date(), datetime.strptime(spec, '%H:%M').time())
+            if deadline <= now:
+                deadline += timedelta(days=1)
+            return deadline.timestamp()
+        return now.timestamp() + float(spec) * 60
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Format batas waktu tidak valid: '{spec}' (contoh: 23:30 atau 90)")
+
+def predict_content(predictor, content_data, args):
+    """Perkiraan waktu render dan upload satu paket konten dengan pengaturan CLI (lihat predict.py)."""
+    renditions = 1 + len(args.rendition or []) + len(content_data.get('variants') or [])
+    features = content_features(content_data, args.voiceover, args.duration, args.no_zoom, args.engine,
+                                renditions=renditions)
+    return predictor.predict(features)
+
+def run_predict(args, upload_enabled):
+    """Menampilkan perkiraan waktu render dan upload setiap entri file JSON tanpa memproses apa pun."""
+    predictor = RenderPredictor.from_history(get_history(args.history_db))
+    source = 'model regresi' if predictor.render_coef is not None else 'rasio detik render per detik video'
+    print(f"Prediksi dari {predictor.samples} run sebelumnya ({source})")
+    total = 0.0
+    count = 0
+    for index, content_data in enumerate(iter_content_from_file(args.json, console_log, limit=args.limit or None)):
+        prediction = predict_content(predictor, content_data, args)
+        seconds = prediction['render'] + (prediction['upload'] if upload_enabled else 0)
+        total += seconds
+        count += 1
+        upload_text = f", upload {prediction['upload']:.0f} detik" if upload_enabled else ""
+        print(f"#{index+1} {content_data.get('title', 'Tanpa judul')}: render {prediction['render']:.0f} detik{upload_text}")
+    print(f"Total perkiraan {count} entri: {total / 60:.1f} menit")
+    return 0
+
+def run_publish(args, youtube_config):
+    """Mengupload video dari buffer publish (--publish).
+    
+    Tanpa --schedule-ahead, video tertua di buffer diupload sekarang. Dengan
+    --schedule-ahead N, hingga N video diupload lebih awal sebagai private
+    dengan publishAt pada slot publish berikutnya yang belum terpakai.
+    """
+    if not youtube_config:
+        print("Error: --publish memerlukan --youtube dan --client-secret")
+        return 1
+    if youtube_config.get('uploader'):
+        print("Error: --publish belum mendukung --channels; gunakan --youtube dengan --client-secret per channel")
+        return 1
+    buffer = PublishBuffer(args.buffer_db)
+    ledger = JobLedger(args.ledger)
+    count = args.schedule_ahead if args.schedule_ahead > 0 else 1
+    items = buffer.ready(limit=count)
+    if not items:
+        print("Buffer publish kosong: tidak ada video yang siap diupload")
+        buffer.close()
+        ledger.close()
+        return 1
+    
+    publish_times = [None] * len(items)
+    if args.schedule_ahead > 0:
+        slots = next_slots(parse_slots(args.publish_slots), datetime.now(), len(items), skip=buffer.scheduled_slots())
+        publish_times = [to_rfc3339(slot) for slot in slots]
+    
+    failed = 0
+    for item, publish_at in zip(items, publish_times):
+        content_data = item['content']
+        config = dict(youtube_config, publish_at=publish_at)
+        if content_data.get('tags'):
+            config['content_tags'] = content_data['tags']
+        print(f"\nPublish dari buffer: {content_data.get('title')}")
+        if not os.path.exists(item['output_path']):
+            print(f"Error: File video tidak ditemukan: {item['output_path']}")
+            buffer.mark_failed(item['job_key'], "File video tidak ditemukan")
+            failed += 1
+            continue
+        try:
+            video_id = upload_video_entry(content_to_row(content_data), item['output_path'], config, console_log)
+        except Exception as e:
+            print(f"Error saat upload ke YouTube: {e}")
+            video_id = None
+        if not video_id:
+            # Tetap di buffer untuk dicoba lagi pada slot berikutnya
+            failed += 1
+            continue
+        buffer.mark_published(item['job_key'], video_id, publish_at=publish_at)
+        ledger.mark_stage(item['job_key'], 'upload', STATUS_DONE, artifacts={'video_id': video_id, 'output_path': item['output_path']})
+        print(f"Video berhasil diupload dengan ID: {video_id}" + (f", publish pada {publish_at}" if publish_at else ""))
+        if args.auto_delete:
+            delete_video_file(item['output_path'], console_log)
+    
+    print(f"\n{len(items) - failed} video dipublish dari buffer, {buffer.depth()} video tersisa")
+    buffer.close()
+    ledger.close()
+    report_rate_limits(args.rate_stats)
+    return 0 if failed == 0 else 1
+
+def report_rate_limits(stats_path: str = None):
+    """Menampilkan counter rate limiter dan menyimpannya ke file JSON jika diminta."""
+    stats = format_stats()
+    if stats:
+        print(f"Statistik rate limiter:\n{stats}")
+    if stats_path:
+        write_json_atomic(stats_path, snapshot_all())
+        print(f"Statistik rate limiter disimpan ke: {stats_path}")
+
 # Fungsi untuk logging ke konsol
 def console_log(message):
     print(message)
 
-def main():
+def main(argv=None):
     # Inisialisasi counter untuk tracking hasil
     completed_count = 0
     error_count = 0
@@ -1100,8 +2031,10 @@ def main():
     
     # Grup argumen untuk sumber data (JSON atau generate dengan Qwen)
     data_group = parser.add_mutually_exclusive_group(required=True)
-    data_group.add_argument('--json', help='Path ke file JSON data yang sudah ada')
+    data_group.add_argument('--json', help='Path ke file JSON / JSON Lines (.jsonl) data yang sudah ada')
     data_group.add_argument('--generate', action='store_true', help='Generate konten baru menggunakan AI Qwen')
+    data_group.add_argument('--publish', action='store_true', help='Upload video dari buffer publish (lihat --fill-buffer), tanpa generate dan render')
+    data_group.add_argument('--worker', metavar='QUEUE', help='Jalankan sebagai worker render farm yang mengambil job dari antrian (mis. sqlite:///mnt/shared/queue.db)')
     parser.add_argument('--prompt', help='Path ke file prompt untuk AI Qwen (diperlukan jika --generate digunakan)')
     parser.add_argument('--output-json', help='Path untuk menyimpan hasil generate JSON (opsional, hanya berlaku jika --generate digunakan)')
     
@@ -1114,9 +2047,63 @@ def main():
     parser.add_argument('--no-zoom', action='store_true', help='Nonaktifkan efek zoom pada gambar')
     parser.add_argument('--generate-images', action='store_true', help='Generate gambar dari image_prompts menggunakan ImageFX (wajib diaktifkan)')
     parser.add_argument('--skip-image-validation', action='store_true', help='Lewati validasi ImageFX (hanya untuk pengujian)')
+    parser.add_argument('--rendition', action='append', type=parse_rendition_spec, default=[], metavar='NAMA=WxH[:BITRATE[:CONTAINER]]',
+                        help='Rendition tambahan dari filter graph yang sama, mis. preview=540x960:1200k:mp4 (bisa diulang)')
+    parser.add_argument('--engine', choices=ENGINES, default=ENGINE_FFMPEG,
+                        help='Render engine scene: ffmpeg (clip per scene dengan filter) atau numpy (frame dikomposisi NumPy ke satu encoder) (default: ffmpeg)')
+    parser.add_argument('--render-cache', default=os.path.join(TEMP_DIR, 'render_cache'),
+                        help='Folder cache output node render plan (default: temp/render_cache)')
+    parser.add_argument('--render-cache-size', type=float, default=5, help='Ukuran maksimum cache render dalam GB (default: 5)')
+    parser.add_argument('--no-render-cache', action='store_true', help='Nonaktifkan cache render (semua node dirender ulang)')
+    parser.add_argument('--no-validate', action='store_true', help='Lewati validasi video hasil render sebelum upload')
+    parser.add_argument('--history-db', default=DEFAULT_HISTORY_DB,
+                        help='Database riwayat durasi render/upload untuk prediksi (default: temp/render_history.db)')
+    parser.add_argument('--no-history', action='store_true', help='Jangan mencatat durasi render/upload ke riwayat')
+    parser.add_argument('--predict', action='store_true',
+                        help='Tampilkan perkiraan waktu render dan upload setiap entri --json lalu keluar')
+    parser.add_argument('--order', choices=['shortest', 'longest'],
+                        help='Urutkan entri berdasarkan perkiraan waktu render (+ upload)')
+    parser.add_argument('--deadline', type=parse_deadline, metavar='HH:MM|MENIT',
+                        help='Batas waktu batch; entri yang diperkirakan tidak selesai sebelum batas ini tidak dimulai')
+    parser.add_argument('--image-library', default=DEFAULT_LIBRARY_DIR,
+                        help='Folder pustaka gambar hasil generate yang diindeks per prompt (default: library/)')
+    parser.add_argument('--no-image-library', action='store_true', help='Jangan simpan gambar hasil generate ke pustaka')
+    parser.add_argument('--reuse-images', action='store_true',
+                        help='Gunakan gambar dari pustaka untuk prompt yang mirip alih-alih memanggil imagefx')
+    parser.add_argument('--reuse-threshold', type=float, default=DEFAULT_REUSE_THRESHOLD,
+                        help=f'Kemiripan prompt minimum (TF-IDF, 0-1) untuk memakai gambar pustaka (default: {DEFAULT_REUSE_THRESHOLD})')
+    parser.add_argument('--ffmpeg-stall-timeout', type=float, default=DEFAULT_STALL_TIMEOUT,
+                        help=f'Hentikan FFmpeg jika progress tidak bertambah selama N detik (default: {DEFAULT_STALL_TIMEOUT}, 0 = nonaktif)')
+    parser.add_argument('--ffmpeg-budget', action='append', type=parse_stage_budget, default=[], metavar='TAHAP=DETIK',
+                        help='Batas waktu per tahap FFmpeg: scene, concat, encode, final (mis. final=1200, 0 = tanpa batas; bisa diulang)')
+    parser.add_argument('--scratch-dir', help='Direktori scratch berbasis RAM untuk file antara render (default: /dev/shm)')
+    parser.add_argument('--no-ram-scratch', action='store_true', help='Selalu tulis file antara render ke disk (temp/)')
+    parser.add_argument('--scratch-budget', type=float, default=DEFAULT_SCRATCH_BUDGET_GB,
+                        help=f'Budget file antara render semua proses di mesin ini dalam GB; render menunggu jika penuh '
+                             f'(default: {DEFAULT_SCRATCH_BUDGET_GB}, 0 = tanpa batas)')
+    parser.add_argument('--cache-scene-clips', action='store_true',
+                        help='Salin juga clip per scene dan clip unit gambar diam dari scratch RAM ke cache render di disk')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='Tulis timeline batch (tahap, request API, subprocess) sebagai Chrome trace JSON; '
+                             '{pid} dan {worker} di path diganti, mis. temp/trace_{worker}.json')
+    parser.add_argument('--fill-buffer', action='store_true',
+                        help='Render video ke buffer publish tanpa upload; jumlah video menyesuaikan kedalaman buffer dan waktu render')
+    parser.add_argument('--buffer-db', default=os.path.join(TEMP_DIR, 'publish_buffer.db'), help='Path database buffer publish (default: temp/publish_buffer.db)')
+    parser.add_argument('--publish-slots', default=DEFAULT_PUBLISH_SLOTS, help=f'Jam publish harian, dipisahkan koma (default: {DEFAULT_PUBLISH_SLOTS})')
+    parser.add_argument('--off-peak', default=DEFAULT_OFF_PEAK, help=f'Jendela jam sepi untuk mengisi buffer (default: {DEFAULT_OFF_PEAK})')
+    parser.add_argument('--buffer-min', type=int, default=DEFAULT_MIN_DEPTH, help=f'Kedalaman buffer minimum (default: {DEFAULT_MIN_DEPTH})')
+    parser.add_argument('--buffer-max', type=int, default=DEFAULT_MAX_DEPTH, help=f'Kedalaman buffer maksimum (default: {DEFAULT_MAX_DEPTH})')
+    parser.add_argument('--schedule-ahead', type=int, default=0,
+                        help='Dengan --publish: upload N video sekarang sebagai private dengan publishAt pada slot berikutnya (default: 0 = upload satu video sekarang)')
+    parser.add_argument('--image-timeout', type=float, default=IMAGE_PROMPT_TIMEOUT, help=f'Batas waktu satu panggilan imagefx dalam detik (default: {IMAGE_PROMPT_TIMEOUT})')
+    parser.add_argument('--image-retries', type=int, default=IMAGE_PROMPT_RETRIES, help=f'Jumlah percobaan ulang generate gambar per prompt (default: {IMAGE_PROMPT_RETRIES})')
+    parser.add_argument('--max-missing-scenes', type=int, default=MAX_MISSING_SCENES,
+                        help=f'Jumlah prompt gagal yang masih boleh dirender dengan scene lebih sedikit (default: {MAX_MISSING_SCENES}, 0 = semua prompt wajib berhasil)')
+    parser.add_argument('--prep-workers', type=int, help='Jumlah worker paralel untuk normalisasi gambar (default: jumlah CPU)')
     
     # Argumen voiceover
     parser.add_argument('--voiceover', action='store_true', help='Gunakan voiceover (menggunakan layanan gtts)')
+    parser.add_argument('--lang', default='en', help='Bahasa voiceover gTTS untuk video utama (default: en)')
     
     # Argumen musik
     parser.add_argument('--music', help='Folder berisi file musik untuk background (opsional)')
@@ -1129,12 +2116,88 @@ def main():
     parser.add_argument('--description', default='{description}', help='Template deskripsi untuk YouTube (default: {description})')
     parser.add_argument('--tags', default='', help='Tags untuk YouTube, dipisahkan dengan koma')
     parser.add_argument('--privacy', choices=['private', 'unlisted', 'public'], default='private', help='Status privasi YouTube (default: private)')
+    parser.add_argument('--channels', help='File JSON registry channel: upload ke beberapa channel dengan kredensial dan quota sendiri')
+    parser.add_argument('--channel', action='append', help='Hanya upload ke channel ini (dapat diulang, default: semua channel di registry)')
+    parser.add_argument('--quota-db', default=os.path.join(TEMP_DIR, 'channel_quota.db'),
+                        help='Path database pemakaian quota per channel (default: temp/channel_quota.db)')
+    parser.add_argument('--stream-upload', action='store_true',
+                        help='Upload video selagi tahap akhir masih menulisnya (MP4 terfragmentasi, hanya untuk --youtube satu channel)')
     parser.add_argument('--auto-delete', action='store_true', help='Hapus video setelah berhasil diupload ke YouTube')
     
     # Argumen untuk membatasi jumlah data yang diproses
     parser.add_argument('--limit', type=int, help='Batasi jumlah data yang diproses dari file JSON')
     
-    args = parser.parse_args()
+    # Argumen ledger dan resume
+    parser.add_argument('--ledger', default=os.path.join(TEMP_DIR, 'ledger.db'), help='Path ke database ledger job (default: temp/ledger.db)')
+    parser.add_argument('--resume', action='store_true', help='Lanjutkan batch sebelumnya: lewati tahap yang sudah selesai di ledger')
+    
+    # Argumen rate limiting API eksternal
+    parser.add_argument('--rate-limits', help='File JSON konfigurasi rate limit per provider, mis. {"imagefx": {"rate": 0.1, "max_concurrency": 1}}')
+    parser.add_argument('--rate-stats', help='Simpan counter rate limiter per provider ke file JSON di akhir proses')
+    parser.add_argument('--fake-providers', metavar='DAFTAR',
+                        help=f'Gunakan provider fake lokal untuk pengujian beban offline: {",".join(PROVIDER_KINDS)} atau all')
+    parser.add_argument('--fake-config', help='File JSON konfigurasi provider fake, mis. {"image": {"latency": 0.5, "failure_rate": 0.1}}')
+    parser.add_argument('--fake-seed', type=int, default=0, help='Seed RNG provider fake (default: 0)')
+    
+    # Argumen render farm
+    parser.add_argument('--enqueue', metavar='QUEUE', help='Mode koordinator: masukkan entri ke antrian render farm alih-alih memprosesnya')
+    parser.add_argument('--wait', action='store_true', help='Koordinator menunggu sampai semua job di antrian selesai')
+    parser.add_argument('--worker-id', help='ID worker render farm (default: hostname-pid)')
+    parser.add_argument('--lease-seconds', type=float, default=DEFAULT_LEASE_SECONDS, help=f'Durasi lease job render farm dalam detik (default: {DEFAULT_LEASE_SECONDS})')
+    
+    # Argumen deteksi konten duplikat
+    parser.add_argument('--dedupe-index', default=os.path.join(TEMP_DIR, 'content_index.db'), help='Path ke indeks konten untuk deteksi duplikat (default: temp/content_index.db)')
+    parser.add_argument('--dedupe-threshold', type=float, help='Ambang kemiripan (0-1) untuk menolak konten duplikat (default: per field)')
+    parser.add_argument('--no-dedupe', action='store_true', help='Nonaktifkan deteksi konten duplikat')
+    
+    args = parser.parse_args(argv)
+    
+    if args.trace:
+        worker_name = (args.worker_id or default_worker_id()) if args.worker else 'main'
+        trace_path = args.trace.format(pid=os.getpid(), worker=worker_name)
+        tracing.enable(trace_path, process_name=f"cli.py {worker_name}" if args.worker else 'cli.py')
+        print(f"Trace batch ditulis ke: {trace_path}")
+    
+    if args.rate_limits:
+        load_config_file(args.rate_limits)
+    try:
+        configure_providers(fake=parse_kinds(args.fake_providers), seed=args.fake_seed)
+        if args.fake_config:
+            load_provider_config(args.fake_config)
+    except (ValueError, OSError) as e:
+        print(f"Error konfigurasi provider fake: {e}")
+        return 1
+    if args.fake_providers:
+        print(f"Provider fake aktif: {', '.join(sorted(parse_kinds(args.fake_providers)))} (seed {args.fake_seed})")
+    configure_ffmpeg(stall_timeout=args.ffmpeg_stall_timeout, budgets=dict(args.ffmpeg_budget))
+    if args.channels:
+        try:
+            select_channels(load_channels(args.channels), args.channel)
+        except (ValueError, OSError) as e:
+            print(f"Error registry channel {args.channels}: {e}")
+            return 1
+    if args.stream_upload and args.channels:
+        print("Warning: --stream-upload hanya berlaku untuk --youtube satu channel; upload channel berjalan setelah render")
+    
+    # Mode publish: hanya upload dari buffer, tanpa generate maupun render
+    if args.publish:
+        if args.youtube and not args.client_secret and not is_fake('upload'):
+            print("Error: Client Secret JSON diperlukan untuk upload YouTube")
+            return 1
+        return run_publish(args, build_youtube_config(args))
+    
+    # Mode prediksi: hanya menampilkan perkiraan waktu dari riwayat render
+    if args.predict:
+        if not args.json:
+            print("Error: --predict hanya dapat digunakan dengan --json")
+            return 1
+        return run_predict(args, bool(args.youtube or args.channels))
+    
+    # File antara render di RAM jika memori cukup, dengan budget bersama semua proses di mesin ini
+    scratch = configure_scratch(ram=not args.no_ram_scratch, ram_dir=args.scratch_dir, budget_gb=args.scratch_budget,
+                                 cache_ram_clips=args.cache_scene_clips)
+    if scratch.ram_dir:
+        print(f"Scratch render di RAM: {scratch.ram_dir} (spill ke disk jika memori kurang)")
     
     # Validasi argumen umum
     if not args.generate_images:
@@ -1143,16 +2206,16 @@ def main():
         return 1
         
     # Validasi GOOGLE_COOKIE untuk generate_images
-    if args.generate_images and not os.getenv("GOOGLE_COOKIE") and not args.skip_image_validation:
+    if args.generate_images and not os.getenv("GOOGLE_COOKIE") and not args.skip_image_validation and not is_fake('image'):
         print("Error: GOOGLE_COOKIE tidak ditemukan di environment variable")
         print("Tambahkan GOOGLE_COOKIE=<nilai_cookie> ke file .env atau environment variable")
         print("Atau gunakan --skip-image-validation untuk melewati validasi ini (hanya untuk pengujian)")
         return 1
         
     # Validasi command imagefx tersedia
-    if args.generate_images and not args.skip_image_validation:
+    if args.generate_images and not args.skip_image_validation and not is_fake('image'):
         try:
-            subprocess.run(["imagefx", "--version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+            tracing.run(["imagefx", "--version"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
         except FileNotFoundError:
             print("Error: Command 'imagefx' tidak ditemukan di sistem")
             print("Pastikan imagefx sudah terinstal dan tersedia di PATH")
@@ -1177,7 +2240,7 @@ def main():
     
     # Validasi ElevenLabs telah dihapus karena tidak digunakan lagi
     
-    if args.youtube and not args.client_secret:
+    if args.youtube and not args.client_secret and not args.channels and not is_fake('upload'):
         print("Error: Client Secret JSON diperlukan untuk upload YouTube")
         return 1
     
@@ -1210,173 +2273,276 @@ def main():
         if not os.path.exists(args.prompt):
             print(f"Error: File prompt tidak ditemukan: {args.prompt}")
             return 1
-        if not os.getenv("DASHSCOPE_API_KEY"):
+        if not os.getenv("DASHSCOPE_API_KEY") and not is_fake('content'):
             print("Error: DASHSCOPE_API_KEY tidak ditemukan")
             print("Silakan tambahkan DASHSCOPE_API_KEY=<your_api_key> ke file .env di direktori project")
             print("atau set dengan: export DASHSCOPE_API_KEY=<your_api_key>")
             return 1
     
     # Siapkan konfigurasi YouTube jika diaktifkan
-    youtube_config = None
-    if args.youtube:
-        if not YOUTUBE_API_AVAILABLE:
-            print("Warning: YouTube API libraries tidak terinstall. Auto-upload dinonaktifkan.")
-            print("Install dengan: pip install google-api-python-client google-auth-httplib2 google-auth-oauthlib")
-        else:
-            # Auto-generate token path if not provided
-            token_path = args.token
-            if not token_path:
-                # Create token.json in same directory as client_secret.json
-                client_secret_dir = os.path.dirname(args.client_secret)
-                token_path = os.path.join(client_secret_dir, 'token.json')
-            
-            youtube_config = {
-                'enabled': True,
-                'client_secret_path': args.client_secret,
-                'token_path': token_path,
-                'title_template': args.title_template,
-                'description': args.description,
-                'tags': args.tags,
-                'privacy': args.privacy
-            }
-            print("Auto-upload YouTube diaktifkan")
-            print(f"Token akan disimpan di: {token_path}")
+    youtube_config = build_youtube_config(args)
+    
+    # Mode render-ahead: video dirender ke buffer dan diupload nanti dengan --publish
+    buffer = None
+    if args.fill_buffer:
+        if youtube_config:
+            print("Mode --fill-buffer: upload dilewati, video disimpan di buffer publish")
+            youtube_config = None
+        buffer = PublishBuffer(args.buffer_db)
+        production = plan_production(buffer.depth(), buffer.render_samples(), parse_slots(args.publish_slots),
+                                     parse_window(args.off_peak), min_depth=args.buffer_min, max_depth=args.buffer_max)
+        print(f"Buffer publish: {buffer.depth()} video siap, target {production['target_depth']}, "
+              f"waktu render p90 {production['render_p90']:.0f} detik, "
+              f"{'dalam' if production['in_window'] else 'di luar'} jendela off-peak")
+        if production['to_render'] == 0:
+            print("Buffer sudah cukup, tidak ada video yang perlu dirender.")
+            buffer.close()
+            return 0
+        print(f"Merender {production['to_render']} video untuk buffer")
+        args.limit = production['to_render']
     
     # Proses video dari file JSON atau generate dengan Qwen
     completed_count = 0
     error_count = 0
     
+    # Mode worker render farm: ambil job dari antrian bersama
+    if args.worker:
+        return run_farm_worker(args, youtube_config)
+    
+    # Mode koordinator render farm
+    queue = open_queue(args.enqueue) if args.enqueue else None
+    if queue:
+        print(f"Mode koordinator: entri akan dimasukkan ke antrian {args.enqueue}")
+    
+    # Ledger job untuk mencatat progres per tahap dan melanjutkan batch yang terhenti
+    ledger = JobLedger(args.ledger)
+    required_stages = required_stages_for(youtube_config is not None)
+    
+    # Indeks konten untuk menolak paket duplikat sebelum tahap yang mahal
+    content_index = None
+    # Kunci yang baru masuk indeks pada run ini; dikeluarkan lagi jika entrinya tidak jadi dirender
+    indexed_keys = set()
+    if not args.no_dedupe:
+        thresholds = None
+        if args.dedupe_threshold is not None:
+            thresholds = {field: args.dedupe_threshold for field in ('title', 'voiceover', 'image_prompts')}
+        with tracing.span('load dedupe index'):
+            content_index = ContentIndex(args.dedupe_index, thresholds=thresholds)
+        print(f"Deteksi duplikat aktif ({len(content_index)} paket di indeks: {args.dedupe_index})")
+    if args.resume:
+        print(f"Mode resume: menggunakan ledger {args.ledger}")
+    
     # Tentukan sumber konten (file JSON atau generate dengan Qwen)
+    limit = args.limit if args.limit and args.limit > 0 else None
     if args.json:
         print(f"Menggunakan file JSON sebagai sumber konten: {args.json}")
-        # Baca konten dari file JSON
-        content_data_list = load_content_from_json(args.json, console_log)
+        # Baca konten secara bertahap; pembacaan berhenti saat --limit entri sudah diproses
+        # (entri duplikat yang dilewati tidak dihitung). Dengan --order, seluruh file dibaca
+        # agar entri terpendek/terpanjang dapat dipilih
+        content_iter = iter_content_from_file(args.json, console_log)
+        try:
+            first_entry = next(content_iter, None)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Error membaca konten dari file JSON: {e}")
+            return 1
+        if first_entry is None:
+            print("Error: Tidak ada entri valid dalam file JSON")
+            return 1
+        content_data_list = itertools.chain([first_entry], content_iter)
+        if limit:
+            print(f"Membatasi pemrosesan hanya untuk {limit} entri video dari file JSON")
     elif args.generate:
         print(f"Menggunakan AI Qwen untuk generate konten dari prompt: {args.prompt}")
-        # Generate konten dengan Qwen
-        content_data_list = generate_content_with_qwen(args.prompt, console_log)
+        content_data_list = []
         
-        # Simpan hasil generate ke file JSON jika diminta
-        # Pindahkan kode ini ke setelah generate konten tambahan (jika ada limit)
-        # untuk memastikan semua konten yang digenerate tersimpan
-    else:
-        # Seharusnya tidak terjadi karena argumen grup bersifat required=True
-        print("Error: Tidak ada sumber konten yang ditentukan (--json atau --generate)")
-        return 1
-    
-    if not content_data_list:
-        print("Error: Gagal membaca konten dari file JSON")
-        return 1
-    
-    # Pastikan content_data_list adalah list
-    if not isinstance(content_data_list, list):
-        content_data_list = [content_data_list]
-    
-    # Terapkan batasan jumlah data jika opsi --limit digunakan
-    original_count = len(content_data_list)
-    
-    # Jika menggunakan mode generate dan ada limit, generate konten sebanyak limit
-    if args.generate and args.limit and args.limit > 0:
-        # Jika sudah ada konten dari generate sebelumnya, gunakan sebagai konten awal
-        generated_content = content_data_list[0] if content_data_list else None
+        # Dengan --resume, lanjutkan dulu job yang belum selesai dari ledger
+        if args.resume:
+            content_data_list = [content for _, content in ledger.incomplete_jobs(required_stages)]
+            print(f"Melanjutkan {len(content_data_list)} job yang belum selesai dari ledger")
         
-        # Generate konten tambahan jika jumlah kurang dari limit
+        # Generate konten sebanyak limit (atau satu konten jika tanpa limit)
         # Tambahkan buffer untuk mengantisipasi kegagalan pemrosesan
-        target_generate = args.limit
-        max_attempts = max(10, target_generate * 2)  # Maksimal 2x limit atau minimal 10 percobaan
+        target_generate = limit or 1
+        max_attempts = max(10, target_generate * 2) if limit else 1  # Maksimal 2x limit atau minimal 10 percobaan
         attempts = 0
         
         while len(content_data_list) < target_generate and attempts < max_attempts:
             attempts += 1
-            print(f"\nMengenerate konten tambahan ({len(content_data_list)+1}/{target_generate})...")
-            new_content = generate_content_with_qwen(args.prompt, console_log)
+            print(f"\nMengenerate konten ({len(content_data_list)+1}/{target_generate})...")
+            with tracing.span('generate content', attempt=attempts):
+                new_content = generate_content_with_qwen(args.prompt, console_log)
+            if new_content and content_index is not None:
+                # Tolak paket yang mirip dengan konten sebelumnya dan generate pengganti
+                match = content_index.check_and_add(job_key_for(new_content), new_content)
+                if not match:
+                    indexed_keys.add(job_key_for(new_content))
+                if match:
+                    print(f"Konten ditolak karena mirip dengan '{match['title']}' "
+                          f"({match['field']}, kemiripan {match['similarity']:.2f}). Generate ulang...")
+                    new_content = None
             if new_content:
+                # Catat konten di ledger segera agar tidak hilang jika proses crash
+                ledger.register_job(new_content, source='qwen', fresh=True)
                 content_data_list.append(new_content)
+                
+                # Simpan hasil generate ke file JSON setiap kali konten baru dihasilkan
+                if args.output_json:
+                    write_json_atomic(args.output_json, content_data_list)
             else:
-                print(f"Gagal generate konten tambahan (percobaan {attempts}/{max_attempts})")
+                print(f"Gagal generate konten (percobaan {attempts}/{max_attempts})")
                 if attempts >= max_attempts:
                     print("Mencapai batas maksimum percobaan, melanjutkan dengan konten yang sudah ada")
                     break
-                
-        print(f"Berhasil generate {len(content_data_list)} konten dari target {target_generate}")
-    # Untuk mode JSON, batasi jumlah data yang diproses
-    elif args.limit and args.limit > 0 and args.limit < len(content_data_list):
-        content_data_list = content_data_list[:args.limit]
-        print(f"Membatasi pemrosesan hanya untuk {args.limit} dari {original_count} entri video dalam file JSON")
-    else:
-        print(f"Ditemukan {len(content_data_list)} entri video dalam file JSON")
         
-    # Simpan hasil generate ke file JSON jika diminta (setelah semua konten digenerate)
-    if args.generate and args.output_json:
-        output_dir = os.path.dirname(args.output_json)
-        if output_dir and not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-            
-        with open(args.output_json, 'w', encoding='utf-8') as f:
-            json.dump(content_data_list, f, indent=2, ensure_ascii=False)
-        print(f"Hasil generate disimpan ke: {args.output_json}")
+        if not content_data_list:
+            print("Error: Gagal generate konten dengan AI Qwen")
+            return 1
+        
+        print(f"Berhasil menyiapkan {len(content_data_list)} konten dari target {target_generate}")
+        if args.output_json:
+            print(f"Hasil generate disimpan ke: {args.output_json}")
+    else:
+        # Seharusnya tidak terjadi karena argumen grup bersifat required=True
+        print("Error: Tidak ada sumber konten yang ditentukan (--json atau --generate)")
+        return 1
     
-    # Proses setiap entri dalam file JSON
+    # Urutan dan batas waktu berdasarkan perkiraan waktu render (+ upload) dari riwayat
+    predictor = None
+    if args.order or args.deadline:
+        predictor = RenderPredictor.from_history(get_history(args.history_db))
+        upload_enabled = youtube_config is not None
+
+        def predicted_seconds(content):
+            prediction = predict_content(predictor, content, args)
+            return prediction['render'] + (prediction['upload'] if upload_enabled else 0)
+    if args.order:
+        content_data_list = sorted(content_data_list, key=predicted_seconds, reverse=args.order == 'longest')
+        print(f"Entri diurutkan dari perkiraan waktu {'terpendek' if args.order == 'shortest' else 'terpanjang'}")
+    if args.deadline:
+        print(f"Batas waktu batch: {datetime.fromtimestamp(args.deadline).strftime('%Y-%m-%d %H:%M')}")
+    
+    # Proses setiap entri konten
     success_count = 0  # Hitung berapa video yang berhasil diproses
-    target_count = args.limit if args.limit and args.limit > 0 else len(content_data_list)
+    processed_count = 0  # Entri yang benar-benar diproses (bukan dilewati sebagai duplikat/batas waktu)
+    target_count = limit
     
     for index, content_data in enumerate(content_data_list):
-        # Jika sudah mencapai target jumlah video yang berhasil, hentikan proses
-        if success_count >= target_count:
-            print(f"\nTarget {target_count} video berhasil tercapai. Menghentikan proses.")
+        # --limit dihitung dari entri yang diproses, bukan entri yang dibaca
+        if target_count and processed_count >= target_count:
+            print(f"\nBatas {target_count} entri tercapai ({success_count} berhasil). Menghentikan proses.")
             break
             
         print(f"\nMemproses entri #{index+1}: {content_data.get('title', 'Tanpa judul')}")
         
-        # Konversi konten menjadi format yang kompatibel dengan process_video_entry
-        row = pd.Series({
-            'title': content_data['title'],
-            'caption': content_data['voiceover'],
-            'description': content_data['description']
-            # Tidak perlu memasukkan image_prompts ke Series untuk menghindari konflik
-        })
-        
-        # Gunakan image_prompts langsung dari content_data
-        image_prompts = content_data['image_prompts']
-        
-        # Tambahkan tags jika ada dalam content_data, jika tidak gunakan list kosong
-        # Ini akan digunakan nanti dalam proses upload YouTube
-        tags = content_data.get('tags', [])
+        # Mode --fill-buffer: entri yang sudah ada di buffer tidak dirender ulang dan tidak dihitung ke batas
+        if buffer and buffer.holds(job_key_for(content_data)):
+            print(f"Entri #{index+1} sudah ada di buffer publish, dilewati")
+            continue
+        
+        # Lewati entri JSON yang mirip dengan konten yang sudah pernah diproduksi
+        if args.json and content_index is not None:
+            match = content_index.find_duplicate(content_data, exclude_key=job_key_for(content_data))
+            if match:
+                print(f"Entri #{index+1} dilewati karena mirip dengan '{match['title']}' "
+                      f"({match['field']}, kemiripan {match['similarity']:.2f})")
+                continue
+        
+        # Jangan mulai entri yang diperkirakan tidak selesai sebelum batas waktu
+        if args.deadline and not queue:
+            remaining = args.deadline - time.time()
+            estimate = predicted_seconds(content_data)
+            if estimate > remaining:
+                print(f"Entri #{index+1} dilewati: perkiraan {estimate / 60:.1f} menit melebihi sisa waktu "
+                      f"{max(0.0, remaining) / 60:.1f} menit")
+                if job_key_for(content_data) in indexed_keys:
+                    content_index.remove(job_key_for(content_data))
+                continue
+        
+        # Entri JSON masuk indeks saat mulai diproses (duplikat di batch yang sama ikut tertolak)
+        # dan dikeluarkan lagi jika render gagal
+        if args.json and content_index is not None and job_key_for(content_data) not in content_index:
+            content_index.add(job_key_for(content_data), content_data)
+            indexed_keys.add(job_key_for(content_data))
+        processed_count += 1
+        
+        # Mode koordinator: masukkan entri ke antrian render farm alih-alih memprosesnya
+        if queue:
+            job_id = queue.enqueue({'content': content_data}, job_id=job_key_for(content_data))
+            completed_count += 1
+            success_count += 1
+            print(f"Entri #{index+1} dimasukkan ke antrian dengan ID: {job_id}")
+            continue
         
-        # Tambahkan tags ke youtube_config jika ada
-        if youtube_config and tags:
-            youtube_config_copy = youtube_config.copy()
-            youtube_config_copy['content_tags'] = tags
+        # Daftarkan entri di ledger; dengan --resume, entri yang sudah tuntas dilewati
+        if args.json:
+            job_key = ledger.register_job(content_data, source=args.json, fresh=not args.resume)
         else:
-            youtube_config_copy = youtube_config
+            job_key = job_key_for(content_data)
+        if args.resume:
+            next_stage = ledger.first_incomplete_stage(job_key, required_stages)
+            if next_stage is None and buffer:
+                # Sudah dirender tapi belum ada di buffer: video lama dipakai lagi lalu dimasukkan ke buffer
+                print(f"Entri #{index+1} sudah dirender pada run sebelumnya, dimasukkan ke buffer publish")
+            elif next_stage is None:
+                completed_count += 1
+                success_count += 1
+                print(f"Entri #{index+1} sudah selesai pada run sebelumnya, dilewati. ({success_count}/{target_count or '-'})")
+                continue
+            else:
+                print(f"Melanjutkan entri #{index+1} dari tahap: {next_stage}")
         
         # Proses video
-        result = process_video_entry(
-            row,
-            args.output,
-            args.duration,
-            args.voiceover,
-            args.dark_overlay,
-            youtube_config_copy,
-            console_log,
-            auto_delete_enabled=args.auto_delete,
-            no_zoom=args.no_zoom,
-            music_folder=args.music,
-            image_prompts=image_prompts,
-            generate_images=args.generate_images,
-            skip_image_validation=args.skip_image_validation if hasattr(args, 'skip_image_validation') else False
-        )
+        started = time.monotonic()
+        with tracing.track(f"#{index+1} {content_data.get('title', job_key)}"), tracing.span('entry', job=job_key) as trace_args:
+            result = process_content_entry(content_data, args, youtube_config, ledger, job_key,
+                                           os.path.join(TEMP_DIR, 'jobs', job_key), args.output, console_log)
+            if result and buffer:
+                result = add_to_publish_buffer(buffer, ledger, job_key, content_data, time.monotonic() - started)
+            trace_args['ok'] = bool(result)
         
         if result:
             completed_count += 1
             success_count += 1
-            print(f"Video #{index+1} berhasil diproses. ({success_count}/{target_count})")
+            print(f"Video #{index+1} berhasil diproses. ({success_count}/{target_count or '-'})")
         else:
             error_count += 1
             print(f"Video #{index+1} gagal diproses.")
+            # Konten yang gagal dirender tidak boleh menghalangi percobaan berikutnya
+            if job_key in indexed_keys:
+                content_index.remove(job_key)
 
+    if youtube_config and youtube_config.get('uploader'):
+        print("\nMenunggu upload ke semua channel selesai...")
+        with tracing.span('wait uploads'):
+            youtube_config['uploader'].close()
+        uploads = ledger.summary().get('upload', {})
+        print(f"Upload channel: {uploads.get(STATUS_DONE, 0)} video selesai, {uploads.get(STATUS_FAILED, 0)} belum lengkap")
+    ledger.close()
+    if content_index is not None:
+        content_index.close()
+    if buffer:
+        buffer.close()
+    
+    if queue:
+        print(f"\n{completed_count} entri dimasukkan ke antrian: {args.enqueue}")
+        if args.wait:
+            with tracing.span('wait queue'):
+                # Tanpa worker aktif selama dua periode lease, koordinator berhenti menunggu
+                stats = wait_for_queue(queue, log_callback=console_log, idle_timeout=2 * args.lease_seconds)
+            for job in queue.results():
+                for path in job['result'].get('outputs', []):
+                    print(f"Output job {job['job_id']}: {path}")
+            if stats['stalled']:
+                queue.close()
+                return 1
+        queue.close()
+        return 0
+    
     print(f"\nProses selesai. {completed_count} video berhasil, {error_count} error.")
-    return 0
+    prune_render_cache(args)
+    report_rate_limits(args.rate_stats)
+    # Kode keluar bukan nol jika tidak ada satu pun video yang berhasil (dipakai campaigns.py)
+    return 1 if error_count and not completed_count else 0
 
 if __name__ == '__main__':
     sys.exit(main())
\ No newline at end of file
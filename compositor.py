@@ -0,0 +1,300 @@
+#!/usr/bin/env python
+"""Render engine alternatif berbasis NumPy.
+
+Setiap gambar ternormalisasi didecode sekali menjadi array NumPy. Overlay
+gelap diterapkan sekali per gambar sebagai matriks warna, efek zoom dihitung
+dengan resampling bilinear yang divektorisasi, lalu seluruh frame dialirkan
+sebagai rawvideo lewat stdin ke satu proses encoder FFmpeg. Hasilnya setara
+dengan video tanpa audio dari engine berbasis filter FFmpeg (clip per scene
+lalu concat), sehingga tahap judul, caption, dan audio tidak berubah.
+
+Benchmark kedua engine (fps dan memori puncak):
+    python compositor.py bench [--images DIR] [--scenes N] [--duration DETIK]
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import colorsys
+import tempfile
+import subprocess
+
+import numpy as np
+
+import tracing
+from image_prep import CANVAS_WIDTH, CANVAS_HEIGHT, canvas_filter, normalize_images
+from ffmpeg_runner import format_progress, start_ffmpeg
+
+FPS = 25
+ZOOM_MAX = 1.3
+
+ENGINE_FFMPEG = 'ffmpeg'
+ENGINE_NUMPY = 'numpy'
+ENGINES = (ENGINE_FFMPEG, ENGINE_NUMPY)
+
+# Koefisien luma BT.709
+_LUMA = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+
+def plan_scenes(images: list, no_zoom: bool = False, rng=random) -> list:
+    """Menentukan efek setiap scene: {'image': path, 'zoom': 'in' | 'out' | None}.
+
+    Dipakai oleh kedua engine sehingga arah zoom dipilih dengan cara yang sama.
+    """
+    return [{'image': path, 'zoom': None if no_zoom else rng.choice(['in', 'out'])} for path in images]
+
+
+def zoom_at(direction: str, n: int, frames: int) -> float:
+    """Faktor zoom frame ke-`n`, sama dengan ekspresi zoompan pada engine FFmpeg."""
+    if direction == 'in':
+        return 1 + (ZOOM_MAX - 1) * n / frames
+    return ZOOM_MAX - (ZOOM_MAX - 1) * n / frames
+
+
+def dark_overlay_matrix(hue: float = 0.3, saturation: float = 0.3, lightness: float = 0.3, mix: float = 0.3):
+    """Matriks warna 3x3 yang mendekati filter `colorize=0.3:0.3:0.3:0.3`.
+
+    Setiap piksel diganti warna HSL (hue, saturation) dengan luminansi piksel
+    yang diskalakan oleh `lightness`, lalu dicampur dengan piksel asli sebesar
+    `mix`. Semua langkah linear terhadap nilai RGB, sehingga cukup satu
+    perkalian matriks per gambar.
+    """
+    tint = np.array(colorsys.hls_to_rgb(hue / 360.0, lightness, saturation), dtype=np.float32)
+    tint = tint / float(_LUMA @ tint) * (lightness / 0.5)
+    return ((1 - mix) * np.eye(3, dtype=np.float32) + mix * np.outer(_LUMA, tint)).astype(np.float32)
+
+
+def decode_image(path: str, width: int = CANVAS_WIDTH, height: int = CANVAS_HEIGHT, timeout: float = 60):
+    """Mendecode gambar menjadi array uint8 (height, width, 3) berukuran kanvas."""
+    command = [
+        'ffmpeg', '-v', 'error', '-i', path,
+        '-vf', canvas_filter(width, height),
+        '-frames:v', '1', '-f', 'rawvideo', '-pix_fmt', 'rgb24', 'pipe:1'
+    ]
+    result = tracing.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+    expected = width * height * 3
+    if result.returncode != 0 or len(result.stdout) != expected:
+        stderr = result.stderr.decode('utf-8', errors='replace').strip()[-300:]
+        raise RuntimeError(f"Gagal decode {os.path.basename(path)}: {stderr or 'ukuran frame tidak sesuai'}")
+    return np.frombuffer(result.stdout, dtype=np.uint8).reshape(height, width, 3)
+
+
+def apply_color_matrix(image, matrix):
+    """Menerapkan matriks warna 3x3 ke seluruh gambar uint8."""
+    flat = image.reshape(-1, 3).astype(np.float32) @ matrix
+    np.clip(flat, 0, 255, out=flat)
+    return (flat + 0.5).astype(np.uint8).reshape(image.shape)
+
+
+def _axis_samples(size: int, zoom: float):
+    # Posisi sampel di gambar sumber untuk setiap piksel output
+    pos = (np.arange(size, dtype=np.float32) + 0.5) / zoom - 0.5
+    np.clip(pos, 0, size - 1, out=pos)
+    i0 = pos.astype(np.intp)
+    i1 = np.minimum(i0 + 1, size - 1)
+    return i0, i1, pos - i0
+
+
+def zoom_frame(src, zoom: float):
+    """Memperbesar gambar float32 dengan faktor `zoom` dari pojok kiri atas (resampling bilinear).
+
+    Jendela crop berada di pojok kiri atas, sama dengan zoompan tanpa ekspresi x/y.
+    """
+    height, width = src.shape[:2]
+    y0, y1, wy = _axis_samples(height, zoom)
+    x0, x1, wx = _axis_samples(width, zoom)
+    # Hanya bagian kiri atas gambar yang tercakup jendela crop
+    src = src[:int(y1[-1]) + 1, :int(x1[-1]) + 1]
+    # Interpolasi vertikal lalu horizontal: a + (b - a) * w, in-place untuk menghemat alokasi
+    rows = np.take(src, y0, axis=0)
+    below = np.take(src, y1, axis=0)
+    below -= rows
+    below *= wy[:, None, None]
+    rows += below
+    frame = np.take(rows, x0, axis=1)
+    right = np.take(rows, x1, axis=1)
+    right -= frame
+    right *= wx[None, :, None]
+    frame += right
+    frame += 0.5
+    return frame.astype(np.uint8)
+
+
+def render_scenes(scenes: list, duration: float, output_path: str, dark_overlay: bool = False,
+                  width: int = CANVAS_WIDTH, height: int = CANVAS_HEIGHT, fps: int = FPS, log_callback=print):
+    """Merender scene menjadi video tanpa audio lewat satu proses encoder FFmpeg.
+
+    Args:
+        scenes (list): Hasil plan_scenes
+        duration (float): Durasi setiap scene dalam detik
+        output_path (str): Path video hasil (tanpa audio)
+        dark_overlay (bool): Terapkan overlay gelap
+        width (int): Lebar kanvas
+        height (int): Tinggi kanvas
+        fps (int): Frame per detik
+        log_callback: Function untuk logging
+
+    Returns:
+        bool: True jika berhasil, False jika gagal
+    """
+    frames_per_scene = max(1, int(duration * fps))
+    matrix = dark_overlay_matrix() if dark_overlay else None
+    command = [
+        'ffmpeg', '-v', 'error',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-r', str(fps), '-i', 'pipe:0',
+        # Keyframe di setiap awal scene agar video dapat dipotong per scene tanpa encode ulang
+        '-force_key_frames', f'expr:gte(n,n_forced*{frames_per_scene})',
+        '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-y', output_path
+    ]
+    log_callback(f"Engine NumPy: merender {len(scenes)} scene x {frames_per_scene} frame ke {output_path}")
+
+    # Gambar yang sama (mis. gambar judul yang muncul dua kali) hanya didecode sekali
+    decoded = {}
+    try:
+        # Encoder dipantau watchdog: jika macet, proses dihentikan dan write berikutnya gagal
+        process, monitor = start_ffmpeg(command, stage='encode', log_callback=log_callback, stdin=subprocess.PIPE)
+    except FileNotFoundError:
+        log_callback("Error: FFmpeg tidak ditemukan. Pastikan FFmpeg terinstal dan ada di PATH sistem Anda.")
+        return False
+    completed = False
+    try:
+        for i, scene in enumerate(scenes):
+            path = scene['image']
+            if path not in decoded:
+                image = decode_image(path, width, height)
+                decoded[path] = apply_color_matrix(image, matrix) if matrix is not None else image
+            image = decoded[path]
+            if scene['zoom']:
+                log_callback(f"Scene {i+1}: Menerapkan efek zoom {scene['zoom']} pada {os.path.basename(path)}")
+                source = image.astype(np.float32)
+                for n in range(frames_per_scene):
+                    process.stdin.write(zoom_frame(source, zoom_at(scene['zoom'], n, frames_per_scene)).tobytes())
+            else:
+                log_callback(f"Scene {i+1}: Tanpa efek zoom pada {os.path.basename(path)}")
+                frame = image.tobytes()
+                for _ in range(frames_per_scene):
+                    process.stdin.write(frame)
+        process.stdin.close()
+        completed = True
+    except (BrokenPipeError, RuntimeError, subprocess.TimeoutExpired) as e:
+        log_callback(f"Error saat merender frame: {e}")
+    finally:
+        # Error apa pun saat menyusun frame: encoder dihentikan sekarang, bukan oleh watchdog
+        if not completed:
+            process.kill()
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+        result = monitor.wait()
+        # Output setengah jadi (mis. file staging cache) tidak ditinggalkan
+        if (not completed or not result.ok) and os.path.exists(output_path):
+            os.remove(output_path)
+    if not completed or not result.ok:
+        stderr = '\n'.join(result.stderr_tail)
+        log_callback(f"FFmpeg Error:\n{stderr}")
+        return False
+    log_callback(f"FFmpeg [encode] selesai dalam {result.elapsed:.1f} detik ({format_progress(result.progress)})")
+    return True
+
+
+def _peak_rss_mb():
+    """Memori puncak proses ini dan child terbesarnya dalam MB, atau None jika tidak tersedia."""
+    try:
+        import resource
+    except ImportError:
+        return None, None
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return own, children
+
+
+def _bench_engine(engine: str, images: list, duration: float, dark_overlay: bool, no_zoom: bool, work_dir: str):
+    """Menjalankan satu engine dan mencetak hasil pengukuran sebagai JSON (dijalankan di proses terpisah)."""
+    scenes = plan_scenes(images, no_zoom, rng=random.Random(0))
+    output_path = os.path.join(work_dir, f"bench_{engine}.mp4")
+    quiet = lambda message: None
+    start = time.monotonic()
+    if engine == ENGINE_NUMPY:
+        ok = render_scenes(scenes, duration, output_path, dark_overlay=dark_overlay, log_callback=quiet)
+    else:
+        # Import di sini: cli mengimpor modul ini
+        from cli import render_scene_clips
+        ok = render_scene_clips(scenes, duration, dark_overlay, work_dir, [], quiet) is not None
+    elapsed = time.monotonic() - start
+    own, children = _peak_rss_mb()
+    print(json.dumps({
+        'engine': engine,
+        'ok': ok,
+        'frames': len(scenes) * max(1, int(duration * FPS)),
+        'seconds': elapsed,
+        'python_peak_mb': own,
+        'ffmpeg_peak_mb': children,
+    }))
+
+
+def benchmark(image_dir: str, scenes: int, duration: float, dark_overlay: bool, no_zoom: bool):
+    """Membandingkan engine FFmpeg dan NumPy: fps dan memori puncak (python + ffmpeg terbesar)."""
+    sources = sorted(
+        os.path.join(root, f)
+        for root, _, files in os.walk(image_dir)
+        for f in files if f.lower().endswith(('.png', '.jpg', '.jpeg'))
+    )
+    if not sources:
+        print(f"Error: Tidak ada gambar di {image_dir}")
+        return 1
+
+    work_dir = tempfile.mkdtemp(prefix='compositor_bench_')
+    try:
+        frames = normalize_images(sources[:scenes], os.path.join(work_dir, 'frames'), log_callback=lambda m: None)
+        images = list(frames.values())
+        if not images:
+            print("Error: Tidak ada gambar valid untuk benchmark")
+            return 1
+        images = [images[i % len(images)] for i in range(scenes)]
+
+        print(f"Benchmark: {scenes} scene x {duration} detik, {CANVAS_WIDTH}x{CANVAS_HEIGHT} @ {FPS} fps, "
+              f"zoom={'tidak' if no_zoom else 'ya'}, overlay gelap={'ya' if dark_overlay else 'tidak'}")
+        print(f"{'engine':<8} {'frame':>6} {'detik':>8} {'fps':>8} {'puncak MB':>10}")
+        for engine in ENGINES:
+            # Setiap engine di proses sendiri agar memori puncak tidak tercampur
+            config = json.dumps({'images': images, 'duration': duration, 'dark_overlay': dark_overlay,
+                                 'no_zoom': no_zoom, 'work_dir': work_dir})
+            result = subprocess.run([sys.executable, os.path.abspath(__file__), '_bench-engine', engine, config],
+                                    stdout=subprocess.PIPE, text=True)
+            lines = result.stdout.strip().splitlines()
+            if result.returncode != 0 or not lines:
+                print(f"{engine:<8} gagal dijalankan")
+                continue
+            data = json.loads(lines[-1])
+            if not data['ok']:
+                print(f"{engine:<8} render gagal")
+                continue
+            fps = data['frames'] / data['seconds'] if data['seconds'] > 0 else 0
+            peak = (data['python_peak_mb'] or 0) + (data['ffmpeg_peak_mb'] or 0)
+            print(f"{engine:<8} {data['frames']:>6} {data['seconds']:>8.2f} {fps:>8.1f} {peak:>10.1f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '_bench-engine':
+        config = json.loads(sys.argv[3])
+        _bench_engine(sys.argv[2], config['images'], config['duration'], config['dark_overlay'], config['no_zoom'], config['work_dir'])
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description='Benchmark render engine FFmpeg vs NumPy')
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('--images', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images'),
+                        help='Folder gambar sumber (default: images/)')
+    parser.add_argument('--scenes', type=int, default=5, help='Jumlah scene (default: 5)')
+    parser.add_argument('--duration', type=float, default=3, help='Durasi setiap scene dalam detik (default: 3)')
+    parser.add_argument('--dark-overlay', action='store_true', help='Sertakan overlay gelap')
+    parser.add_argument('--no-zoom', action='store_true', help='Tanpa efek zoom')
+    args = parser.parse_args()
+    sys.exit(benchmark(args.images, args.scenes, args.duration, args.dark_overlay, args.no_zoom))
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+"""Indeks konten untuk mendeteksi paket yang (hampir) duplikat.
+
+Judul, voiceover, dan image prompts setiap paket yang diproduksi disimpan
+sebagai signature MinHash di SQLite. Pencarian memakai LSH banding sehingga
+hanya kandidat dengan bucket yang sama yang dibandingkan, lalu kemiripan
+Jaccard diestimasi dari signature.
+"""
+import os
+import re
+import json
+import sqlite3
+import hashlib
+import threading
+
+# Field yang diindeks beserta cara membuat shingle dan ambang kemiripannya
+DEFAULT_THRESHOLDS = {
+    'title': 0.7,
+    'voiceover': 0.6,
+    'image_prompts': 0.8,
+}
+
+NUM_PERM = 64
+BANDS = 16
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _normalize(text: str) -> str:
+    # \w Unicode: huruf non-Latin (mis. judul Jepang) tetap dipertahankan
+    return re.sub(r'\s+', ' ', re.sub(r'[^\w ]|_', ' ', text.lower())).strip()
+
+
+def shingles(text: str, field: str) -> set:
+    """Membuat himpunan shingle untuk satu field.
+
+    Judul memakai n-gram karakter (4) agar peka terhadap perubahan kecil,
+    sedangkan voiceover dan image prompts memakai shingle 3 kata.
+    """
+    normalized = _normalize(text)
+    if not normalized:
+        return set()
+    if field == 'title':
+        padded = f" {normalized} "
+        return {padded[i:i + 4] for i in range(max(1, len(padded) - 3))}
+    words = normalized.split()
+    if len(words) < 3:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def _field_text(content: dict, field: str) -> str:
+    value = content.get(field, '')
+    if isinstance(value, list):
+        return ' | '.join(str(v) for v in value)
+    return str(value or '')
+
+
+class MinHasher:
+    """Pembuat signature MinHash dengan permutasi (a*x + b) mod p yang deterministik."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        self.num_perm = num_perm
+        params = []
+        for i in range(num_perm):
+            digest = hashlib.sha1(f"{seed}:{i}".encode()).digest()
+            a = int.from_bytes(digest[:8], 'big') % (_MERSENNE_PRIME - 1) + 1
+            b = int.from_bytes(digest[8:16], 'big') % _MERSENNE_PRIME
+            params.append((a, b))
+        self._params = params
+
+    def signature(self, items: set) -> list:
+        if not items:
+            return [_MAX_HASH] * self.num_perm
+        hashes = [int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'big') for item in items]
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._params
+        ]
+
+
+def estimate_similarity(sig_a: list, sig_b: list) -> float:
+    """Estimasi kemiripan Jaccard dari dua signature MinHash."""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class ContentIndex:
+    """Indeks MinHash + LSH untuk judul, voiceover, dan image prompts yang sudah diproduksi."""
+
+    def __init__(self, db_path: str, thresholds: dict = None, num_perm: int = NUM_PERM, bands: int = BANDS):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm harus habis dibagi bands")
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self.thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS signatures (
+                key TEXT NOT NULL,
+                field TEXT NOT NULL,
+                title TEXT,
+                signature TEXT NOT NULL,
+                PRIMARY KEY (key, field)
+            )
+        ''')
+        self._conn.commit()
+        # Struktur di memori: signature per (key, field) dan bucket LSH per field
+        self._signatures = {}
+        self._titles = {}
+        self._buckets = {field: {} for field in self.thresholds}
+        for key, field, title, signature in self._conn.execute('SELECT key, field, title, signature FROM signatures'):
+            self._insert_memory(key, field, title, json.loads(signature))
+
+    def __len__(self):
+        return len(self._titles)
+
+    def __contains__(self, key: str):
+        return key in self._titles
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _band_keys(self, signature: list):
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, tuple(signature[start:start + self.rows])
+
+    def _insert_memory(self, key, field, title, signature):
+        self._signatures[(key, field)] = signature
+        self._titles[key] = title
+        buckets = self._buckets.setdefault(field, {})
+        for band_key in self._band_keys(signature):
+            buckets.setdefault(band_key, set()).add(key)
+
+    def signatures_for(self, content: dict) -> dict:
+        """Signature per field; field tanpa shingle (mis. kosong) tidak diindeks maupun dibandingkan."""
+        signatures = {}
+        for field in self.thresholds:
+            items = shingles(_field_text(content, field), field)
+            if items:
+                signatures[field] = self.hasher.signature(items)
+        return signatures
+
+    def find_duplicate(self, content: dict, exclude_key: str = None, signatures: dict = None):
+        """Mencari paket lama yang mirip dengan `content`.
+
+        Args:
+            content (dict): Paket konten baru
+            exclude_key (str): Kunci yang diabaikan (mis. paket itu sendiri saat resume)
+            signatures (dict): Signature yang sudah dihitung (opsional)
+
+        Returns:
+            dict: {'key', 'title', 'field', 'similarity'} untuk kecocokan terkuat, atau None
+        """
+        signatures = signatures or self.signatures_for(content)
+        best = None
+        with self._lock:
+            for field, signature in signatures.items():
+                candidates = set()
+                buckets = self._buckets.get(field, {})
+                for band_key in self._band_keys(signature):
+                    candidates.update(buckets.get(band_key, ()))
+                candidates.discard(exclude_key)
+                for key in candidates:
+                    similarity = estimate_similarity(signature, self._signatures.get((key, field)))
+                    if similarity >= self.thresholds[field] and (best is None or similarity > best['similarity']):
+                        best = {'key': key, 'title': self._titles.get(key), 'field': field, 'similarity': similarity}
+        return best
+
+    def add(self, key: str, content: dict, signatures: dict = None):
+        """Menambahkan paket ke indeks dan menyimpannya ke database."""
+        signatures = signatures or self.signatures_for(content)
+        title = content.get('title')
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO signatures (key, field, title, signature) VALUES (?, ?, ?, ?)',
+                [(key, field, title, json.dumps(sig)) for field, sig in signatures.items()]
+            )
+            self._conn.commit()
+            for field, sig in signatures.items():
+                self._insert_memory(key, field, title, sig)
+
+    def remove(self, key: str):
+        """Menghapus paket dari indeks, mis. karena render-nya gagal."""
+        with self._lock:
+            self._conn.execute('DELETE FROM signatures WHERE key = ?', (key,))
+            self._conn.commit()
+            for field, buckets in self._buckets.items():
+                signature = self._signatures.pop((key, field), None)
+                if signature is None:
+                    continue
+                for band_key in self._band_keys(signature):
+                    bucket = buckets.get(band_key)
+                    if bucket:
+                        bucket.discard(key)
+            self._titles.pop(key, None)
+
+    def check_and_add(self, key: str, content: dict):
+        """Menolak paket jika duplikat; jika tidak, menambahkannya ke indeks.
+
+        Returns:
+            dict: Info kecocokan jika duplikat (paket tidak ditambahkan), atau None jika unik
+        """
+        signatures = self.signatures_for(content)
+        match = self.find_duplicate(content, exclude_key=key, signatures=signatures)
+        if match:
+            return match
+        self.add(key, content, signatures=signatures)
+        return None
@@ -0,0 +1,365 @@
+#!/usr/bin/env python
+"""Antrian job bersama untuk membagi batch render ke beberapa mesin.
+
+Koordinator (cli.py --enqueue) memasukkan entri konten ke antrian, lalu
+beberapa worker (cli.py --worker) mengklaim job dengan lease yang
+diperpanjang lewat heartbeat. Lease yang kedaluwarsa (worker mati) dapat
+diklaim ulang oleh worker lain. Backend antrian bersifat pluggable; backend
+SQLite bawaan cukup untuk pengujian lokal maupun storage bersama.
+
+Penggunaan langsung:
+    python farm.py status <queue>
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+
+STATUS_QUEUED = 'queued'
+STATUS_LEASED = 'leased'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class QueueBackend:
+    """Antarmuka backend antrian job.
+
+    Setiap job adalah dict dengan key 'job_id', 'payload', 'attempts',
+    dan 'worker_id'. Implementasi harus menjamin satu job hanya dipegang
+    satu worker selama lease-nya masih berlaku.
+    """
+
+    def enqueue(self, payload: dict, job_id: str = None) -> str:
+        raise NotImplementedError
+
+    def claim(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        """Mengklaim satu job yang tersedia. Mengembalikan dict job, atau None."""
+        raise NotImplementedError
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Memperpanjang lease. Mengembalikan False jika lease sudah hilang."""
+        raise NotImplementedError
+
+    def complete(self, job_id: str, worker_id: str, result: dict = None) -> bool:
+        raise NotImplementedError
+
+    def fail(self, job_id: str, worker_id: str, error: str = None, retry: bool = True) -> bool:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+    def requeue_expired(self) -> int:
+        """Mengembalikan job dengan lease kedaluwarsa (worker mati) ke antrian. Mengembalikan jumlahnya."""
+        raise NotImplementedError
+
+    def results(self) -> list:
+        """Mengembalikan daftar job yang sudah selesai beserta hasilnya."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SqliteQueue(QueueBackend):
+    """Backend antrian berbasis satu file SQLite.
+
+    Klaim dilakukan di dalam transaksi `BEGIN IMMEDIATE` sehingga aman untuk
+    banyak proses. Untuk beberapa mesin, letakkan file di storage bersama
+    yang mendukung file locking.
+    """
+
+    def __init__(self, db_path: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute('PRAGMA busy_timeout=30000')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                worker_id TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                enqueued_at REAL,
+                updated_at REAL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, enqueued_at)')
+
+    def _transaction(self, fn):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = fn(self._conn)
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return result
+
+    def enqueue(self, payload: dict, job_id: str = None) -> str:
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        self._transaction(lambda c: c.execute(
+            'INSERT OR IGNORE INTO jobs (job_id, payload, status, enqueued_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+            (job_id, json.dumps(payload, ensure_ascii=False), STATUS_QUEUED, now, now)
+        ))
+        return job_id
+
+    def claim(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        def _claim(c):
+            now = time.time()
+            # Job yang lease-nya kedaluwarsa setelah percobaan terakhir dianggap gagal
+            c.execute(
+                'UPDATE jobs SET status = ?, error = ?, worker_id = NULL, lease_expires = NULL, updated_at = ? '
+                'WHERE status = ? AND lease_expires < ? AND attempts >= ?',
+                (STATUS_FAILED, 'Lease kedaluwarsa', now, STATUS_LEASED, now, self.max_attempts)
+            )
+            # Job dengan lease kedaluwarsa dianggap tersedia kembali
+            row = c.execute(
+                'SELECT job_id, payload, attempts FROM jobs '
+                'WHERE (status = ? OR (status = ? AND lease_expires < ?)) AND attempts < ? '
+                'ORDER BY enqueued_at LIMIT 1',
+                (STATUS_QUEUED, STATUS_LEASED, now, self.max_attempts)
+            ).fetchone()
+            if not row:
+                return None
+            job_id, payload, attempts = row
+            c.execute(
+                'UPDATE jobs SET status = ?, worker_id = ?, lease_expires = ?, attempts = ?, updated_at = ? WHERE job_id = ?',
+                (STATUS_LEASED, worker_id, now + lease_seconds, attempts + 1, now, job_id)
+            )
+            return {'job_id': job_id, 'payload': json.loads(payload), 'attempts': attempts + 1, 'worker_id': worker_id}
+        return self._transaction(_claim)
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        now = time.time()
+        cursor = self._transaction(lambda c: c.execute(
+            'UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE job_id = ? AND worker_id = ? AND status = ?',
+            (now + lease_seconds, now, job_id, worker_id, STATUS_LEASED)
+        ))
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: dict = None) -> bool:
+        now = time.time()
+        cursor = self._transaction(lambda c: c.execute(
+            'UPDATE jobs SET status = ?, result = ?, lease_expires = NULL, updated_at = ? '
+            'WHERE job_id = ? AND worker_id = ? AND status = ?',
+            (STATUS_DONE, json.dumps(result or {}, ensure_ascii=False), now, job_id, worker_id, STATUS_LEASED)
+        ))
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str = None, retry: bool = True) -> bool:
+        def _fail(c):
+            now = time.time()
+            row = c.execute('SELECT attempts FROM jobs WHERE job_id = ? AND worker_id = ? AND status = ?',
+                            (job_id, worker_id, STATUS_LEASED)).fetchone()
+            if not row:
+                return False
+            status = STATUS_QUEUED if retry and row[0] < self.max_attempts else STATUS_FAILED
+            c.execute(
+                'UPDATE jobs SET status = ?, error = ?, worker_id = NULL, lease_expires = NULL, updated_at = ? WHERE job_id = ?',
+                (status, error, now, job_id)
+            )
+            return True
+        return self._transaction(_fail)
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+            expired = self._conn.execute('SELECT COUNT(*) FROM jobs WHERE status = ? AND lease_expires < ?',
+                                         (STATUS_LEASED, now)).fetchone()[0]
+        stats = {STATUS_QUEUED: 0, STATUS_LEASED: 0, STATUS_DONE: 0, STATUS_FAILED: 0}
+        stats.update(dict(rows))
+        stats['expired_leases'] = expired
+        return stats
+
+    def requeue_expired(self) -> int:
+        def _requeue(c):
+            now = time.time()
+            c.execute(
+                'UPDATE jobs SET status = ?, error = ?, worker_id = NULL, lease_expires = NULL, updated_at = ? '
+                'WHERE status = ? AND lease_expires < ? AND attempts >= ?',
+                (STATUS_FAILED, 'Lease kedaluwarsa', now, STATUS_LEASED, now, self.max_attempts)
+            )
+            return c.execute(
+                'UPDATE jobs SET status = ?, worker_id = NULL, lease_expires = NULL, updated_at = ? '
+                'WHERE status = ? AND lease_expires < ?',
+                (STATUS_QUEUED, now, STATUS_LEASED, now)
+            ).rowcount
+        return self._transaction(_requeue)
+
+    def results(self) -> list:
+        with self._lock:
+            rows = self._conn.execute('SELECT job_id, result FROM jobs WHERE status = ? ORDER BY updated_at',
+                                      (STATUS_DONE,)).fetchall()
+        return [{'job_id': job_id, 'result': json.loads(result) if result else {}} for job_id, result in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# Registry backend antrian: skema URL -> factory
+QUEUE_BACKENDS = {
+    'sqlite': SqliteQueue,
+}
+
+
+def open_queue(url: str, **kwargs) -> QueueBackend:
+    """Membuka backend antrian dari URL, mis. 'sqlite:///mnt/shared/queue.db' atau path biasa."""
+    if '://' in url:
+        scheme, location = url.split('://', 1)
+    else:
+        scheme, location = 'sqlite', url
+    if scheme not in QUEUE_BACKENDS:
+        raise ValueError(f"Backend antrian tidak dikenal: {scheme} (pilihan: {', '.join(QUEUE_BACKENDS)})")
+    return QUEUE_BACKENDS[scheme](location, **kwargs)
+
+
+class LeaseHeartbeat:
+    """Thread latar yang memperpanjang lease job secara berkala selama job diproses."""
+
+    def __init__(self, backend: QueueBackend, job_id: str, worker_id: str, lease_seconds: float, log_callback=print):
+        self.backend = backend
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.log_callback = log_callback
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        interval = max(1.0, self.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            try:
+                if not self.backend.heartbeat(self.job_id, self.worker_id, self.lease_seconds):
+                    self.lost = True
+                    self.log_callback(f"Warning: Lease job {self.job_id} hilang (sudah diklaim worker lain)")
+                    return
+            except Exception as e:
+                self.log_callback(f"Warning: Gagal mengirim heartbeat untuk job {self.job_id}: {e}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def run_worker(backend: QueueBackend, process_fn, worker_id: str = None, lease_seconds: float = DEFAULT_LEASE_SECONDS,
+               poll_interval: float = 5.0, exit_when_empty: bool = True, max_jobs: int = None, log_callback=print):
+    """Loop worker: klaim job, proses dengan heartbeat, lalu laporkan hasilnya.
+
+    Args:
+        backend: Backend antrian
+        process_fn: Function(job) -> dict hasil, atau None jika gagal
+        worker_id (str): ID worker (default: hostname-pid)
+        lease_seconds (float): Durasi lease per heartbeat
+        poll_interval (float): Jeda polling saat antrian kosong
+        exit_when_empty (bool): Berhenti jika antrian kosong
+        max_jobs (int): Jumlah maksimal job yang diproses (opsional)
+        log_callback: Function untuk logging
+
+    Returns:
+        tuple: (jumlah job berhasil, jumlah job gagal)
+    """
+    worker_id = worker_id or default_worker_id()
+    done = failed = 0
+    while max_jobs is None or done + failed < max_jobs:
+        job = backend.claim(worker_id, lease_seconds)
+        if job is None:
+            if exit_when_empty:
+                stats = backend.stats()
+                # Tunggu job yang masih dipegang worker lain, kalau-kalau lease-nya kedaluwarsa
+                if stats[STATUS_LEASED] == 0:
+                    break
+            time.sleep(poll_interval)
+            continue
+
+        log_callback(f"[{worker_id}] Mengklaim job {job['job_id']} (percobaan {job['attempts']})")
+        try:
+            with LeaseHeartbeat(backend, job['job_id'], worker_id, lease_seconds, log_callback) as heartbeat:
+                result = process_fn(job)
+        except Exception as e:
+            result = None
+            log_callback(f"[{worker_id}] Error saat memproses job {job['job_id']}: {e}")
+
+        if heartbeat.lost:
+            log_callback(f"[{worker_id}] Hasil job {job['job_id']} diabaikan karena lease sudah hilang")
+            failed += 1
+        elif result is not None:
+            backend.complete(job['job_id'], worker_id, result)
+            done += 1
+        else:
+            backend.fail(job['job_id'], worker_id, error='Pemrosesan gagal')
+            failed += 1
+
+    log_callback(f"[{worker_id}] Worker selesai: {done} job berhasil, {failed} gagal")
+    return done, failed
+
+
+def wait_for_queue(backend: QueueBackend, poll_interval: float = 10.0, log_callback=print, idle_timeout: float = None):
+    """Menunggu sampai tidak ada job yang antri atau sedang diproses.
+
+    Lease milik worker yang mati dikembalikan ke antrian. Jika masih ada job
+    antri tetapi tidak ada worker yang memproses apa pun selama `idle_timeout`
+    detik, penantian dihentikan agar koordinator tidak menunggu selamanya.
+
+    Returns:
+        dict: Statistik antrian terakhir; `stalled` True jika berhenti karena tidak ada worker
+    """
+    idle_since = None
+    while True:
+        requeued = backend.requeue_expired()
+        if requeued:
+            log_callback(f"{requeued} job dengan lease kedaluwarsa dikembalikan ke antrian")
+        stats = backend.stats()
+        log_callback(f"Status antrian: {stats[STATUS_QUEUED]} antri, {stats[STATUS_LEASED]} diproses, "
+                     f"{stats[STATUS_DONE]} selesai, {stats[STATUS_FAILED]} gagal")
+        if stats[STATUS_QUEUED] == 0 and stats[STATUS_LEASED] == 0:
+            stats['stalled'] = False
+            return stats
+        if stats[STATUS_LEASED] == 0:
+            idle_since = idle_since or time.monotonic()
+            if idle_timeout and time.monotonic() - idle_since >= idle_timeout:
+                log_callback(f"Tidak ada worker aktif selama {idle_timeout:.0f} detik, "
+                             f"{stats[STATUS_QUEUED]} job masih antri; berhenti menunggu")
+                stats['stalled'] = True
+                return stats
+        else:
+            idle_since = None
+        time.sleep(poll_interval)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or sys.argv[1] != 'status':
+        print("Penggunaan: python farm.py status <queue>")
+        sys.exit(1)
+    queue = open_queue(sys.argv[2])
+    print(json.dumps(queue.stats(), indent=2))
+    sys.exit(0)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+"""Menjalankan FFmpeg dengan progress live, watchdog, dan tail stderr terbatas.
+
+FFmpeg dijalankan dengan `-progress pipe:1` sehingga frame, fps, speed, dan
+out_time dapat dibaca selama encode berjalan. Watchdog menghentikan proses
+jika progress tidak bertambah selama `stall_timeout` detik atau jika batas
+waktu tahap (budget) terlampaui. Stderr dibaca terus-menerus ke buffer
+berukuran tetap sehingga memori tidak bertambah untuk encode yang panjang.
+"""
+import time
+import threading
+import subprocess
+from collections import deque, namedtuple
+
+import tracing
+
+DEFAULT_STALL_TIMEOUT = 120     # detik tanpa progress sebelum proses dihentikan
+# Batas waktu total per tahap dalam detik (None = tanpa batas)
+DEFAULT_STAGE_BUDGETS = {
+    'scene': 600,
+    'concat': 300,
+    'encode': 3600,
+    'final': 3600,
+}
+STDERR_TAIL_LINES = 40
+LOG_INTERVAL = 10               # detik antar log progress
+
+REASON_STALL = 'stall'
+REASON_BUDGET = 'budget'
+
+_settings = {
+    'stall_timeout': DEFAULT_STALL_TIMEOUT,
+    'budgets': dict(DEFAULT_STAGE_BUDGETS),
+}
+
+FFmpegResult = namedtuple('FFmpegResult', ['ok', 'returncode', 'reason', 'progress', 'stderr_tail', 'elapsed'])
+
+
+def configure(stall_timeout: float = None, budgets: dict = None):
+    """Mengatur batas watchdog, mis. dari argumen CLI."""
+    if stall_timeout is not None:
+        _settings['stall_timeout'] = stall_timeout if stall_timeout > 0 else None
+    for stage, seconds in (budgets or {}).items():
+        _settings['budgets'][stage] = seconds if seconds and seconds > 0 else None
+
+
+def stage_budget(stage: str):
+    return _settings['budgets'].get(stage)
+
+
+def with_progress(command: list) -> list:
+    """Menambahkan `-progress pipe:1 -nostats` ke perintah FFmpeg jika belum ada."""
+    if '-progress' in command:
+        return list(command)
+    return [command[0], '-progress', 'pipe:1', '-nostats'] + list(command[1:])
+
+
+def format_progress(progress: dict) -> str:
+    return (f"frame={progress.get('frame', '-')} fps={progress.get('fps', '-')} "
+            f"speed={progress.get('speed', '-')} out_time={progress.get('out_time', '-')}")
+
+
+class FFmpegMonitor:
+    """Membaca progress dan stderr proses FFmpeg serta menghentikannya jika macet.
+
+    Proses harus dibuat dengan stdout=PIPE (untuk `-progress pipe:1`) dan
+    stderr=PIPE dalam mode biner.
+    """
+
+    def __init__(self, process, stage: str = None, log_callback=print, stall_timeout: float = None,
+                 budget: float = None, progress_callback=None):
+        self.process = process
+        self.stage = stage or 'ffmpeg'
+        self.log_callback = log_callback
+        self.stall_timeout = stall_timeout
+        self.budget = budget
+        self.progress_callback = progress_callback
+        self.progress = {}
+        self.stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+        self.reason = None
+        self.started = time.monotonic()
+        self.trace = tracing.start(f"ffmpeg {self.stage}", 'subprocess', pid=process.pid,
+                                   argv=tracing.summarize_argv(process.args))
+        self._last_advance = self.started
+        self._last_log = self.started
+        self._marker = None
+        self._done = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._read_progress, daemon=True),
+            threading.Thread(target=self._read_stderr, daemon=True),
+            threading.Thread(target=self._watchdog, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _read_progress(self):
+        block = {}
+        for raw in iter(self.process.stdout.readline, b''):
+            key, _, value = raw.decode('utf-8', errors='replace').strip().partition('=')
+            if not key:
+                continue
+            block[key] = value.strip()
+            if key != 'progress':
+                continue
+            # Satu blok progress lengkap
+            self.progress = block
+            marker = (block.get('frame'), block.get('out_time_us') or block.get('out_time_ms'))
+            now = time.monotonic()
+            if marker != self._marker:
+                self._marker = marker
+                self._last_advance = now
+            if self.progress_callback:
+                self.progress_callback(dict(block))
+            if self.log_callback and now - self._last_log >= LOG_INTERVAL:
+                self._last_log = now
+                self.log_callback(f"FFmpeg [{self.stage}]: {format_progress(block)}")
+            block = {}
+
+    def _read_stderr(self):
+        for raw in iter(self.process.stderr.readline, b''):
+            line = raw.decode('utf-8', errors='replace').rstrip()
+            if line:
+                self.stderr_tail.append(line)
+
+    def _kill(self, reason: str, message: str):
+        self.reason = reason
+        if self.log_callback:
+            self.log_callback(f"⚠️ Watchdog FFmpeg [{self.stage}]: {message}, proses dihentikan "
+                              f"(progress terakhir: {format_progress(self.progress)})")
+        self.process.kill()
+
+    def _watchdog(self):
+        while not self._done.wait(1.0):
+            if self.process.poll() is not None:
+                return
+            now = time.monotonic()
+            if self.budget and now - self.started > self.budget:
+                self._kill(REASON_BUDGET, f"melebihi batas waktu tahap {self.budget:.0f} detik")
+                return
+            if self.stall_timeout and now - self._last_advance > self.stall_timeout:
+                self._kill(REASON_STALL, f"tidak ada progress selama {self.stall_timeout:.0f} detik")
+                return
+
+    def wait(self) -> FFmpegResult:
+        returncode = self.process.wait()
+        self._done.set()
+        for thread in self._threads[:2]:
+            thread.join(timeout=5)
+        tracing.end(self.trace, reason=self.reason, frames=self.progress.get('frame'),
+                    **tracing.process_args(self.process))
+        return FFmpegResult(
+            ok=returncode == 0 and self.reason is None,
+            returncode=returncode,
+            reason=self.reason,
+            progress=dict(self.progress),
+            stderr_tail=list(self.stderr_tail),
+            elapsed=time.monotonic() - self.started,
+        )
+
+
+def start_ffmpeg(command: list, stage: str = None, log_callback=print, progress_callback=None, stdin=None):
+    """Menjalankan FFmpeg di background dengan progress dan watchdog.
+
+    Returns:
+        tuple: (process, FFmpegMonitor)
+    """
+    process = tracing.popen_class()(with_progress(command), stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    monitor = FFmpegMonitor(process, stage, log_callback, stall_timeout=_settings['stall_timeout'],
+                            budget=stage_budget(stage), progress_callback=progress_callback)
+    return process, monitor
+
+
+def run_ffmpeg(command: list, stage: str = None, log_callback=print, progress_callback=None) -> FFmpegResult:
+    """Menjalankan FFmpeg sampai selesai atau dihentikan watchdog.
+
+    Raises:
+        FileNotFoundError: Jika FFmpeg tidak ditemukan
+    """
+    _, monitor = start_ffmpeg(command, stage, log_callback, progress_callback)
+    return monitor.wait()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python
+"""Pustaka gambar hasil generate yang dapat dicari berdasarkan prompt.
+
+Setiap gambar hasil ImageFX disalin ke folder pustaka (dialamatkan dengan
+hash isi) dan diindeks berdasarkan teks prompt-nya. Pencarian memakai
+kemiripan kosinus TF-IDF atas token prompt, dengan indeks terbalik sehingga
+hanya entri yang berbagi token yang dibandingkan. Perceptual hash (DCT 8x8
+dari gambar 32x32 grayscale) dipakai untuk dedupe visual: gambar yang
+hampir identik dengan gambar yang sudah ada tidak disimpan ulang, hanya
+prompt-nya yang ditambahkan sebagai alias.
+
+Cari di pustaka:
+    python image_library.py search "men's fall layering outfit" [path_library]
+    python image_library.py stats [path_library]
+"""
+import os
+import re
+import sys
+import json
+import math
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+import subprocess
+
+import numpy as np
+
+import tracing
+from image_prep import sniff_image_format
+
+DEFAULT_LIBRARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'library')
+DEFAULT_REUSE_THRESHOLD = 0.75
+# Jarak Hamming maksimum antar perceptual hash untuk dianggap gambar yang sama
+PHASH_DISTANCE = 6
+HASH_SIZE = 8
+PHASH_SAMPLE = 32
+
+_STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'of', 'in', 'on', 'at', 'to', 'for', 'with', 'by', 'from', 'is', 'are',
+    'his', 'her', 'its', 'their', 'this', 'that', 'as', 'into', 'very', 's',
+}
+
+
+def tokenize(text: str) -> list:
+    """Token prompt: huruf kecil, tanpa stopword, bentuk jamak sederhana dipangkas."""
+    tokens = []
+    for word in re.findall(r'[a-z0-9]+', text.lower().replace("'s", '')):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def _dct_matrix(size: int):
+    n = np.arange(size)
+    matrix = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * size))
+    matrix[0] *= 1 / math.sqrt(2)
+    return matrix * math.sqrt(2 / size)
+
+
+_DCT = _dct_matrix(PHASH_SAMPLE)
+
+
+def perceptual_hash(path: str, timeout: float = 60) -> str:
+    """Perceptual hash 64-bit (hex) dari gambar.
+
+    Gambar diperkecil menjadi 32x32 grayscale, lalu koefisien DCT 8x8
+    frekuensi rendah dibandingkan dengan mediannya.
+    """
+    command = [
+        'ffmpeg', '-v', 'error', '-i', path,
+        '-vf', f'scale={PHASH_SAMPLE}:{PHASH_SAMPLE}:flags=area,format=gray',
+        '-frames:v', '1', '-f', 'rawvideo', '-pix_fmt', 'gray', 'pipe:1'
+    ]
+    result = tracing.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+    if result.returncode != 0 or len(result.stdout) != PHASH_SAMPLE * PHASH_SAMPLE:
+        stderr = result.stderr.decode('utf-8', errors='replace').strip()[-300:]
+        raise RuntimeError(f"Gagal decode {os.path.basename(path)}: {stderr or 'ukuran frame tidak sesuai'}")
+    pixels = np.frombuffer(result.stdout, dtype=np.uint8).reshape(PHASH_SAMPLE, PHASH_SAMPLE).astype(np.float32)
+    low = (_DCT @ pixels @ _DCT.T)[:HASH_SIZE, :HASH_SIZE].flatten()
+    # Koefisien DC tidak ikut menentukan median (hanya mencerminkan kecerahan rata-rata)
+    bits = low > np.median(low[1:])
+    return f"{int(''.join('1' if b else '0' for b in bits), 2):016x}"
+
+
+def hamming_distance(hash_a: str, hash_b: str) -> int:
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count('1')
+
+
+def _file_sha1(path: str) -> str:
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class ImageLibrary:
+    """Pustaka gambar persisten dengan indeks prompt TF-IDF dan dedupe perceptual hash (SQLite + WAL)."""
+
+    def __init__(self, library_dir: str):
+        self.library_dir = library_dir
+        os.makedirs(library_dir, exist_ok=True)
+        self.db_path = os.path.join(library_dir, 'library.db')
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                prompt TEXT NOT NULL,
+                tokens TEXT NOT NULL,
+                path TEXT NOT NULL,
+                phash TEXT,
+                created_at REAL,
+                uses INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        # Indeks di memori: token per entri, frekuensi dokumen, dan indeks terbalik
+        self._entries = {}
+        self._doc_freq = {}
+        self._postings = {}
+        self._phashes = {}
+        self._loaded_id = 0
+        self._refresh()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _index(self, entry_id: int, prompt: str, tokens: list, path: str, phash: str):
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        self._entries[entry_id] = {'prompt': prompt, 'path': path, 'counts': counts}
+        for token in counts:
+            self._doc_freq[token] = self._doc_freq.get(token, 0) + 1
+            self._postings.setdefault(token, set()).add(entry_id)
+        if phash:
+            self._phashes.setdefault(phash, path)
+        self._loaded_id = max(self._loaded_id, entry_id)
+
+    def _refresh(self):
+        """Memuat entri baru yang ditambahkan proses lain (mis. worker render farm)."""
+        rows = self._conn.execute(
+            'SELECT id, prompt, tokens, path, phash FROM entries WHERE id > ? ORDER BY id', (self._loaded_id,)
+        ).fetchall()
+        for entry_id, prompt, tokens, path, phash in rows:
+            self._index(entry_id, prompt, json.loads(tokens), path, phash)
+
+    def _weights(self, counts: dict) -> dict:
+        total = len(self._entries)
+        return {
+            token: (1 + math.log(count)) * (math.log((total + 1) / (self._doc_freq.get(token, 0) + 1)) + 1)
+            for token, count in counts.items()
+        }
+
+    def search(self, prompt: str, limit: int = 5, exclude_paths: set = None) -> list:
+        """Mencari entri dengan prompt paling mirip (kosinus TF-IDF).
+
+        Returns:
+            list: {'id', 'prompt', 'path', 'similarity'} urut dari yang paling mirip
+        """
+        counts = {}
+        for token in tokenize(prompt):
+            counts[token] = counts.get(token, 0) + 1
+        if not counts:
+            return []
+        with self._lock:
+            self._refresh()
+            query = self._weights(counts)
+            query_norm = math.sqrt(sum(w * w for w in query.values()))
+            candidates = set()
+            for token in counts:
+                candidates.update(self._postings.get(token, ()))
+            results = []
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                if exclude_paths and entry['path'] in exclude_paths:
+                    continue
+                weights = self._weights(entry['counts'])
+                norm = math.sqrt(sum(w * w for w in weights.values()))
+                dot = sum(w * weights.get(token, 0) for token, w in query.items())
+                if norm and query_norm:
+                    results.append({'id': entry_id, 'prompt': entry['prompt'], 'path': entry['path'],
+                                    'similarity': dot / (norm * query_norm)})
+        results.sort(key=lambda r: (-r['similarity'], r['id']))
+        return results[:limit]
+
+    def lookup(self, prompt: str, threshold: float = DEFAULT_REUSE_THRESHOLD, exclude_paths: set = None):
+        """Entri paling mirip dengan kemiripan >= threshold yang filenya masih ada, atau None."""
+        for match in self.search(prompt, limit=10, exclude_paths=exclude_paths):
+            if match['similarity'] < threshold:
+                return None
+            if os.path.exists(match['path']):
+                with self._lock:
+                    self._conn.execute('UPDATE entries SET uses = uses + 1 WHERE id = ?', (match['id'],))
+                return match
+        return None
+
+    def add(self, prompt: str, image_path: str):
+        """Menyalin gambar ke pustaka dan mengindeksnya dengan prompt-nya.
+
+        Gambar yang secara visual sama dengan gambar di pustaka (jarak perceptual
+        hash <= PHASH_DISTANCE) tidak disalin ulang; prompt dicatat sebagai alias
+        gambar yang sudah ada.
+
+        Returns:
+            tuple: (path gambar di pustaka, True jika gambar baru disimpan)
+        """
+        image_format = sniff_image_format(image_path)
+        if not image_format:
+            raise ValueError(f"Bukan file gambar yang valid: {image_path}")
+        phash = perceptual_hash(image_path)
+        with self._lock:
+            self._refresh()
+            existing = self._phashes.get(phash)
+            if not existing:
+                for known_hash, known_path in self._phashes.items():
+                    if hamming_distance(phash, known_hash) <= PHASH_DISTANCE:
+                        existing = known_path
+                        break
+            stored = bool(not existing or not os.path.exists(existing))
+            if stored:
+                digest = _file_sha1(image_path)
+                path = os.path.join(self.library_dir, digest[:2], f"{digest}.{'jpg' if image_format == 'jpeg' else image_format}")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if not os.path.exists(path):
+                    shutil.copy(image_path, f"{path}.part")
+                    os.replace(f"{path}.part", path)
+            else:
+                path = existing
+            tokens = tokenize(prompt)
+            cursor = self._conn.execute(
+                'INSERT INTO entries (prompt, tokens, path, phash, created_at) VALUES (?, ?, ?, ?, ?)',
+                (prompt, json.dumps(tokens), path, phash, time.time())
+            )
+            self._index(cursor.lastrowid, prompt, tokens, path, phash)
+        return path, stored
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refresh()
+            row = self._conn.execute('SELECT COUNT(*), COUNT(DISTINCT path), COALESCE(SUM(uses), 0) FROM entries').fetchone()
+        return {'prompts': row[0], 'images': row[1], 'reuses': row[2]}
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def get_library(library_dir: str) -> ImageLibrary:
+    """Mengembalikan pustaka bersama untuk folder `library_dir` (satu instance per proses)."""
+    key = os.path.abspath(library_dir)
+    with _registry_lock:
+        if key not in _registry:
+            _registry[key] = ImageLibrary(key)
+        return _registry[key]
+
+
+if __name__ == '__main__':
+    if len(sys.argv) >= 2 and sys.argv[1] == 'search' and len(sys.argv) in (3, 4):
+        library = ImageLibrary(sys.argv[3] if len(sys.argv) == 4 else DEFAULT_LIBRARY_DIR)
+        for match in library.search(sys.argv[2], limit=10):
+            print(f"{match['similarity']:.3f}  {match['path']}  {match['prompt']}")
+        sys.exit(0)
+    if len(sys.argv) in (2, 3) and sys.argv[1] == 'stats':
+        library = ImageLibrary(sys.argv[2] if len(sys.argv) == 3 else DEFAULT_LIBRARY_DIR)
+        print(json.dumps(library.stats(), indent=2))
+        sys.exit(0)
+    print("Penggunaan: python image_library.py search \"prompt\" [path_library] | stats [path_library]")
+    sys.exit(1)
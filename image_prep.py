@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""Tahap normalisasi gambar sebelum render.
+
+Setiap gambar hasil ImageFX divalidasi (signature file), didecode, lalu
+di-center-crop/resize satu kali ke ukuran kanvas video. Hasilnya disimpan
+sebagai PNG sehingga encode scene dimulai dari input berukuran kanvas dan
+gambar rusak ditolak sebelum encode apa pun dimulai.
+"""
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+# Ukuran kanvas video Shorts (portrait 9:16)
+CANVAS_WIDTH = 1080
+CANVAS_HEIGHT = 1920
+
+# Signature (magic bytes) format gambar yang didukung
+_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpeg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+]
+
+
+def sniff_image_format(path: str):
+    """Mengembalikan format gambar berdasarkan magic bytes, atau None jika bukan gambar.
+
+    Ekstensi file tidak dipercaya: ImageFX kadang menyimpan PNG dengan ekstensi .jpeg.
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(16)
+    except OSError:
+        return None
+    for signature, name in _SIGNATURES:
+        if header.startswith(signature):
+            return name
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def canvas_filter(width: int = CANVAS_WIDTH, height: int = CANVAS_HEIGHT) -> str:
+    """Filter FFmpeg untuk center-crop/resize ke ukuran kanvas."""
+    return f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height}"
+
+
+def normalized_path_for(src_path: str, output_dir: str) -> str:
+    # Sertakan nama folder induk: gambar dari subfolder prompt berbeda bisa bernama sama
+    parent = os.path.basename(os.path.dirname(os.path.abspath(src_path)))
+    name = os.path.splitext(os.path.basename(src_path))[0]
+    return os.path.join(output_dir, f"{parent}_{name}.png")
+
+
+def normalize_image(src_path: str, output_dir: str, width: int = CANVAS_WIDTH, height: int = CANVAS_HEIGHT, timeout: float = 60):
+    """Memvalidasi dan menormalisasi satu gambar ke ukuran kanvas.
+
+    Args:
+        src_path (str): Path gambar asli
+        output_dir (str): Direktori untuk menyimpan frame hasil normalisasi
+        width (int): Lebar kanvas
+        height (int): Tinggi kanvas
+        timeout (float): Batas waktu decode/encode dalam detik
+
+    Returns:
+        tuple: (path frame hasil normalisasi atau None, pesan error atau None)
+    """
+    image_format = sniff_image_format(src_path)
+    if not image_format:
+        return None, "bukan file gambar yang valid"
+
+    os.makedirs(output_dir, exist_ok=True)
+    dst_path = normalized_path_for(src_path, output_dir)
+
+    # Gunakan hasil sebelumnya jika masih lebih baru dari gambar asli
+    if os.path.exists(dst_path) and os.path.getsize(dst_path) > 0 and os.path.getmtime(dst_path) >= os.path.getmtime(src_path):
+        return dst_path, None
+
+    command = [
+        'ffmpeg', '-v', 'error', '-i', src_path,
+        '-vf', canvas_filter(width, height),
+        '-frames:v', '1', '-pix_fmt', 'rgb24', '-y', dst_path
+    ]
+    try:
+        result = tracing.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=timeout)
+    except FileNotFoundError:
+        return None, "FFmpeg tidak ditemukan"
+    except subprocess.TimeoutExpired:
+        return None, f"decode melebihi batas waktu {timeout} detik"
+
+    if result.returncode != 0 or not os.path.exists(dst_path) or os.path.getsize(dst_path) == 0:
+        if os.path.exists(dst_path):
+            os.remove(dst_path)
+        return None, f"gagal decode {image_format}: {result.stderr.strip()[-300:]}"
+    return dst_path, None
+
+
+def normalize_images(image_paths: list, output_dir: str, log_callback=print, workers: int = None, width: int = CANVAS_WIDTH, height: int = CANVAS_HEIGHT):
+    """Menormalisasi banyak gambar secara paralel.
+
+    Args:
+        image_paths (list): Daftar path gambar asli
+        output_dir (str): Direktori untuk frame hasil normalisasi
+        log_callback: Function untuk logging
+        workers (int): Jumlah worker paralel (default: jumlah CPU)
+
+    Returns:
+        dict: Pemetaan path gambar asli -> path frame hasil normalisasi (hanya gambar valid)
+    """
+    if not image_paths:
+        return {}
+    workers = max(1, min(workers or os.cpu_count() or 1, len(image_paths)))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda p: normalize_image(p, output_dir, width, height), image_paths))
+
+    normalized = {}
+    for src_path, (dst_path, error) in zip(image_paths, results):
+        if dst_path:
+            normalized[src_path] = dst_path
+        else:
+            log_callback(f"⚠️ Gambar ditolak: {os.path.basename(src_path)} ({error})")
+    log_callback(f"✅ {len(normalized)}/{len(image_paths)} gambar dinormalisasi ke {width}x{height} di: {output_dir}")
+    return normalized
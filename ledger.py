@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+"""Ledger job berbasis SQLite untuk melanjutkan batch yang terhenti.
+
+Setiap entri konten dicatat sebagai satu job dengan status per tahap
+(content, images, tts, render, upload) beserta path artefak dan video ID
+YouTube. Dengan `--resume`, cli.py melewati tahap yang sudah selesai dan
+melanjutkan dari tahap pertama yang belum selesai.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+# Urutan tahap pemrosesan satu entri
+STAGES = ['content', 'images', 'tts', 'render', 'upload']
+
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+def job_key_for(content: dict) -> str:
+    """Menghasilkan kunci job yang stabil dari isi konten."""
+    payload = json.dumps({
+        'title': content.get('title'),
+        'voiceover': content.get('voiceover'),
+        'image_prompts': content.get('image_prompts'),
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class JobLedger:
+    """Pencatat progres job per tahap yang aman terhadap crash (SQLite + WAL)."""
+
+    def __init__(self, db_path: str):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_key TEXT PRIMARY KEY,
+                title TEXT,
+                content TEXT NOT NULL,
+                source TEXT,
+                created_at REAL,
+                updated_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS stages (
+                job_key TEXT NOT NULL,
+                stage TEXT NOT NULL,
+                status TEXT NOT NULL,
+                artifacts TEXT,
+                error TEXT,
+                updated_at REAL,
+                PRIMARY KEY (job_key, stage)
+            );
+        ''')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def register_job(self, content: dict, source: str = None, fresh: bool = False) -> str:
+        """Mendaftarkan konten sebagai job dan menandai tahap 'content' selesai.
+
+        Args:
+            content (dict): Paket konten (title, voiceover, description, image_prompts, ...)
+            source (str): Asal konten, mis. path file JSON atau 'qwen'
+            fresh (bool): Jika True, progres tahap sebelumnya untuk job ini dihapus
+
+        Returns:
+            str: Kunci job
+        """
+        job_key = job_key_for(content)
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.execute(
+                'INSERT INTO jobs (job_key, title, content, source, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(job_key) DO UPDATE SET content=excluded.content, updated_at=excluded.updated_at',
+                (job_key, content.get('title'), json.dumps(content, ensure_ascii=False), source, now, now)
+            )
+            if fresh:
+                self._conn.execute('DELETE FROM stages WHERE job_key = ?', (job_key,))
+            self._conn.execute(
+                'INSERT OR REPLACE INTO stages (job_key, stage, status, artifacts, error, updated_at) '
+                'VALUES (?, ?, ?, ?, NULL, ?)',
+                (job_key, 'content', STATUS_DONE, None, now)
+            )
+            self._conn.execute('COMMIT')
+        return job_key
+
+    def mark_stage(self, job_key: str, stage: str, status: str, artifacts: dict = None, error: str = None):
+        """Mencatat status satu tahap job beserta artefaknya."""
+        if stage not in STAGES:
+            raise ValueError(f"Tahap tidak dikenal: {stage}")
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.execute(
+                'INSERT OR REPLACE INTO stages (job_key, stage, status, artifacts, error, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (job_key, stage, status, json.dumps(artifacts, ensure_ascii=False) if artifacts is not None else None, error, now)
+            )
+            self._conn.execute('UPDATE jobs SET updated_at = ? WHERE job_key = ?', (now, job_key))
+            self._conn.execute('COMMIT')
+
+    def get_stage(self, job_key: str, stage: str):
+        """Mengembalikan dict {'status', 'artifacts', 'error'} untuk satu tahap, atau None."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status, artifacts, error FROM stages WHERE job_key = ? AND stage = ?',
+                (job_key, stage)
+            ).fetchone()
+        if not row:
+            return None
+        return {
+            'status': row[0],
+            'artifacts': json.loads(row[1]) if row[1] else {},
+            'error': row[2],
+        }
+
+    def stage_artifacts(self, job_key: str, stage: str):
+        """Mengembalikan artefak tahap jika tahap sudah selesai, atau None."""
+        info = self.get_stage(job_key, stage)
+        if info and info['status'] == STATUS_DONE:
+            return info['artifacts']
+        return None
+
+    def is_stage_done(self, job_key: str, stage: str) -> bool:
+        return self.stage_artifacts(job_key, stage) is not None
+
+    def first_incomplete_stage(self, job_key: str, required_stages=None):
+        """Mengembalikan nama tahap pertama yang belum selesai, atau None jika semua selesai."""
+        for stage in required_stages or STAGES:
+            if not self.is_stage_done(job_key, stage):
+                return stage
+        return None
+
+    def is_job_complete(self, job_key: str, required_stages=None) -> bool:
+        return self.first_incomplete_stage(job_key, required_stages) is None
+
+    def incomplete_jobs(self, required_stages=None):
+        """Mengembalikan list (job_key, content) untuk job yang belum selesai, urut waktu dibuat."""
+        with self._lock:
+            rows = self._conn.execute('SELECT job_key, content FROM jobs ORDER BY created_at').fetchall()
+        return [
+            (job_key, json.loads(content))
+            for job_key, content in rows
+            if not self.is_job_complete(job_key, required_stages)
+        ]
+
+    def summary(self):
+        """Mengembalikan ringkasan jumlah tahap per status, mis. {'render': {'done': 3}}."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT stage, status, COUNT(*) FROM stages GROUP BY stage, status'
+            ).fetchall()
+        result = {}
+        for stage, status, count in rows:
+            result.setdefault(stage, {})[status] = count
+        return result
+
+
+def required_stages_for(upload_enabled: bool):
+    """Tahap yang harus selesai agar sebuah job dianggap tuntas."""
+    return STAGES if upload_enabled else [s for s in STAGES if s != 'upload']
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+"""Prediksi waktu render dan upload dari data run sebelumnya.
+
+Setiap render yang selesai dicatat bersama fiturnya (durasi video, jumlah
+scene, zoom atau tidak, jumlah segmen caption, engine, dan beban mesin saat
+render) di SQLite + WAL. Model regresi linear (NumPy least squares) dilatih
+dari riwayat ini untuk memperkirakan waktu render dan upload entri yang
+belum diproses, sebelum satu pun gambar digenerate. Selama riwayat belum
+cukup, atau untuk mode render (zoom/statis, engine) yang belum ada di
+riwayat, perkiraan memakai rasio detik render per detik video yang teramati
+(atau nilai default).
+
+Koefisien model dan galat rata-rata:
+    python predict.py stats [path_history_db]
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+
+import numpy as np
+
+from render_plan import CAPTION_START, segment_captions
+
+DEFAULT_HISTORY_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp', 'render_history.db')
+# Kecepatan bicara gTTS untuk memperkirakan durasi voiceover dari jumlah kata
+WORDS_PER_SECOND = 2.5
+# Rasio default (detik proses per detik video) sebelum ada riwayat
+DEFAULT_RENDER_RATE = {'zoom': 2.0, 'static': 0.3}
+DEFAULT_UPLOAD_SECONDS = 30.0
+DEFAULT_UPLOAD_RATE = 0.5
+# Jumlah run terbaru yang dipakai untuk melatih model
+FIT_WINDOW = 500
+
+RENDER_FEATURES = ['intercept', 'video_seconds', 'scenes', 'zoom_seconds', 'captions', 'load_seconds', 'numpy_seconds',
+                   'rendition_seconds']
+UPLOAD_FEATURES = ['intercept', 'video_seconds']
+
+
+def machine_load() -> float:
+    """Load average 1 menit per CPU (0 jika tidak tersedia, mis. di Windows)."""
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return 0.0
+
+
+def plan_features(plan: dict, load: float = None) -> dict:
+    """Fitur dari render plan yang sudah jadi."""
+    return {
+        'video_seconds': sum(scene['duration'] for scene in plan['scenes']) + plan.get('tail', 0),
+        'scenes': len(plan['scenes']),
+        'zoom': any(scene['zoom'] for scene in plan['scenes']),
+        'captions': len(plan['captions']),
+        'engine': plan['engine'],
+        'renditions': len(plan['renditions']),
+        'load': machine_load() if load is None else load,
+    }
+
+
+def content_features(content: dict, voiceover: bool, image_duration: float, no_zoom: bool, engine: str,
+                     renditions: int = 1, load: float = None) -> dict:
+    """Perkiraan fitur untuk paket konten yang belum dirender.
+
+    Durasi voiceover diperkirakan dari jumlah kata; dengan voiceover, durasi
+    video sama dengan durasi voiceover (scene judul + satu scene per gambar).
+    """
+    scenes = len(content.get('image_prompts', [])) + 1
+    captions = 0
+    if voiceover:
+        text = content.get('voiceover', '')
+        video_seconds = max(CAPTION_START + 1, len(text.split()) / WORDS_PER_SECOND)
+        captions = len(segment_captions(text, video_seconds))
+    else:
+        video_seconds = scenes * image_duration
+    return {
+        'video_seconds': video_seconds,
+        'scenes': scenes,
+        'zoom': not no_zoom,
+        'captions': captions,
+        'engine': engine,
+        'renditions': renditions,
+        'load': machine_load() if load is None else load,
+    }
+
+
+def _render_row(features: dict) -> list:
+    seconds = features['video_seconds']
+    return [
+        1.0,
+        seconds,
+        features['scenes'],
+        seconds if features['zoom'] else 0.0,
+        features['captions'],
+        features['load'] * seconds,
+        seconds if features['engine'] == 'numpy' else 0.0,
+        # Rendition tambahan mengulang encode akhir sepanjang video
+        max(0, features.get('renditions', 1) - 1) * seconds,
+    ]
+
+
+def _mode(features: dict) -> tuple:
+    """Mode render (zoom, engine); model hanya dipakai untuk mode yang ada di data latih."""
+    return bool(features['zoom']), features['engine']
+
+
+def _upload_row(features: dict) -> list:
+    return [1.0, features['video_seconds']]
+
+
+class RenderHistory:
+    """Riwayat durasi render dan upload per video (SQLite + WAL)."""
+
+    def __init__(self, db_path: str):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_key TEXT,
+                features TEXT NOT NULL,
+                render_seconds REAL NOT NULL,
+                upload_seconds REAL,
+                recorded_at REAL
+            )
+        ''')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def record_render(self, job_key: str, features: dict, render_seconds: float):
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO runs (job_key, features, render_seconds, recorded_at) VALUES (?, ?, ?, ?)',
+                (job_key, json.dumps(features), render_seconds, time.time())
+            )
+
+    def record_upload(self, job_key: str, upload_seconds: float):
+        """Mencatat durasi upload pada render terbaru job ini."""
+        with self._lock:
+            self._conn.execute(
+                'UPDATE runs SET upload_seconds = ? WHERE id = (SELECT MAX(id) FROM runs WHERE job_key = ?)',
+                (upload_seconds, job_key)
+            )
+
+    def runs(self, limit: int = FIT_WINDOW) -> list:
+        """Run terbaru: list (features, render_seconds, upload_seconds)."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT features, render_seconds, upload_seconds FROM runs ORDER BY id DESC LIMIT ?', (limit,)
+            ).fetchall()
+        return [(json.loads(f), r, u) for f, r, u in rows]
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def get_history(db_path: str = DEFAULT_HISTORY_DB) -> RenderHistory:
+    """Mengembalikan riwayat bersama untuk `db_path` (satu instance per proses)."""
+    key = os.path.abspath(db_path)
+    with _registry_lock:
+        if key not in _registry:
+            _registry[key] = RenderHistory(key)
+        return _registry[key]
+
+
+def _fit(rows: list, targets: list):
+    """Least squares; None jika data belum cukup untuk jumlah fitur."""
+    if not rows or len(targets) < len(rows[0]) + 2:
+        return None
+    X = np.array(rows, dtype=np.float64)
+    y = np.array(targets, dtype=np.float64)
+    coef, _, _, _ = np.linalg.lstsq(X, y, rcond=None)
+    return coef
+
+
+class RenderPredictor:
+    """Model linear waktu render dan upload yang dilatih dari RenderHistory."""
+
+    def __init__(self, runs: list):
+        self.samples = len(runs)
+        self.render_coef = _fit([_render_row(f) for f, _, _ in runs], [r for _, r, _ in runs])
+        # Kolom zoom/numpy bernilai nol untuk mode yang tidak pernah dirender, jadi koefisiennya tidak bermakna
+        self.render_modes = {_mode(f) for f, _, _ in runs}
+        uploads = [(f, u) for f, _, u in runs if u is not None]
+        self.upload_samples = len(uploads)
+        self.upload_coef = _fit([_upload_row(f) for f, _ in uploads], [u for _, u in uploads])
+
+        # Fallback: rasio detik proses per detik video yang teramati
+        self.render_rate = dict(DEFAULT_RENDER_RATE)
+        for kind in ('zoom', 'static'):
+            matched = [(f['video_seconds'], r) for f, r, _ in runs if bool(f['zoom']) == (kind == 'zoom')]
+            total = sum(seconds for seconds, _ in matched)
+            if total > 0:
+                self.render_rate[kind] = sum(r for _, r in matched) / total
+        self.upload_rate = None
+        upload_total = sum(f['video_seconds'] for f, _ in uploads)
+        if upload_total > 0:
+            self.upload_rate = sum(u for _, u in uploads) / upload_total
+        self.min_render = min((r for _, r, _ in runs), default=1.0)
+
+    @classmethod
+    def from_history(cls, history: RenderHistory, limit: int = FIT_WINDOW):
+        return cls(history.runs(limit))
+
+    def predict(self, features: dict) -> dict:
+        """Perkiraan durasi dalam detik.
+
+        Returns:
+            dict: {'render', 'upload', 'total', 'source'} dengan source 'model' atau 'rate'
+        """
+        if self.render_coef is not None and _mode(features) in self.render_modes:
+            render = float(np.dot(self.render_coef, _render_row(features)))
+            source = 'model'
+        else:
+            render = features['video_seconds'] * self.render_rate['zoom' if features['zoom'] else 'static']
+            # Rendition tambahan hanya mengulang encode akhir; perkiraan kasar per rendition
+            render *= 1 + 0.3 * max(0, features.get('renditions', 1) - 1)
+            source = 'rate'
+        render = max(render, 0.5 * self.min_render, 1.0)
+
+        if self.upload_coef is not None:
+            upload = float(np.dot(self.upload_coef, _upload_row(features)))
+        elif self.upload_rate is not None:
+            upload = features['video_seconds'] * self.upload_rate
+        else:
+            upload = DEFAULT_UPLOAD_SECONDS + DEFAULT_UPLOAD_RATE * features['video_seconds']
+        upload = max(upload, 1.0)
+        return {'render': render, 'upload': upload, 'total': render + upload, 'source': source}
+
+    def errors(self, runs: list) -> dict:
+        """Galat absolut rata-rata (detik) prediksi render dan upload terhadap `runs`."""
+        render_errors = [abs(self.predict(f)['render'] - r) for f, r, _ in runs]
+        upload_errors = [abs(self.predict(f)['upload'] - u) for f, _, u in runs if u is not None]
+        return {
+            'render_mae': sum(render_errors) / len(render_errors) if render_errors else None,
+            'upload_mae': sum(upload_errors) / len(upload_errors) if upload_errors else None,
+        }
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3) or sys.argv[1] != 'stats':
+        print("Penggunaan: python predict.py stats [path_history_db]")
+        sys.exit(1)
+    history = RenderHistory(sys.argv[2] if len(sys.argv) == 3 else DEFAULT_HISTORY_DB)
+    runs = history.runs()
+    predictor = RenderPredictor(runs)
+    print(json.dumps({
+        'samples': predictor.samples,
+        'upload_samples': predictor.upload_samples,
+        'render_model': dict(zip(RENDER_FEATURES, predictor.render_coef.round(4).tolist())) if predictor.render_coef is not None else None,
+        'upload_model': dict(zip(UPLOAD_FEATURES, predictor.upload_coef.round(4).tolist())) if predictor.upload_coef is not None else None,
+        'render_modes': sorted(f"{'zoom' if zoom else 'static'}/{engine}" for zoom, engine in predictor.render_modes),
+        'render_rate': predictor.render_rate,
+        'errors': predictor.errors(runs),
+    }, indent=2))
+    sys.exit(0)
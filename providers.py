@@ -0,0 +1,486 @@
+#!/usr/bin/env python
+"""Provider layanan eksternal (gambar, konten, suara, upload) dan fake lokalnya.
+
+Setiap layanan eksternal diakses lewat provider dengan antarmuka kecil:
+
+    image    ImageFX        generate(prompt, output_dir, count, timeout)
+    content  Qwen           complete(prompt_content) -> teks respons
+    speech   Google TTS     synthesize(text, output_path)
+    upload   YouTube        authenticate(client_secret_path, token_path) -> service
+                            insert(service, video_path, body) -> request dengan next_chunk()
+                            insert_stream(service, source, body) -> idem, dari GrowingFile
+
+Fake provider berjalan di dalam proses tanpa jaringan, dengan latensi, tingkat
+kegagalan, dan output yang dapat diatur. Semua keputusan acak fake diambil
+dari RNG ber-seed per (provider, kunci request, percobaan), sehingga run
+dengan seed yang sama menghasilkan urutan sukses/gagal dan output yang sama.
+Kegagalan fake dilempar sebagai ThrottledError / RetriableError agar rate
+limiter dan retry pipeline ikut teruji. Fake gambar memakai gambar bawaan di
+folder `images/`. Fake upload dengan opsi `server` mengupload lewat HTTP ke
+server upload resumable lokal (lihat stream_upload.py).
+
+Contoh konfigurasi fake (JSON):
+
+    {"image": {"latency": 0.5, "failure_rate": 0.1}, "upload": {"latency": 0}}
+"""
+import os
+import json
+import time
+import wave
+import random
+import shutil
+import hashlib
+import threading
+import subprocess
+
+import tracing
+from ratelimit import ThrottledError, RetriableError, is_throttle_message
+from stream_upload import GrowingFile, ResumableHttpRequest, UploadStatus
+
+# YouTube API imports (will be installed via requirements)
+try:
+    from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
+    from googleapiclient.http import MediaFileUpload, MediaUpload
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+    YOUTUBE_API_AVAILABLE = True
+except ImportError:
+    HttpError = None
+    MediaUpload = object
+    YOUTUBE_API_AVAILABLE = False
+    print("Warning: YouTube API libraries not installed. Auto-upload feature will be disabled.")
+    print("Install with: pip install google-api-python-client google-auth-httplib2 google-auth-oauthlib")
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROVIDER_KINDS = ('image', 'content', 'speech', 'upload')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+YOUTUBE_SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
+
+# Konfigurasi default fake per provider
+DEFAULT_FAKE_CONFIG = {
+    'latency': 0.0,             # detik per request (per chunk untuk upload)
+    'jitter': 0.0,              # variasi latensi acak, +/- detik
+    'failure_rate': 0.0,        # peluang error sementara (RetriableError)
+    'throttle_rate': 0.0,       # peluang throttling (ThrottledError)
+}
+
+FAKE_CONFIGS = {
+    'image': {'latency': 2.0, 'jitter': 1.0, 'failure_rate': 0.05, 'throttle_rate': 0.02,
+              'image_dir': os.path.join(SCRIPT_DIR, 'images')},
+    'content': {'latency': 1.0, 'jitter': 0.5, 'failure_rate': 0.02, 'words': 120, 'scenes': 5},
+    'speech': {'latency': 0.5, 'jitter': 0.2, 'failure_rate': 0.02, 'words_per_second': 2.5, 'sample_rate': 16000},
+    'upload': {'latency': 0.2, 'jitter': 0.1, 'failure_rate': 0.02, 'throttle_rate': 0.01,
+               'chunk_size': 8 * 1024 * 1024, 'server': None},
+}
+
+_FAKE_WORDS = (
+    'ancient secret ocean mountain night forest city river shadow light storm memory '
+    'journey stranger village ghost tower signal island desert winter fire silence '
+    'machine garden letter bridge dream mirror voice clock road'
+).split()
+
+
+class ImageProvider:
+    """Menghasilkan gambar dari prompt ke sebuah folder."""
+    name = None
+
+    def generate(self, prompt: str, output_dir: str, count: int, timeout: float = None):
+        raise NotImplementedError
+
+
+class ContentProvider:
+    """Menghasilkan teks respons (berisi JSON konten) dari prompt."""
+    name = None
+
+    def complete(self, prompt_content: str) -> str:
+        raise NotImplementedError
+
+
+class SpeechProvider:
+    """Mengubah teks menjadi file audio."""
+    name = None
+    extension = '.mp3'
+
+    def synthesize(self, text: str, output_path: str, lang: str = 'en'):
+        raise NotImplementedError
+
+
+class UploadProvider:
+    """Autentikasi dan upload video (API mengikuti googleapiclient)."""
+    name = None
+
+    def authenticate(self, client_secret_path: str, token_path: str = None):
+        raise NotImplementedError
+
+    def insert(self, service, video_path: str, body: dict):
+        raise NotImplementedError
+
+    def insert_stream(self, service, source, body: dict):
+        raise NotImplementedError
+
+
+class ImageFXProvider(ImageProvider):
+    name = 'imagefx'
+
+    def generate(self, prompt: str, output_dir: str, count: int, timeout: float = None):
+        # Ambil Google cookie dari environment variable
+        google_cookie = os.environ.get("GOOGLE_COOKIE")
+        if not google_cookie:
+            raise RuntimeError("GOOGLE_COOKIE tidak ditemukan di environment variable atau file .env")
+
+        # Konfigurasi default dari environment variable atau gunakan nilai default
+        model = os.getenv("DEFAULT_MODEL", "IMAGEN_3_5")
+        size = os.getenv("DEFAULT_SIZE", "PORTRAIT")
+
+        cmd = [
+            "imagefx", "generate",
+            "--prompt", prompt,
+            "--cookie", google_cookie,
+            "--model", model,
+            "--size", size,
+            "--count", str(count),
+            "--dir", output_dir
+        ]
+        try:
+            result = tracing.run(cmd, stderr=subprocess.PIPE, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            # Tidak dicoba ulang oleh rate limiter: retry per prompt (--image-retries) yang
+            # membatasi jumlah percobaan. Argumen lengkap (berisi cookie) tidak disertakan.
+            raise subprocess.TimeoutExpired(cmd[:2], timeout) from None
+        if result.returncode != 0:
+            stderr_tail = (result.stderr or '').strip()[-500:]
+            if is_throttle_message(stderr_tail):
+                raise ThrottledError(f"imagefx throttled: {stderr_tail}")
+            # Jangan sertakan argumen lengkap (berisi cookie) di pesan error
+            raise subprocess.CalledProcessError(result.returncode, cmd[:2], stderr=stderr_tail)
+
+
+class QwenProvider(ContentProvider):
+    name = 'qwen'
+
+    def complete(self, prompt_content: str) -> str:
+        from openai import OpenAI
+
+        api_key = os.getenv("DASHSCOPE_API_KEY")
+        if not api_key:
+            raise RuntimeError("DASHSCOPE_API_KEY tidak ditemukan di environment variable")
+        client = OpenAI(
+            api_key=api_key,
+            base_url="https://dashscope-intl.aliyuncs.com/compatible-mode/v1",
+            max_retries=0  # Retry ditangani oleh rate limiter bersama
+        )
+        completion = client.chat.completions.create(
+            model="qwen-plus-latest",
+            messages=[
+                {"role": "user", "content": prompt_content}
+            ],
+            temperature=0.7,  # Sedikit kreativitas untuk variasi konten
+            max_tokens=1000   # Batasi panjang respons
+        )
+        return completion.choices[0].message.content
+
+
+class GTTSProvider(SpeechProvider):
+    name = 'gtts'
+    extension = '.mp3'
+
+    def synthesize(self, text: str, output_path: str, lang: str = 'en'):
+        from gtts import gTTS
+
+        gTTS(text, lang=lang).save(output_path)
+
+
+class StreamMediaUpload(MediaUpload):
+    """Media upload resumable googleapiclient dari GrowingFile.
+
+    Selama ukuran total belum diketahui (size() None), googleapiclient
+    mengirim chunk dengan ukuran total `*`; chunk pendek menandai akhir file.
+    """
+
+    def __init__(self, source, mimetype: str = 'video/mp4'):
+        self._source = source
+        self._mimetype = mimetype
+
+    def chunksize(self):
+        return self._source.chunk_size
+
+    def mimetype(self):
+        return self._mimetype
+
+    def size(self):
+        return self._source.size()
+
+    def resumable(self):
+        return True
+
+    def getbytes(self, begin, length):
+        return self._source.read(begin, length)
+
+    def has_stream(self):
+        return False
+
+
+class YouTubeProvider(UploadProvider):
+    name = 'youtube'
+
+    def authenticate(self, client_secret_path: str, token_path: str = None):
+        if not YOUTUBE_API_AVAILABLE:
+            raise ImportError("YouTube API libraries not installed")
+
+        creds = None
+
+        # Load existing token if provided
+        if token_path and os.path.exists(token_path):
+            try:
+                creds = Credentials.from_authorized_user_file(token_path, YOUTUBE_SCOPES)
+            except Exception as e:
+                print(f"Error loading token: {e}")
+
+        # If there are no (valid) credentials available, let the user log in
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                try:
+                    creds.refresh(Request())
+                except Exception as e:
+                    print(f"Error refreshing token: {e}")
+                    creds = None
+
+            if not creds:
+                if not os.path.exists(client_secret_path):
+                    raise FileNotFoundError(f"Client secret file not found: {client_secret_path}")
+
+                flow = InstalledAppFlow.from_client_secrets_file(client_secret_path, YOUTUBE_SCOPES)
+                creds = flow.run_local_server(port=0)
+
+            # Save the credentials for the next run
+            if token_path:
+                try:
+                    with open(token_path, 'w') as token:
+                        token.write(creds.to_json())
+                    print(f"Token berhasil disimpan di: {token_path}")
+                except Exception as e:
+                    print(f"Error menyimpan token: {e}")
+
+        return build('youtube', 'v3', credentials=creds)
+
+    def insert(self, service, video_path: str, body: dict):
+        media = MediaFileUpload(video_path, chunksize=-1, resumable=True, mimetype='video/mp4')
+        return service.videos().insert(part=','.join(body.keys()), body=body, media_body=media)
+
+    def insert_stream(self, service, source, body: dict):
+        media = StreamMediaUpload(source)
+        return service.videos().insert(part=','.join(body.keys()), body=body, media_body=media)
+
+
+class FakeProvider:
+    """Dasar fake: latensi dan kegagalan deterministik per (kunci request, percobaan)."""
+    name = 'fake'
+
+    def __init__(self, kind: str, seed: int = 0, **config):
+        self.kind = kind
+        self.seed = seed
+        self.config = dict(DEFAULT_FAKE_CONFIG, **config)
+        self._attempts = {}
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def _next_call(self) -> int:
+        with self._lock:
+            self._calls += 1
+            return self._calls
+
+    def _rng(self, key: str) -> random.Random:
+        """RNG untuk satu percobaan request `key`; percobaan ulang mendapat RNG berikutnya."""
+        with self._lock:
+            attempt = self._attempts.get(key, 0)
+            self._attempts[key] = attempt + 1
+        return random.Random(f"{self.seed}:{self.kind}:{key}:{attempt}")
+
+    def _simulate(self, key: str) -> random.Random:
+        """Menunggu selama latensi simulasi lalu melempar error sesuai tingkat kegagalan."""
+        rng = self._rng(key)
+        delay = self.config['latency'] + rng.uniform(-1, 1) * self.config['jitter']
+        if delay > 0:
+            time.sleep(delay)
+        roll = rng.random()
+        if roll < self.config['throttle_rate']:
+            raise ThrottledError(f"fake {self.kind}: 429 too many requests")
+        if roll < self.config['throttle_rate'] + self.config['failure_rate']:
+            raise RetriableError(f"fake {self.kind}: 503 service unavailable")
+        return rng
+
+
+def _key_for(*parts) -> str:
+    return hashlib.sha1('\x00'.join(str(p) for p in parts).encode('utf-8')).hexdigest()[:16]
+
+
+class FakeImageProvider(FakeProvider, ImageProvider):
+    """Menyalin gambar bawaan (folder `images/`) yang dipilih deterministik dari prompt."""
+
+    def __init__(self, kind: str, seed: int = 0, **config):
+        super().__init__(kind, seed, **config)
+        image_dir = self.config['image_dir']
+        self.images = sorted(
+            os.path.join(root, f)
+            for root, _, files in os.walk(image_dir)
+            for f in files if f.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not self.images:
+            raise FileNotFoundError(f"Tidak ada gambar untuk fake image provider di {image_dir}")
+
+    def generate(self, prompt: str, output_dir: str, count: int, timeout: float = None):
+        rng = self._simulate(_key_for(prompt))
+        os.makedirs(output_dir, exist_ok=True)
+        for i, src in enumerate(rng.sample(self.images, min(count, len(self.images)))):
+            shutil.copy(src, os.path.join(output_dir, f"fake_{i+1}{os.path.splitext(src)[1].lower()}"))
+
+
+def fake_content(rng: random.Random, index: int, words: int = 120, scenes: int = 5) -> dict:
+    """Paket konten sintetis (title, voiceover, description, image_prompts, tags)."""
+    voiceover = [rng.choice(_FAKE_WORDS) for _ in range(words)]
+    title_words = [rng.choice(_FAKE_WORDS) for _ in range(4)]
+    return {
+        'title': f"The {' '.join(title_words).title()} #{index}",
+        'voiceover': ' '.join(voiceover).capitalize() + '.',
+        'description': f"Fake story {index} for offline load testing.",
+        'image_prompts': [
+            f"{rng.choice(_FAKE_WORDS)} {rng.choice(_FAKE_WORDS)} at {rng.choice(_FAKE_WORDS)}, scene {i+1} of story {index}"
+            for i in range(scenes)
+        ],
+        'tags': sorted(set(title_words)),
+    }
+
+
+class FakeContentProvider(FakeProvider, ContentProvider):
+    """Menghasilkan paket konten JSON acak yang deterministik per panggilan."""
+
+    def complete(self, prompt_content: str) -> str:
+        call = self._next_call()
+        rng = self._simulate(_key_for(prompt_content, call))
+        content = fake_content(rng, call, words=self.config['words'], scenes=self.config['scenes'])
+        # Seperti respons LLM: JSON di dalam teks
+        return f"Here is the content:\n{json.dumps(content, ensure_ascii=False)}\n"
+
+
+class FakeSpeechProvider(FakeProvider, SpeechProvider):
+    """Menulis WAV hening dengan durasi sesuai jumlah kata (tanpa jaringan maupun encoder)."""
+    extension = '.wav'
+
+    def synthesize(self, text: str, output_path: str, lang: str = 'en'):
+        # Bahasa default memakai kunci lama agar baseline benchmark tetap sebanding
+        self._simulate(_key_for(text) if lang == 'en' else _key_for(text, lang))
+        sample_rate = int(self.config['sample_rate'])
+        duration = max(1.0, len(text.split()) / self.config['words_per_second'])
+        with wave.open(output_path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(sample_rate)
+            f.writeframes(b'\x00\x00' * int(duration * sample_rate))
+
+
+class _FakeInsertRequest:
+    """Meniru request upload resumable: setiap next_chunk() membaca satu chunk file."""
+
+    def __init__(self, provider, source, body: dict):
+        self.provider = provider
+        self.source = source
+        self.body = body
+        self.resumable_progress = 0
+
+    def next_chunk(self):
+        rng = self.provider._simulate(_key_for(self.source.path, self.resumable_progress))
+        self.resumable_progress += len(self.source.read(self.resumable_progress))
+        size = self.source.size()
+        if size is None or self.resumable_progress < size:
+            return UploadStatus(self.resumable_progress, size), None
+        return None, {'id': f"fake-{rng.getrandbits(40):010x}", 'snippet': self.body.get('snippet', {}),
+                      'status': self.body.get('status', {})}
+
+
+class FakeUploadProvider(FakeProvider, UploadProvider):
+    """Upload tiruan yang membaca file per chunk dan mengembalikan video ID palsu.
+
+    Dengan opsi `server`, chunk dikirim lewat protokol upload resumable ke
+    server HTTP lokal (python stream_upload.py serve).
+    """
+
+    def authenticate(self, client_secret_path: str, token_path: str = None):
+        return self
+
+    def insert(self, service, video_path: str, body: dict):
+        return self.insert_stream(service, GrowingFile.completed(video_path, int(self.config['chunk_size'])), body)
+
+    def insert_stream(self, service, source, body: dict):
+        if self.config.get('server'):
+            return ResumableHttpRequest(self.config['server'], source, body)
+        return _FakeInsertRequest(self, source, body)
+
+
+REAL_PROVIDERS = {
+    'image': ImageFXProvider,
+    'content': QwenProvider,
+    'speech': GTTSProvider,
+    'upload': YouTubeProvider,
+}
+
+FAKE_PROVIDERS = {
+    'image': FakeImageProvider,
+    'content': FakeContentProvider,
+    'speech': FakeSpeechProvider,
+    'upload': FakeUploadProvider,
+}
+
+_settings = {
+    'fake': set(),
+    'seed': 0,
+}
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def parse_kinds(spec: str) -> set:
+    """Parse daftar provider "image,speech" atau "all"."""
+    kinds = {k.strip() for k in (spec or '').split(',') if k.strip()}
+    if 'all' in kinds:
+        return set(PROVIDER_KINDS)
+    unknown = kinds - set(PROVIDER_KINDS)
+    if unknown:
+        raise ValueError(f"Provider tidak dikenal: {', '.join(sorted(unknown))} (pilihan: {', '.join(PROVIDER_KINDS)}, all)")
+    return kinds
+
+
+def configure(fake: set = None, overrides: dict = None, seed: int = None):
+    """Memilih provider fake dan mengatur konfigurasinya, mis. dari argumen CLI."""
+    with _registry_lock:
+        if fake is not None:
+            _settings['fake'] = set(fake)
+        if seed is not None:
+            _settings['seed'] = seed
+        for kind, config in (overrides or {}).items():
+            if kind not in PROVIDER_KINDS:
+                raise ValueError(f"Provider tidak dikenal: {kind}")
+            FAKE_CONFIGS[kind] = dict(FAKE_CONFIGS.get(kind, {}), **config)
+        _registry.clear()
+
+
+def load_config_file(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        configure(overrides=json.load(f))
+
+
+def is_fake(kind: str) -> bool:
+    return kind in _settings['fake']
+
+
+def get_provider(kind: str):
+    """Mengembalikan provider bersama untuk layanan `kind` (real atau fake)."""
+    with _registry_lock:
+        if kind not in _registry:
+            if kind in _settings['fake']:
+                _registry[kind] = FAKE_PROVIDERS[kind](kind, seed=_settings['seed'], **FAKE_CONFIGS.get(kind, {}))
+            else:
+                _registry[kind] = REAL_PROVIDERS[kind]()
+        return _registry[kind]
@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+"""Lapisan rate limiting bersama untuk API eksternal.
+
+Setiap provider (qwen, imagefx, gtts, youtube) memiliki token bucket untuk
+membatasi laju request dan batas konkurensi AIMD: batas naik perlahan
+(additive increase) setiap kali request berhasil, dan turun drastis
+(multiplicative decrease) saat terkena throttling (429 / quota). Request yang
+terkena throttling atau error sementara dicoba ulang dengan backoff.
+Counter setiap provider dapat dibaca lewat `snapshot()` untuk tuning.
+"""
+import re
+import json
+import time
+import random
+import threading
+
+import tracing
+
+# Konfigurasi default per provider
+DEFAULT_PROVIDER_CONFIG = {
+    'rate': 1.0,                # token per detik
+    'burst': 3,                 # kapasitas bucket
+    'initial_concurrency': 2,
+    'min_concurrency': 1,
+    'max_concurrency': 4,
+    'increase': 1.0,            # tambahan batas konkurensi per "satu putaran" request sukses
+    'decrease': 0.5,            # faktor pengali batas konkurensi saat throttling
+    'max_retries': 3,
+    'backoff_base': 2.0,        # detik
+    'backoff_max': 60.0,
+}
+
+PROVIDER_CONFIGS = {
+    'qwen': {'rate': 1.0, 'burst': 3, 'max_concurrency': 4},
+    'imagefx': {'rate': 0.2, 'burst': 2, 'initial_concurrency': 1, 'max_concurrency': 2},
+    'gtts': {'rate': 2.0, 'burst': 5, 'max_concurrency': 4},
+    'youtube': {'rate': 1.0, 'burst': 2, 'initial_concurrency': 1, 'max_concurrency': 2},
+}
+
+ERROR_THROTTLE = 'throttle'
+ERROR_RETRIABLE = 'retriable'
+ERROR_FATAL = 'fatal'
+
+_THROTTLE_PATTERN = re.compile(r'\b429\b|rate.?limit|too many requests|quota|resource.?exhausted', re.IGNORECASE)
+_RETRIABLE_STATUS = {500, 502, 503, 504}
+
+
+class ThrottledError(Exception):
+    """Dilempar oleh pemanggil ketika provider menolak karena rate limit / quota."""
+
+    def __init__(self, message: str = 'Throttled', retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RetriableError(Exception):
+    """Dilempar oleh pemanggil untuk error sementara yang aman dicoba ulang."""
+
+
+def is_throttle_message(text: str) -> bool:
+    """True jika teks error (mis. stderr subprocess) menandakan rate limit / quota."""
+    return bool(text and _THROTTLE_PATTERN.search(text))
+
+
+def _status_of(exc):
+    resp = getattr(exc, 'resp', None)
+    for candidate in (getattr(resp, 'status', None), getattr(exc, 'status_code', None), getattr(exc, 'status', None)):
+        try:
+            if candidate is not None:
+                return int(candidate)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def classify_error(exc) -> str:
+    """Mengklasifikasikan exception menjadi throttle, retriable, atau fatal."""
+    if isinstance(exc, ThrottledError):
+        return ERROR_THROTTLE
+    if isinstance(exc, (RetriableError, ConnectionError, TimeoutError)):
+        return ERROR_RETRIABLE
+    status = _status_of(exc)
+    if status == 429:
+        return ERROR_THROTTLE
+    if status in _RETRIABLE_STATUS:
+        return ERROR_RETRIABLE
+    if status == 403 and _THROTTLE_PATTERN.search(str(exc)):
+        return ERROR_THROTTLE
+    if type(exc).__name__ in ('RateLimitError',) or (status is None and _THROTTLE_PATTERN.search(str(exc))):
+        return ERROR_THROTTLE
+    if type(exc).__name__ in ('APIConnectionError', 'APITimeoutError'):
+        return ERROR_RETRIABLE
+    return ERROR_FATAL
+
+
+class TokenBucket:
+    """Token bucket thread-safe: `rate` token per detik dengan kapasitas `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = float(rate)
+        self.capacity = float(max(1, burst))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Mengambil satu token, menunggu bila perlu. Mengembalikan lama menunggu (detik)."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate if self.rate > 0 else 1.0
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float):
+        """Mengosongkan bucket sehingga request berikutnya menunggu minimal `seconds` detik."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class ProviderLimiter:
+    """Gabungan token bucket, konkurensi AIMD, dan kebijakan retry untuk satu provider."""
+
+    def __init__(self, name: str, **config):
+        self.name = name
+        self.config = dict(DEFAULT_PROVIDER_CONFIG, **config)
+        self.bucket = TokenBucket(self.config['rate'], self.config['burst'])
+        self.limit = float(self.config['initial_concurrency'])
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        self.counters = {
+            'calls': 0,
+            'successes': 0,
+            'throttled': 0,
+            'retriable_errors': 0,
+            'fatal_errors': 0,
+            'retries': 0,
+            'wait_seconds': 0.0,
+            'busy_seconds': 0.0,
+        }
+
+    def acquire(self):
+        """Menunggu token dan slot konkurensi."""
+        waited = self.bucket.acquire()
+        start = time.monotonic()
+        with self._cond:
+            while self.in_flight >= max(1, int(self.limit)):
+                self._cond.wait()
+            self.in_flight += 1
+            self.counters['calls'] += 1
+            self.counters['wait_seconds'] += waited + (time.monotonic() - start)
+
+    def release(self, outcome: str, busy_seconds: float = 0.0):
+        """Melepas slot dan menyesuaikan batas konkurensi berdasarkan hasil request."""
+        with self._cond:
+            self.in_flight -= 1
+            self.counters['busy_seconds'] += busy_seconds
+            if outcome == 'success':
+                self.counters['successes'] += 1
+                # Additive increase: +increase per putaran penuh request sukses
+                self.limit = min(self.config['max_concurrency'], self.limit + self.config['increase'] / max(1.0, self.limit))
+            elif outcome == ERROR_THROTTLE:
+                self.counters['throttled'] += 1
+                # Multiplicative decrease
+                self.limit = max(self.config['min_concurrency'], self.limit * self.config['decrease'])
+            elif outcome == ERROR_RETRIABLE:
+                self.counters['retriable_errors'] += 1
+            else:
+                self.counters['fatal_errors'] += 1
+            self._cond.notify_all()
+
+    def _backoff(self, attempt: int, exc=None) -> float:
+        retry_after = getattr(exc, 'retry_after', None)
+        if retry_after:
+            return float(retry_after)
+        delay = min(self.config['backoff_max'], self.config['backoff_base'] * (2 ** attempt))
+        return delay * (0.5 + random.random() / 2)
+
+    def call(self, fn, *args, log_callback=None, **kwargs):
+        """Menjalankan `fn` di bawah rate limit dengan retry untuk throttling dan error sementara.
+
+        Exception terakhir dilempar ulang jika semua percobaan gagal atau error bersifat fatal.
+        """
+        max_retries = self.config['max_retries']
+        for attempt in range(max_retries + 1):
+            self.acquire()
+            start = time.monotonic()
+            attempt_span = tracing.start(self.name, 'provider', attempt=attempt + 1)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                kind = classify_error(e)
+                tracing.end(attempt_span, outcome=kind, error=str(e)[:200])
+                self.release(kind, time.monotonic() - start)
+                if kind == ERROR_FATAL or attempt >= max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                if kind == ERROR_THROTTLE:
+                    # Tahan semua request provider ini, bukan hanya percobaan ulang ini
+                    self.bucket.pause(delay)
+                with self._cond:
+                    self.counters['retries'] += 1
+                if log_callback:
+                    log_callback(f"[{self.name}] {kind} ({e}); mencoba ulang dalam {delay:.1f} detik "
+                                 f"({attempt + 1}/{max_retries}), batas konkurensi {self.limit:.2f}")
+                time.sleep(delay)
+                continue
+            tracing.end(attempt_span, outcome='success')
+            self.release('success', time.monotonic() - start)
+            return result
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            data = dict(self.counters)
+            data['concurrency_limit'] = round(self.limit, 2)
+            data['in_flight'] = self.in_flight
+            data['rate'] = self.config['rate']
+        return data
+
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def configure(overrides: dict = None):
+    """Mengatur ulang konfigurasi provider, mis. dari file JSON {"imagefx": {"rate": 0.1}}."""
+    with _registry_lock:
+        for name, config in (overrides or {}).items():
+            PROVIDER_CONFIGS[name] = dict(PROVIDER_CONFIGS.get(name, {}), **config)
+            _registry.pop(name, None)
+
+
+def load_config_file(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        configure(json.load(f))
+
+
+def get_limiter(name: str) -> ProviderLimiter:
+    """Mengembalikan limiter bersama untuk provider `name`."""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = ProviderLimiter(name, **PROVIDER_CONFIGS.get(name, {}))
+        return _registry[name]
+
+
+def snapshot_all() -> dict:
+    with _registry_lock:
+        limiters = dict(_registry)
+    return {name: limiter.snapshot() for name, limiter in limiters.items()}
+
+
+def format_stats() -> str:
+    lines = []
+    for name, data in sorted(snapshot_all().items()):
+        lines.append(
+            f"  {name}: {data['successes']}/{data['calls']} sukses, {data['throttled']} throttled, "
+            f"{data['retries']} retry, tunggu {data['wait_seconds']:.1f}s, "
+            f"batas konkurensi {data['concurrency_limit']}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+"""Validasi video hasil render sebelum upload.
+
+Satu ffprobe membaca header container dan stream (tanpa decode) untuk
+memeriksa container, keberadaan stream video/audio, resolusi, durasi
+terhadap render plan, dan selisih durasi audio/video. Satu pass decode
+hanya membaca keyframe (`-skip_frame nokey`, setiap awal scene adalah
+keyframe) yang diperkecil ke 32x32 grayscale untuk mendeteksi frame
+hitam/kosong, mis. scene dari gambar dummy.
+
+Cek satu video:
+    python render_check.py output/video.mp4 [render_plan.json]
+"""
+import os
+import sys
+import json
+import subprocess
+
+import numpy as np
+
+import tracing
+
+# Nama format yang dilaporkan ffprobe untuk setiap container rendition
+CONTAINER_FORMATS = {
+    'mp4': {'mov', 'mp4'},
+    'mov': {'mov', 'mp4'},
+    'mkv': {'matroska', 'webm'},
+    'webm': {'matroska', 'webm'},
+}
+# Toleransi durasi terhadap plan: detik minimum dan fraksi durasi
+DURATION_TOLERANCE = 1.0
+DURATION_TOLERANCE_RATIO = 0.05
+# Selisih maksimum durasi stream audio dan video (detik), di luar delay voiceover
+AV_SYNC_TOLERANCE = 0.3
+# Frame dianggap hitam/kosong jika persentil 98 luma <= BLACK_LUMA
+BLACK_LUMA = 32
+SAMPLE_SIZE = 32
+MAX_SAMPLES = 60
+
+
+def _stream_duration(stream: dict, fallback: float) -> float:
+    try:
+        return float(stream.get('duration'))
+    except (TypeError, ValueError):
+        return fallback
+
+
+def probe_streams(path: str, timeout: float = 60) -> dict:
+    """Membaca info container dan stream dengan ffprobe (JSON).
+
+    Returns:
+        dict: Output `ffprobe -show_format -show_streams`
+
+    Raises:
+        RuntimeError: Jika ffprobe gagal membaca file
+    """
+    command = [
+        'ffprobe', '-v', 'error', '-show_format', '-show_streams', '-of', 'json', os.path.normpath(path)
+    ]
+    result = tracing.run(command, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip()[-300:] or 'ffprobe gagal')
+    return json.loads(result.stdout or '{}')
+
+
+def sample_keyframes(path: str, max_samples: int = MAX_SAMPLES, timeout: float = 120):
+    """Mendecode keyframe saja dan mengembalikan array luma (N, 32, 32) uint8."""
+    command = [
+        'ffmpeg', '-v', 'error', '-skip_frame', 'nokey', '-i', os.path.normpath(path),
+        '-vf', f'scale={SAMPLE_SIZE}:{SAMPLE_SIZE}:flags=area,format=gray', '-vsync', 'passthrough',
+        '-frames:v', str(max_samples), '-an', '-f', 'rawvideo', '-pix_fmt', 'gray', 'pipe:1'
+    ]
+    result = tracing.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+    if result.returncode != 0:
+        stderr = result.stderr.decode('utf-8', errors='replace').strip()[-300:]
+        raise RuntimeError(stderr or 'decode keyframe gagal')
+    frame_size = SAMPLE_SIZE * SAMPLE_SIZE
+    count = len(result.stdout) // frame_size
+    return np.frombuffer(result.stdout[:count * frame_size], dtype=np.uint8).reshape(count, SAMPLE_SIZE, SAMPLE_SIZE)
+
+
+def expectations_from_plan(plan: dict, rendition: dict = None) -> dict:
+    """Nilai yang diharapkan untuk satu rendition berdasarkan render plan.
+
+    Args:
+        plan (dict): Render plan dari build_render_plan
+        rendition (dict): Rendition yang diperiksa (default: rendition utama)
+
+    Returns:
+        dict: {'container', 'width', 'height', 'duration', 'audio', 'voice_delay'}
+    """
+    rendition = rendition or (plan['renditions'][0] if plan.get('renditions') else {})
+    audio = plan.get('audio', {})
+    return {
+        'container': rendition.get('container', 'mp4'),
+        'width': rendition.get('width', plan['canvas']['width']),
+        'height': rendition.get('height', plan['canvas']['height']),
+        'duration': sum(scene['duration'] for scene in plan['scenes']) + plan.get('tail', 0),
+        'audio': bool(audio.get('voice') or audio.get('music')),
+        'voice_delay': audio.get('voice_delay_ms', 0) / 1000 if audio.get('voice') else 0,
+    }
+
+
+def validate_video(path: str, container: str = 'mp4', width: int = None, height: int = None, duration: float = None,
+                   audio: bool = None, voice_delay: float = 0, max_black_frames: int = 0) -> dict:
+    """Memeriksa video hasil render sebelum upload.
+
+    Args:
+        path (str): Path video
+        container (str): Container yang diharapkan (mp4, mov, mkv, webm)
+        width (int): Lebar yang diharapkan (opsional)
+        height (int): Tinggi yang diharapkan (opsional)
+        duration (float): Durasi yang diharapkan dalam detik (opsional)
+        audio (bool): Apakah stream audio wajib ada (None = tidak diperiksa)
+        voice_delay (float): Delay voiceover dalam detik, ditoleransi pada cek durasi dan A/V
+        max_black_frames (int): Jumlah keyframe hitam/kosong yang masih diterima
+
+    Returns:
+        dict: {'ok', 'errors', 'info'}
+    """
+    errors = []
+    info = {}
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return {'ok': False, 'errors': ['file video tidak ada atau kosong'], 'info': info}
+
+    try:
+        probe = probe_streams(path)
+    except (RuntimeError, ValueError, subprocess.TimeoutExpired, OSError) as e:
+        return {'ok': False, 'errors': [f"container tidak terbaca: {e}"], 'info': info}
+
+    fmt = probe.get('format', {})
+    format_names = set((fmt.get('format_name') or '').split(','))
+    info['format'] = fmt.get('format_name')
+    if not format_names & CONTAINER_FORMATS.get(container, {container}):
+        errors.append(f"container {fmt.get('format_name')}, seharusnya {container}")
+    try:
+        container_duration = float(fmt.get('duration'))
+    except (TypeError, ValueError):
+        container_duration = 0.0
+    info['duration'] = container_duration
+
+    streams = probe.get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video'), None)
+    audio_stream = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+    if not video:
+        errors.append('stream video tidak ada')
+    else:
+        info['resolution'] = f"{video.get('width')}x{video.get('height')}"
+        info['video_duration'] = _stream_duration(video, container_duration)
+        if (width and video.get('width') != width) or (height and video.get('height') != height):
+            errors.append(f"resolusi {info['resolution']}, seharusnya {width}x{height}")
+    if audio and not audio_stream:
+        errors.append('stream audio tidak ada')
+    if audio_stream:
+        info['audio_duration'] = _stream_duration(audio_stream, container_duration)
+
+    if duration and container_duration:
+        tolerance = max(DURATION_TOLERANCE, duration * DURATION_TOLERANCE_RATIO) + voice_delay
+        if abs(container_duration - duration) > tolerance:
+            errors.append(f"durasi {container_duration:.2f} detik, seharusnya {duration:.2f} detik")
+    elif not container_duration:
+        errors.append('durasi tidak terbaca')
+
+    if video and audio_stream:
+        drift = abs(info['audio_duration'] - info['video_duration'])
+        info['av_drift'] = round(drift, 3)
+        if drift > AV_SYNC_TOLERANCE + voice_delay:
+            errors.append(f"durasi audio {info['audio_duration']:.2f} detik dan video {info['video_duration']:.2f} detik tidak sinkron")
+
+    if video:
+        try:
+            frames = sample_keyframes(path)
+        except (RuntimeError, subprocess.TimeoutExpired, OSError) as e:
+            errors.append(f"keyframe tidak dapat didecode: {e}")
+        else:
+            info['sampled_frames'] = len(frames)
+            if len(frames) == 0:
+                errors.append('tidak ada frame yang dapat didecode')
+            else:
+                bright = np.percentile(frames.reshape(len(frames), -1), 98, axis=1)
+                black = [i for i, value in enumerate(bright) if value <= BLACK_LUMA]
+                info['black_frames'] = len(black)
+                if len(black) > max_black_frames:
+                    errors.append(f"{len(black)} dari {len(frames)} keyframe hitam/kosong (keyframe ke-{', '.join(str(i + 1) for i in black[:5])})")
+
+    return {'ok': not errors, 'errors': errors, 'info': info}
+
+
+def validate_render(plan: dict, max_black_frames: int = 0) -> dict:
+    """Memvalidasi semua rendition dari render plan.
+
+    Returns:
+        dict: {path rendition: hasil validate_video}
+    """
+    return {
+        r['path']: validate_video(r['path'], max_black_frames=max_black_frames, **expectations_from_plan(plan, r))
+        for r in plan['renditions']
+    }
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3):
+        print("Penggunaan: python render_check.py video.mp4 [render_plan.json]")
+        sys.exit(1)
+    expected = {}
+    if len(sys.argv) == 3:
+        with open(sys.argv[2], 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+        rendition = next((r for r in plan.get('renditions', []) if os.path.abspath(r.get('path', '')) == os.path.abspath(sys.argv[1])), None)
+        expected = expectations_from_plan(plan, rendition)
+    report = validate_video(sys.argv[1], **expected)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report['ok'] else 1)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+"""Render plan deklaratif dengan cache per node berbasis hash konten.
+
+Semua keputusan render (gambar judul, urutan scene, arah zoom, musik,
+segmen caption) diambil sekali dari RNG ber-seed dan dicatat dalam sebuah
+plan yang dapat diserialisasi ke JSON. Setiap node scene (clip scene dan
+video gabungan tanpa audio) memiliki hash dari parameter dan isi file
+inputnya. Output node disimpan di cache sehingga render ulang setelah judul
+atau caption berubah hanya menjalankan tahap overlay teks + audio.
+
+Seed diturunkan dari image prompts (bukan judul), sehingga mengganti judul
+tidak mengubah urutan scene maupun efeknya; gambar disimpan per set image
+prompts (lihat prompts_digest) sehingga isi file, dan hash node, tetap sama.
+"""
+import os
+import json
+import random
+import shutil
+import hashlib
+import threading
+
+from image_prep import CANVAS_WIDTH, CANVAS_HEIGHT
+from compositor import FPS, ENGINE_FFMPEG, plan_scenes
+
+PLAN_VERSION = 1
+
+# Parameter overlay dan audio yang dipakai saat plan dikompilasi ke FFmpeg
+TITLE_DURATION = 0.75
+CAPTION_START = 1.0
+VOICE_DELAY_MS = 750
+MUSIC_VOLUME = 0.3
+MUSIC_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.aac')
+
+_digest_cache = {}
+_digest_lock = threading.Lock()
+
+
+def prompts_digest(image_prompts: list) -> str:
+    """Hash stabil image prompts konten (tidak bergantung pada judul maupun voiceover)."""
+    payload = json.dumps(list(image_prompts or []), ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def seed_for(image_prompts: list) -> int:
+    """Seed RNG yang stabil dari image prompts konten."""
+    return int(prompts_digest(image_prompts)[:8], 16)
+
+
+def file_digest(path: str) -> str:
+    """Hash SHA-1 isi file, di-cache per (path, ukuran, mtime)."""
+    if not path:
+        return None
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        if key in _digest_cache:
+            return _digest_cache[key]
+    sha = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+    with _digest_lock:
+        _digest_cache[key] = digest
+    return digest
+
+
+def node_hash(kind: str, params: dict, inputs: list = None) -> str:
+    """Hash sebuah node dari jenis, parameter, dan hash inputnya."""
+    payload = json.dumps({'v': PLAN_VERSION, 'kind': kind, 'params': params, 'inputs': inputs or []},
+                         sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _wrap(text: str, max_chars: int) -> list:
+    lines = []
+    current_line = ""
+    for word in text.split():
+        if len(current_line + " " + word) <= max_chars:
+            current_line += (" " if current_line else "") + word
+        else:
+            if current_line:
+                lines.append(current_line)
+            current_line = word
+    if current_line:
+        lines.append(current_line)
+    return lines
+
+
+def segment_captions(caption_text: str, audio_duration: float, max_chars_per_line: int = 35) -> list:
+    """Membagi caption menjadi segmen yang sinkron dengan durasi voiceover.
+
+    Returns:
+        list: {'text', 'wrapped', 'start', 'end'} per segmen; `text` belum di-escape
+    """
+    words = caption_text.split()
+    words_per_second = len(words) / audio_duration if audio_duration > 0 else 1
+    words_per_segment = max(8, min(15, int(words_per_second * 4)))  # 8-15 kata per segmen
+
+    # Mulai caption setelah judul besar
+    segments = []
+    current_time = CAPTION_START
+    for i in range(0, len(words), words_per_segment):
+        segment_words = words[i:i + words_per_segment]
+        segment_text = ' '.join(segment_words).upper()
+        # Hapus karakter bermasalah
+        segment_text = segment_text.replace("'", "").replace(":", "").replace("(", "").replace(")", "")
+
+        segment_duration = len(segment_words) / words_per_second
+        end_time = min(current_time + segment_duration, audio_duration)
+        wrapped = len(segment_text) > max_chars_per_line
+        if wrapped:
+            segment_text = "\n".join(_wrap(segment_text, max_chars_per_line))
+        segments.append({
+            'text': segment_text,
+            'wrapped': wrapped,
+            'start': round(current_time, 2),
+            'end': round(end_time, 2),
+        })
+        current_time = end_time
+    return segments
+
+
+def list_music_files(music_folder: str) -> list:
+    if not music_folder or not os.path.exists(music_folder):
+        return []
+    return sorted(os.path.join(music_folder, f) for f in os.listdir(music_folder) if f.lower().endswith(MUSIC_EXTENSIONS))
+
+
+def build_render_plan(seed: int, title: str, caption: str, images: list, scene_duration: float,
+                      voice_path: str = None, voice_duration: float = 0, music_files: list = None,
+                      no_zoom: bool = False, dark_overlay: bool = False, engine: str = ENGINE_FFMPEG,
+                      renditions: list = None, font_path: str = None, tail: float = 0) -> dict:
+    """Membuat render plan untuk satu video.
+
+    Args:
+        seed (int): Seed RNG untuk semua pilihan acak (lihat seed_for)
+        title (str): Judul yang ditampilkan di awal video
+        caption (str): Teks caption (hanya dipakai jika ada voiceover)
+        images (list): Frame ternormalisasi yang tersedia
+        scene_duration (float): Durasi setiap scene dalam detik
+        voice_path (str): Path voiceover (opsional)
+        voice_duration (float): Durasi voiceover dalam detik
+        music_files (list): Kandidat musik background (opsional)
+        no_zoom (bool): Nonaktifkan efek zoom
+        dark_overlay (bool): Terapkan overlay gelap
+        engine (str): Render engine scene
+        renditions (list): Rendition output (elemen pertama adalah rendition utama), dengan key 'path'
+        font_path (str): Path font untuk judul dan caption
+        tail (float): Detik frame terakhir ditahan setelah scene habis, untuk voiceover
+            varian yang lebih panjang dari video scene bersama
+
+    Returns:
+        dict: Render plan yang dapat diserialisasi ke JSON
+    """
+    rng = random.Random(seed)
+
+    # Gambar judul di awal, diikuti semua gambar dalam urutan acak
+    title_image = rng.choice(images)
+    scene_images = list(images)
+    rng.shuffle(scene_images)
+    scenes = plan_scenes([title_image] + scene_images, no_zoom, rng=rng)
+
+    scene_hashes = []
+    for scene in scenes:
+        scene['duration'] = scene_duration
+        scene['dark_overlay'] = dark_overlay
+        scene['hash'] = node_hash('scene', {
+            'duration': scene_duration, 'zoom': scene['zoom'], 'dark_overlay': dark_overlay,
+            'width': CANVAS_WIDTH, 'height': CANVAS_HEIGHT, 'fps': FPS,
+        }, [file_digest(scene['image'])])
+        scene_hashes.append(scene['hash'])
+    base_hash = node_hash('base', {'engine': engine}, scene_hashes)
+
+    music_path = rng.choice(music_files) if music_files else None
+    captions = segment_captions(caption, voice_duration) if voice_path else []
+
+    plan = {
+        'version': PLAN_VERSION,
+        'seed': seed,
+        'canvas': {'width': CANVAS_WIDTH, 'height': CANVAS_HEIGHT, 'fps': FPS},
+        'engine': engine,
+        'scenes': scenes,
+        'base': {'hash': base_hash},
+        'font': font_path,
+        'title': {'text': title, 'start': 0, 'end': TITLE_DURATION},
+        'captions': captions,
+        'audio': {
+            'voice': voice_path,
+            'voice_delay_ms': VOICE_DELAY_MS,
+            'music': music_path,
+            'music_volume': MUSIC_VOLUME,
+        },
+        'renditions': list(renditions or []),
+        'tail': tail,
+    }
+    return plan
+
+
+def save_plan(plan: dict, path: str):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+class RenderCache:
+    """Cache output node render yang dialamatkan dengan hash node."""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path_for(self, digest: str, ext: str = '.mp4') -> str:
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}{ext}")
+
+    def get(self, digest: str, ext: str = '.mp4'):
+        """Mengembalikan path output node jika sudah ada di cache, atau None."""
+        path = self.path_for(digest, ext)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            # Perbarui mtime untuk urutan LRU saat prune
+            os.utime(path, None)
+            return path
+        return None
+
+    def staging_path(self, digest: str, ext: str = '.mp4') -> str:
+        """Path sementara untuk menulis output node sebelum dimasukkan ke cache."""
+        path = self.path_for(digest, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unik per proses/thread agar dua worker yang merender node sama tidak saling menimpa
+        return os.path.join(os.path.dirname(path), f"{digest}.{os.getpid()}-{threading.get_ident()}.part{ext}")
+
+    def commit(self, digest: str, ext: str = '.mp4') -> str:
+        """Memindahkan output node dari staging ke cache secara atomik."""
+        path = self.path_for(digest, ext)
+        os.replace(self.staging_path(digest, ext), path)
+        return path
+
+    def store(self, digest: str, source_path: str, ext: str = '.mp4') -> str:
+        """Menyalin output node yang dirender di luar cache (mis. di scratch RAM) ke cache secara atomik."""
+        shutil.copyfile(source_path, self.staging_path(digest, ext))
+        return self.commit(digest, ext)
+
+    def discard(self, digest: str, ext: str = '.mp4'):
+        """Menghapus output node dari cache, mis. karena hasil render gagal validasi."""
+        path = self.path_for(digest, ext)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def prune(self, max_bytes: int):
+        """Menghapus entri paling lama tidak dipakai sampai ukuran cache <= max_bytes."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for f in files:
+                if '.part' in f:
+                    continue
+                path = os.path.join(root, f)
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= max_bytes:
+                break
+            os.remove(path)
+            total -= size
+        return total
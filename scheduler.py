@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+"""Buffer render-ahead dan penjadwal publish.
+
+Video dirender lebih awal (mis. di jam sepi) dan disimpan di buffer SQLite
+sebagai video siap publish. Pada slot publish, cli.py hanya mengupload dari
+buffer, atau mengupload lebih awal dengan `publishAt` terjadwal. Kedalaman
+buffer dan jumlah video yang dirender per run menyesuaikan waktu render yang
+teramati.
+
+Status buffer:
+    python scheduler.py status [path_buffer_db]
+"""
+import os
+import sys
+import json
+import math
+import time
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+STATUS_READY = 'ready'
+STATUS_SCHEDULED = 'scheduled'
+STATUS_PUBLISHED = 'published'
+STATUS_FAILED = 'failed'
+
+DEFAULT_PUBLISH_SLOTS = '09:00,15:00,21:00'
+DEFAULT_OFF_PEAK = '01:00-06:00'
+DEFAULT_MIN_DEPTH = 2
+DEFAULT_MAX_DEPTH = 20
+# Perkiraan waktu render sebelum ada data
+DEFAULT_RENDER_SECONDS = 600
+RENDER_SAMPLES = 20
+
+
+def parse_slots(spec: str) -> list:
+    """Parse daftar jam publish "09:00,15:00" menjadi list (jam, menit) terurut."""
+    slots = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        hour, minute = (int(v) for v in part.split(':'))
+        if not (0 <= hour < 24 and 0 <= minute < 60):
+            raise ValueError(f"Jam publish tidak valid: {part}")
+        slots.append((hour, minute))
+    if not slots:
+        raise ValueError("Minimal satu slot publish diperlukan")
+    return sorted(set(slots))
+
+
+def parse_window(spec: str) -> tuple:
+    """Parse jendela waktu "01:00-06:00" menjadi (menit_mulai, menit_selesai) sejak tengah malam."""
+    start, end = spec.split('-')
+    start_h, start_m = (int(v) for v in start.strip().split(':'))
+    end_h, end_m = (int(v) for v in end.strip().split(':'))
+    return start_h * 60 + start_m, end_h * 60 + end_m
+
+
+def next_slots(slots: list, after: datetime, count: int, skip: set = None) -> list:
+    """Mengembalikan `count` waktu slot publish berikutnya setelah `after`.
+
+    Slot yang waktunya (RFC3339) ada di `skip` dilewati, mis. slot yang sudah dipakai.
+    """
+    result = []
+    day = after.replace(hour=0, minute=0, second=0, microsecond=0)
+    skip = skip or set()
+    while len(result) < count:
+        for hour, minute in slots:
+            slot = day.replace(hour=hour, minute=minute)
+            if slot > after and to_rfc3339(slot) not in skip:
+                result.append(slot)
+                if len(result) == count:
+                    break
+        day += timedelta(days=1)
+    return result
+
+
+def slots_between(slots: list, start: datetime, end: datetime) -> int:
+    """Jumlah slot publish di rentang (start, end]."""
+    count = 0
+    day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while day <= end:
+        for hour, minute in slots:
+            slot = day.replace(hour=hour, minute=minute)
+            if start < slot <= end:
+                count += 1
+        day += timedelta(days=1)
+    return count
+
+
+def window_bounds(window: tuple, now: datetime) -> tuple:
+    """Mengembalikan (mulai, selesai) jendela off-peak yang sedang berjalan atau berikutnya."""
+    start_min, end_min = window
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    for offset in (-1, 0, 1):
+        start = midnight + timedelta(days=offset, minutes=start_min)
+        end = midnight + timedelta(days=offset, minutes=end_min)
+        if end <= start:
+            # Jendela melewati tengah malam, mis. 22:00-04:00
+            end += timedelta(days=1)
+        if end > now:
+            return start, end
+    raise ValueError("Jendela off-peak tidak valid")
+
+
+def to_rfc3339(moment: datetime) -> str:
+    """Format waktu untuk field `publishAt` YouTube (UTC)."""
+    if moment.tzinfo is None:
+        moment = moment.astimezone()
+    return moment.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def plan_production(depth: int, render_samples: list, slots: list, window: tuple, now: datetime = None,
+                    min_depth: int = DEFAULT_MIN_DEPTH, max_depth: int = DEFAULT_MAX_DEPTH, safety: float = 1.5) -> dict:
+    """Menentukan kedalaman buffer target dan jumlah video yang dirender pada run ini.
+
+    Buffer harus menutup semua slot publish sampai jendela off-peak berikutnya
+    selesai diisi ulang, ditambah cadangan untuk render yang lambat: semakin
+    lama render (p90) dibanding jarak antar slot, semakin banyak cadangan.
+    Jumlah render per run dibatasi oleh sisa waktu jendela off-peak dibagi
+    waktu render p90. Di luar jendela, hanya kekurangan untuk slot sebelum
+    jendela berikutnya yang dirender.
+
+    Returns:
+        dict: {'target_depth', 'to_render', 'render_p90', 'in_window', 'window_seconds_left'}
+    """
+    now = now or datetime.now()
+    samples = sorted(render_samples) or [DEFAULT_RENDER_SECONDS]
+    p90 = samples[min(len(samples) - 1, int(math.ceil(0.9 * len(samples))) - 1)]
+
+    window_start, window_end = window_bounds(window, now)
+    in_window = window_start <= now < window_end
+    if in_window:
+        # Buffer yang diisi sekarang harus bertahan sampai jendela berikutnya selesai
+        horizon = window_end + timedelta(days=1)
+    else:
+        horizon = window_end
+
+    slot_gap = 86400 / len(slots)
+    reserve = int(math.ceil(safety * p90 / slot_gap))
+    target = slots_between(slots, now, horizon) + reserve
+    target = max(min_depth, min(max_depth, target))
+
+    if in_window:
+        window_left = (window_end - now).total_seconds()
+        capacity = int(window_left // (p90 * safety)) if p90 > 0 else target
+        to_render = max(0, min(target - depth, capacity))
+    else:
+        window_left = 0
+        urgent = slots_between(slots, now, window_start) + 1
+        to_render = max(0, urgent - depth)
+
+    return {
+        'target_depth': target,
+        'to_render': to_render,
+        'render_p90': p90,
+        'in_window': in_window,
+        'window_seconds_left': window_left,
+    }
+
+
+class PublishBuffer:
+    """Buffer video yang sudah dirender dan divalidasi, siap dipublish (SQLite + WAL)."""
+
+    def __init__(self, db_path: str):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS buffer (
+                job_key TEXT PRIMARY KEY,
+                title TEXT,
+                content TEXT NOT NULL,
+                output_path TEXT NOT NULL,
+                render_seconds REAL,
+                status TEXT NOT NULL,
+                video_id TEXT,
+                publish_at TEXT,
+                error TEXT,
+                rendered_at REAL,
+                updated_at REAL
+            )
+        ''')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def add(self, job_key: str, content: dict, output_path: str, render_seconds: float = None):
+        """Menambahkan video yang sudah dirender ke buffer sebagai siap publish.
+
+        Baris yang sudah ada hanya ditimpa jika statusnya gagal; video yang siap, terjadwal, atau
+        sudah dipublish tidak dikembalikan ke status siap.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO buffer (job_key, title, content, output_path, render_seconds, status, rendered_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT(job_key) DO UPDATE SET title = excluded.title, content = excluded.content, '
+                'output_path = excluded.output_path, render_seconds = excluded.render_seconds, status = excluded.status, '
+                'video_id = NULL, publish_at = NULL, error = NULL, rendered_at = excluded.rendered_at, '
+                'updated_at = excluded.updated_at WHERE buffer.status = ?',
+                (job_key, content.get('title'), json.dumps(content, ensure_ascii=False), output_path,
+                 render_seconds, STATUS_READY, now, now, STATUS_FAILED)
+            )
+
+    def holds(self, job_key: str) -> bool:
+        """Apakah job sudah ada di buffer dan tidak gagal (siap, terjadwal, atau sudah dipublish)."""
+        with self._lock:
+            row = self._conn.execute('SELECT status FROM buffer WHERE job_key = ?', (job_key,)).fetchone()
+        return row is not None and row[0] != STATUS_FAILED
+
+    def ready(self, limit: int = None) -> list:
+        """Video siap publish, yang paling lama dirender lebih dulu."""
+        query = 'SELECT job_key, content, output_path FROM buffer WHERE status = ? ORDER BY rendered_at'
+        params = [STATUS_READY]
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [{'job_key': k, 'content': json.loads(c), 'output_path': p} for k, c, p in rows]
+
+    def _set_status(self, job_key: str, status: str, **fields):
+        assignments = ', '.join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f'UPDATE buffer SET status = ?, updated_at = ?{", " + assignments if assignments else ""} WHERE job_key = ?',
+                [status, time.time()] + list(fields.values()) + [job_key]
+            )
+
+    def mark_published(self, job_key: str, video_id: str, publish_at: str = None):
+        status = STATUS_SCHEDULED if publish_at else STATUS_PUBLISHED
+        self._set_status(job_key, status, video_id=video_id, publish_at=publish_at)
+
+    def mark_failed(self, job_key: str, error: str):
+        self._set_status(job_key, STATUS_FAILED, error=error)
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM buffer WHERE status = ?', (STATUS_READY,)).fetchone()[0]
+
+    def render_samples(self, count: int = RENDER_SAMPLES) -> list:
+        """Waktu render (detik) dari video yang paling baru dirender."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT render_seconds FROM buffer WHERE render_seconds IS NOT NULL ORDER BY rendered_at DESC LIMIT ?',
+                (count,)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def scheduled_slots(self) -> set:
+        """Waktu publishAt yang sudah dipakai video terjadwal (format RFC3339)."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT publish_at FROM buffer WHERE status = ? AND publish_at IS NOT NULL', (STATUS_SCHEDULED,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute('SELECT status, COUNT(*) FROM buffer GROUP BY status').fetchall()
+        return dict(rows)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3) or sys.argv[1] != 'status':
+        print("Penggunaan: python scheduler.py status [path_buffer_db]")
+        sys.exit(1)
+    db_path = sys.argv[2] if len(sys.argv) == 3 else os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp', 'publish_buffer.db')
+    buffer = PublishBuffer(db_path)
+    samples = buffer.render_samples()
+    print(json.dumps({
+        'status': buffer.stats(),
+        'render_seconds_avg': sum(samples) / len(samples) if samples else None,
+        'production': plan_production(buffer.depth(), samples, parse_slots(DEFAULT_PUBLISH_SLOTS), parse_window(DEFAULT_OFF_PEAK)),
+    }, indent=2))
+    sys.exit(0)
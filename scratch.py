@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+"""Ruang kerja sementara (scratch) untuk file antara render.
+
+File antara (clip scene, clip unit gambar diam, video scene tanpa audio,
+segmen judul) ditulis ke filesystem berbasis RAM (tmpfs, mis. /dev/shm)
+jika memori yang tersedia cukup, dan ke direktori kerja entri di disk jika
+tidak (spill). File dihapus begitu langkah yang memakainya selesai, bukan
+di akhir entri.
+
+Semua proses di mesin yang sama berbagi satu budget scratch lewat ledger
+SQLite + WAL: alokasi yang melampaui budget menunggu sampai proses lain
+membebaskan file-nya, alih-alih gagal karena disk atau RAM penuh. Ukuran
+alokasi diperkirakan dari durasi video lalu diganti ukuran sebenarnya
+setelah file selesai ditulis. Job yang sudah memegang file scratch tidak
+ikut menunggu, karena file-nya baru bebas setelah job itu maju; dengan
+begitu dua proses tidak saling menunggu. Reservasi milik proses yang sudah
+mati dibersihkan otomatis.
+
+Pemakaian scratch saat ini:
+    python scratch.py usage [path_ledger]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import hashlib
+import sqlite3
+import threading
+
+DEFAULT_LEDGER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp', 'scratch.db')
+# Direktori tmpfs yang dicoba untuk scratch di RAM
+RAM_CANDIDATES = ('/dev/shm',)
+RAM_SUBDIR = 'video-shorts-scratch'
+DEFAULT_BUDGET_GB = 4
+# Memori yang harus tetap tersedia setelah file scratch ditulis ke RAM
+MIN_MEM_AVAILABLE = 1024 * 1024 * 1024
+# Perkiraan ukuran video 1080x1920 libx264 per detik, sebelum ukuran sebenarnya diketahui
+ESTIMATE_BYTES_PER_SECOND = int(1.5 * 1024 * 1024)
+POLL_INTERVAL = 2
+# Batas waktu menunggu budget; setelah itu alokasi tetap dilanjutkan (dengan peringatan)
+DEFAULT_MAX_WAIT = 900
+LOG_INTERVAL = 30
+
+GB = 1024 ** 3
+
+
+def estimate_bytes(seconds: float) -> int:
+    """Perkiraan ukuran file video untuk durasi `seconds`."""
+    return max(1, int(seconds * ESTIMATE_BYTES_PER_SECOND))
+
+
+def mem_available():
+    """MemAvailable dari /proc/meminfo dalam byte (None jika tidak tersedia)."""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def ram_root_candidate():
+    """Direktori tmpfs yang dapat ditulis, atau None (mis. di Windows/macOS)."""
+    for candidate in RAM_CANDIDATES:
+        if os.path.isdir(candidate) and os.access(candidate, os.W_OK):
+            return os.path.join(candidate, RAM_SUBDIR)
+    return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+class ScratchSpace:
+    """Alokasi file antara di RAM atau disk dengan budget bersama antar proses.
+
+    Tanpa `ram_dir` dan `budget_bytes` (default), file ditulis ke direktori
+    kerja entri seperti biasa dan tidak ada yang ditunggu.
+    """
+
+    def __init__(self, ram_dir: str = None, budget_bytes: int = None, ledger_path: str = DEFAULT_LEDGER,
+                 max_wait: float = DEFAULT_MAX_WAIT, cache_ram_clips: bool = False):
+        self.ram_dir = ram_dir
+        self.budget_bytes = budget_bytes
+        self.max_wait = max_wait
+        self.cache_ram_clips = cache_ram_clips
+        self.host = socket.gethostname()
+        self._lock = threading.Lock()
+        self._conn = None
+        if budget_bytes:
+            ledger_dir = os.path.dirname(ledger_path)
+            if ledger_dir:
+                os.makedirs(ledger_dir, exist_ok=True)
+            self._conn = sqlite3.connect(ledger_path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS allocations (
+                    path TEXT PRIMARY KEY,
+                    job TEXT NOT NULL,
+                    host TEXT NOT NULL,
+                    pid INTEGER NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    ram INTEGER NOT NULL,
+                    created_at REAL
+                )
+            ''')
+        if ram_dir:
+            os.makedirs(ram_dir, exist_ok=True)
+            self.cleanup_stale()
+
+    def job_key(self, work_dir: str) -> str:
+        return hashlib.sha1(os.path.abspath(work_dir).encode('utf-8')).hexdigest()[:12]
+
+    def job_dir(self, work_dir: str) -> str:
+        """Direktori RAM job ini (nama diawali pid agar sisa proses mati dapat dikenali)."""
+        return os.path.join(self.ram_dir, f"{os.getpid()}-{self.job_key(work_dir)}")
+
+    def cleanup_stale(self):
+        """Menghapus direktori RAM dan reservasi milik proses yang sudah tidak berjalan."""
+        for name in os.listdir(self.ram_dir):
+            pid = name.split('-', 1)[0]
+            if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+                shutil.rmtree(os.path.join(self.ram_dir, name), ignore_errors=True)
+        if self._conn is not None:
+            with self._lock:
+                self._reap()
+
+    def _reap(self):
+        rows = self._conn.execute('SELECT DISTINCT pid FROM allocations WHERE host = ?', (self.host,)).fetchall()
+        for (pid,) in rows:
+            if pid != os.getpid() and not _pid_alive(pid):
+                for (path,) in self._conn.execute('SELECT path FROM allocations WHERE host = ? AND pid = ?',
+                                                  (self.host, pid)).fetchall():
+                    if os.path.exists(path):
+                        os.remove(path)
+                self._conn.execute('DELETE FROM allocations WHERE host = ? AND pid = ?', (self.host, pid))
+
+    def in_ram(self, path: str) -> bool:
+        """Apakah `path` berada di scratch RAM."""
+        if not self.ram_dir or not path:
+            return False
+        return os.path.abspath(path).startswith(os.path.abspath(self.ram_dir) + os.sep)
+
+    def should_cache_clip(self, path: str) -> bool:
+        """Apakah clip scene atau clip unit di `path` perlu disalin ke cache render di disk.
+
+        Clip di RAM tidak disalin (kecuali `cache_ram_clips`): menyalin setiap clip ke
+        disk menghilangkan manfaat scratch RAM, sedangkan video scene gabungan tetap di-cache.
+        """
+        return self.cache_ram_clips or not self.in_ram(path)
+
+    def _fits_ram(self, nbytes: int) -> bool:
+        if not self.ram_dir:
+            return False
+        try:
+            free = shutil.disk_usage(self.ram_dir).free
+        except OSError:
+            return False
+        available = mem_available()
+        return free >= nbytes * 2 and (available is None or available - nbytes >= MIN_MEM_AVAILABLE)
+
+    def _try_reserve(self, path: str, job: str, nbytes: int, ram: bool, force: bool):
+        """Mencatat reservasi jika budget cukup.
+
+        Returns:
+            bool: True jika tercatat; False jika harus menunggu proses lain
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._reap()
+                used, mine, held = self._conn.execute(
+                    'SELECT COALESCE(SUM(bytes), 0), COALESCE(SUM(CASE WHEN host = ? AND pid = ? THEN bytes ELSE 0 END), 0), '
+                    'COALESCE(SUM(CASE WHEN host = ? AND pid = ? AND job = ? THEN bytes ELSE 0 END), 0) '
+                    'FROM allocations WHERE path != ?', (self.host, os.getpid(), self.host, os.getpid(), job, path)
+                ).fetchone()
+                # Hanya proses ini yang memegang scratch: menunggu tidak akan membebaskan apa pun.
+                # Job yang sudah memegang file tetap jalan agar bisa selesai dan membebaskannya;
+                # jika menunggu, dua proses yang sama-sama memegang file bisa saling menunggu.
+                if force or used + nbytes <= self.budget_bytes or used == mine or held > 0:
+                    self._conn.execute(
+                        'INSERT OR REPLACE INTO allocations (path, job, host, pid, bytes, ram, created_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (path, job, self.host, os.getpid(), nbytes, int(ram), time.time())
+                    )
+                    self._conn.execute('COMMIT')
+                    return True
+                self._conn.execute('COMMIT')
+                return False
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def allocate(self, work_dir: str, name: str, estimate: int, log_callback=print) -> str:
+        """Path untuk file antara `name` milik job `work_dir`.
+
+        Menunggu sampai budget scratch cukup untuk `estimate` byte. File
+        ditempatkan di RAM jika memori cukup, dan di `work_dir` jika tidak.
+
+        Args:
+            work_dir: Direktori kerja entri (juga kunci job)
+            name: Nama file antara, mis. clip_0.mp4
+            estimate: Perkiraan ukuran file dalam byte (lihat estimate_bytes)
+            log_callback: Function untuk logging
+
+        Returns:
+            str: Path tempat file antara ditulis
+        """
+        job = self.job_key(work_dir)
+        started = time.monotonic()
+        last_log = None
+        while True:
+            # Tempat ditentukan ulang setiap percobaan: RAM dapat lega selama menunggu
+            ram = self._fits_ram(estimate)
+            path = os.path.join(self.job_dir(work_dir), name) if ram else os.path.join(work_dir, name)
+            if ram:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            if self._conn is None or self._try_reserve(path, job, estimate, ram, force=False):
+                return path
+            waited = time.monotonic() - started
+            if self.max_wait is not None and waited >= self.max_wait:
+                log_callback(f"Peringatan: budget scratch masih penuh setelah {waited:.0f} detik, "
+                             f"{name} tetap ditulis")
+                self._try_reserve(path, job, estimate, ram, force=True)
+                return path
+            if last_log is None or time.monotonic() - last_log >= LOG_INTERVAL:
+                usage = self.usage()
+                log_callback(f"Budget scratch penuh ({usage['used_bytes'] / GB:.2f}/{self.budget_bytes / GB:.2f} GB), "
+                             f"menunggu sebelum menulis {name}...")
+                last_log = time.monotonic()
+            time.sleep(POLL_INTERVAL)
+
+    def commit(self, path: str):
+        """Mengganti perkiraan ukuran dengan ukuran file sebenarnya setelah selesai ditulis."""
+        if self._conn is None or not path or not os.path.exists(path):
+            return
+        with self._lock:
+            self._conn.execute('UPDATE allocations SET bytes = ? WHERE path = ?', (os.path.getsize(path), path))
+
+    def free(self, *paths):
+        """Menghapus file antara yang sudah tidak dipakai dan melepas reservasinya."""
+        for path in paths:
+            if path and os.path.exists(path):
+                os.remove(path)
+            if self._conn is not None and path:
+                with self._lock:
+                    self._conn.execute('DELETE FROM allocations WHERE path = ?', (path,))
+
+    def release_job(self, work_dir: str):
+        """Melepas semua file antara job (dipanggil di akhir entri, berhasil maupun gagal)."""
+        if self._conn is not None:
+            job = self.job_key(work_dir)
+            with self._lock:
+                paths = [p for (p,) in self._conn.execute(
+                    'SELECT path FROM allocations WHERE job = ? AND host = ? AND pid = ?',
+                    (job, self.host, os.getpid())).fetchall()]
+            self.free(*paths)
+        if self.ram_dir:
+            shutil.rmtree(self.job_dir(work_dir), ignore_errors=True)
+
+    def usage(self) -> dict:
+        """Total byte yang direservasi (semua proses), di RAM dan di disk."""
+        if self._conn is None:
+            return {'used_bytes': 0, 'ram_bytes': 0, 'allocations': 0, 'budget_bytes': self.budget_bytes}
+        with self._lock:
+            used, ram, count = self._conn.execute(
+                'SELECT COALESCE(SUM(bytes), 0), COALESCE(SUM(CASE WHEN ram THEN bytes ELSE 0 END), 0), COUNT(*) '
+                'FROM allocations'
+            ).fetchone()
+        return {'used_bytes': used, 'ram_bytes': ram, 'allocations': count, 'budget_bytes': self.budget_bytes}
+
+
+_space = {'current': None}
+_space_lock = threading.Lock()
+
+
+def configure(ram: bool = True, ram_dir: str = None, budget_gb: float = DEFAULT_BUDGET_GB,
+              ledger_path: str = DEFAULT_LEDGER, max_wait: float = DEFAULT_MAX_WAIT,
+              cache_ram_clips: bool = False) -> ScratchSpace:
+    """Mengatur scratch proses ini, mis. dari argumen CLI.
+
+    Args:
+        ram: Gunakan tmpfs jika memori cukup (False = selalu di disk)
+        ram_dir: Direktori scratch RAM (default: /dev/shm/video-shorts-scratch)
+        budget_gb: Budget scratch bersama semua proses dalam GB (0 = tanpa batas)
+        ledger_path: Path ledger reservasi SQLite
+        max_wait: Batas waktu menunggu budget dalam detik
+        cache_ram_clips: Salin juga clip scene dan clip unit di RAM ke cache render
+
+    Returns:
+        ScratchSpace: Scratch yang aktif
+    """
+    space = ScratchSpace(
+        ram_dir=(ram_dir or ram_root_candidate()) if ram else None,
+        budget_bytes=int(budget_gb * GB) if budget_gb and budget_gb > 0 else None,
+        ledger_path=ledger_path,
+        max_wait=max_wait,
+        cache_ram_clips=cache_ram_clips,
+    )
+    with _space_lock:
+        _space['current'] = space
+    return space
+
+
+def get_scratch() -> ScratchSpace:
+    """Scratch proses ini (tanpa configure: file antara tetap di direktori kerja)."""
+    with _space_lock:
+        if _space['current'] is None:
+            _space['current'] = ScratchSpace()
+        return _space['current']
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3) or sys.argv[1] != 'usage':
+        print("Penggunaan: python scratch.py usage [path_ledger]")
+        sys.exit(1)
+    usage = ScratchSpace(budget_bytes=1, ledger_path=sys.argv[2] if len(sys.argv) == 3 else DEFAULT_LEDGER).usage()
+    del usage['budget_bytes']
+    print(json.dumps({**usage, 'ram_dir': ram_root_candidate(), 'mem_available': mem_available()}, indent=2))
+    sys.exit(0)
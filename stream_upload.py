@@ -0,0 +1,407 @@
+#!/usr/bin/env python
+"""Upload video selagi encoder masih menulis file output.
+
+Tahap akhir render menulis MP4 terfragmentasi (moov kosong di awal, lalu
+moof+mdat per keyframe, tanpa trailer) sehingga file hanya bertambah di
+ujungnya dan byte yang sudah ditulis tidak pernah diubah lagi. GrowingFile
+membaca file ini per chunk untuk upload resumable: selama encoder berjalan,
+chunk dikirim dengan ukuran total `*`, dan ukuran total baru dinyatakan pada
+chunk terakhir setelah encoder selesai (dan video lolos validasi).
+
+Protokol upload resumable (seperti YouTube Data API):
+    POST <url>?uploadType=resumable          metadata JSON -> header Location (URL sesi)
+    PUT  <sesi>  Content-Range: bytes A-B/*  chunk (kelipatan 256 KiB) -> 308 + Range
+    PUT  <sesi>  Content-Range: bytes A-B/N  setelah encoder selesai -> 308, atau 201 + resource
+                                             video pada chunk terakhir
+    PUT  <sesi>  Content-Range: bytes */*    status: 308 + Range byte yang sudah diterima
+
+Server upload fake lokal untuk pengujian (hasil upload disimpan di folder):
+    python stream_upload.py serve [--port 8765] [--dir temp/fake_uploads]
+lalu jalankan cli.py dengan --fake-providers upload dan konfigurasi fake
+{"upload": {"server": "http://127.0.0.1:8765/upload"}}.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import tracing
+from ratelimit import RetriableError, ThrottledError
+
+# Chunk upload resumable harus kelipatan 256 KiB (kecuali chunk terakhir)
+CHUNK_ALIGN = 256 * 1024
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+POLL_INTERVAL = 0.2
+# MP4 terfragmentasi yang hanya ditambah di ujung (tanpa mfra di trailer)
+FRAGMENT_MOVFLAGS = 'frag_keyframe+empty_moov+default_base_moof+skip_trailer'
+DEFAULT_SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp', 'fake_uploads')
+
+
+class StreamAborted(Exception):
+    """Dilempar saat membaca GrowingFile yang dibatalkan (render atau validasi gagal)."""
+
+
+def align_chunk_size(chunk_size: int) -> int:
+    """Membulatkan ukuran chunk ke kelipatan CHUNK_ALIGN (minimal satu)."""
+    return max(CHUNK_ALIGN, int(chunk_size) // CHUNK_ALIGN * CHUNK_ALIGN)
+
+
+class GrowingFile:
+    """File output yang masih ditulis encoder, dibaca per chunk untuk upload resumable.
+
+    Chunk penuh hanya tersedia jika masih ada data sesudahnya atau file sudah
+    selesai, sehingga chunk pendek selalu berarti akhir file.
+    """
+
+    def __init__(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, poll_interval: float = POLL_INTERVAL):
+        self.path = path
+        self.chunk_size = align_chunk_size(chunk_size)
+        self.poll_interval = poll_interval
+        self._cond = threading.Condition()
+        self._final_size = None
+        self._error = None
+        self.finished_at = None
+
+    @classmethod
+    def completed(cls, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """GrowingFile untuk file yang sudah selesai ditulis."""
+        source = cls(path, chunk_size)
+        source.finish()
+        return source
+
+    def available(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def size(self):
+        """Ukuran total file, atau None selama encoder masih menulis."""
+        return self._final_size
+
+    def finish(self):
+        """Menandai file selesai ditulis; ukuran total dinyatakan pada chunk terakhir."""
+        with self._cond:
+            if self._error is None and self._final_size is None:
+                self._final_size = os.path.getsize(self.path)
+                self.finished_at = time.monotonic()
+            self._cond.notify_all()
+
+    def abort(self, reason: str):
+        """Membatalkan upload: pembacaan berikutnya melempar StreamAborted (tidak berpengaruh setelah finish)."""
+        with self._cond:
+            if self._final_size is None:
+                self._error = reason
+            self._cond.notify_all()
+
+    def wait_ready(self, offset: int, length: int = None):
+        """Menunggu sampai chunk mulai `offset` dapat dibaca."""
+        length = length or self.chunk_size
+        with self._cond:
+            while True:
+                if self._error is not None:
+                    raise StreamAborted(self._error)
+                if self._final_size is not None or self.available() > offset + length:
+                    return
+                self._cond.wait(self.poll_interval)
+
+    def read(self, offset: int, length: int = None) -> bytes:
+        """Membaca satu chunk mulai `offset`, menunggu encoder jika data belum tersedia."""
+        length = length or self.chunk_size
+        self.wait_ready(offset, length)
+        if self._final_size is not None:
+            length = max(0, min(length, self._final_size - offset))
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+
+
+class StreamingUpload:
+    """Menjalankan upload di background sementara file output masih ditulis."""
+
+    def __init__(self, path: str, upload_fn, log_callback=print, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Args:
+            path (str): Path file output encoder
+            upload_fn: Function(source) -> video ID atau None, dengan source GrowingFile
+            log_callback: Function untuk logging
+            chunk_size (int): Ukuran chunk upload
+        """
+        self.source = GrowingFile(path, chunk_size)
+        self.log_callback = log_callback
+        self._result = None
+        # Span upload dicatat di track sendiri di samping track entri yang memulainya
+        self._track = f"{tracing.current_track()} / upload"
+        self._thread = threading.Thread(target=self._run, args=(upload_fn,), name='stream-upload', daemon=True)
+        self._thread.start()
+
+    def _run(self, upload_fn):
+        try:
+            with tracing.track(self._track), tracing.span('upload stream', path=os.path.basename(self.source.path)):
+                self._result = upload_fn(self.source)
+        except Exception as e:
+            self.log_callback(f"Error saat upload streaming: {e}")
+
+    def finish(self):
+        self.source.finish()
+
+    def abort(self, reason: str):
+        self.source.abort(reason)
+
+    def wait(self):
+        """Menunggu upload selesai.
+
+        Returns:
+            str: Video ID jika berhasil, None jika gagal
+        """
+        self._thread.join()
+        return self._result
+
+
+class UploadStatus:
+    """Progress upload resumable (antarmuka sama dengan MediaUploadProgress googleapiclient)."""
+
+    def __init__(self, resumable_progress: int, total_size: int = None):
+        self.resumable_progress = resumable_progress
+        self.total_size = total_size
+
+    def progress(self) -> float:
+        return self.resumable_progress / self.total_size if self.total_size else 0.0
+
+
+def _raise_for_upload_status(response):
+    if response.status_code == 429:
+        raise ThrottledError(f"upload: 429 {response.text[:200]}")
+    if response.status_code >= 500:
+        raise RetriableError(f"upload: {response.status_code} {response.text[:200]}")
+    if response.status_code >= 400:
+        raise RuntimeError(f"upload: {response.status_code} {response.text[:200]}")
+
+
+class ResumableHttpRequest:
+    """Klien protokol upload resumable via HTTP untuk satu video.
+
+    Setiap next_chunk() mengirim satu chunk dan mengembalikan (status, None)
+    atau (None, resource video) setelah chunk terakhir diterima. Setelah
+    error, panggilan berikutnya menanyakan byte yang sudah diterima server
+    sebelum melanjutkan.
+    """
+
+    def __init__(self, upload_url: str, source: GrowingFile, body: dict, timeout: float = 60):
+        self.upload_url = upload_url
+        self.source = source
+        self.body = body
+        self.timeout = timeout
+        self.session_url = None
+        self.resumable_progress = 0
+        self._resync = False
+
+    def _update_progress(self, response):
+        # Header Range "bytes=0-N": byte 0..N sudah diterima
+        received = response.headers.get('Range')
+        self.resumable_progress = int(received.rsplit('-', 1)[1]) + 1 if received else 0
+
+    def next_chunk(self):
+        if self.session_url is None:
+            response = requests.post(self.upload_url, params={'uploadType': 'resumable'}, json=self.body,
+                                     headers={'X-Upload-Content-Type': 'video/mp4'}, timeout=self.timeout)
+            _raise_for_upload_status(response)
+            self.session_url = response.headers['Location']
+        elif self._resync:
+            response = requests.put(self.session_url, headers={'Content-Range': 'bytes */*'}, timeout=self.timeout)
+            if response.status_code in (200, 201):
+                return None, response.json()
+            _raise_for_upload_status(response)
+            self._update_progress(response)
+            self._resync = False
+
+        data = self.source.read(self.resumable_progress)
+        total = self.source.size()
+        if data:
+            content_range = f"bytes {self.resumable_progress}-{self.resumable_progress + len(data) - 1}/{total if total is not None else '*'}"
+        else:
+            content_range = f"bytes */{total}"
+        try:
+            response = requests.put(self.session_url, data=data, headers={'Content-Range': content_range},
+                                    timeout=self.timeout)
+        except requests.RequestException as e:
+            self._resync = True
+            raise RetriableError(f"upload: {e}")
+        if response.status_code in (200, 201):
+            return None, response.json()
+        if response.status_code != 308:
+            self._resync = True
+            _raise_for_upload_status(response)
+        self._update_progress(response)
+        return UploadStatus(self.resumable_progress, total), None
+
+
+class _UploadSession:
+    def __init__(self, session_id: str, body: dict, path: str):
+        self.session_id = session_id
+        self.body = body
+        self.path = path
+        self.received = 0
+        self.chunks = 0
+        self.created_at = time.time()
+        self.first_chunk_at = None
+        self.completed_at = None
+        self.video_id = None
+        self.lock = threading.Lock()
+
+    def summary(self) -> dict:
+        return {
+            'session': self.session_id,
+            'video_id': self.video_id,
+            'title': self.body.get('snippet', {}).get('title'),
+            'path': self.path,
+            'bytes': self.received,
+            'chunks': self.chunks,
+            'created_at': self.created_at,
+            'first_chunk_at': self.first_chunk_at,
+            'completed_at': self.completed_at,
+        }
+
+
+class FakeUploadServer(ThreadingHTTPServer):
+    """Server upload resumable lokal yang menyimpan setiap upload ke `upload_dir`.
+
+    Server memeriksa aturan protokol: offset chunk harus berurutan, chunk
+    selain chunk terakhir harus kelipatan 256 KiB, dan ukuran total harus sama
+    dengan byte yang diterima. GET /uploads mengembalikan ringkasan
+    semua upload (jumlah chunk, waktu chunk pertama dan selesai).
+    """
+    daemon_threads = True
+
+    def __init__(self, address, upload_dir: str = DEFAULT_SERVER_DIR, log_callback=print):
+        super().__init__(address, _FakeUploadHandler)
+        os.makedirs(upload_dir, exist_ok=True)
+        self.upload_dir = upload_dir
+        self.log_callback = log_callback
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    @property
+    def upload_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/upload"
+
+
+class _FakeUploadHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, payload=None, headers: dict = None):
+        body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def do_GET(self):
+        if self.path.rstrip('/') != '/uploads':
+            return self._reply(404, {'error': 'not found'})
+        with self.server.lock:
+            sessions = list(self.server.sessions.values())
+        self._reply(200, [s.summary() for s in sessions])
+
+    def do_POST(self):
+        if not self.path.startswith('/upload'):
+            return self._reply(404, {'error': 'not found'})
+        try:
+            body = json.loads(self._read_body() or b'{}')
+        except ValueError:
+            return self._reply(400, {'error': 'metadata bukan JSON'})
+        session_id = uuid.uuid4().hex[:16]
+        session = _UploadSession(session_id, body, os.path.join(self.server.upload_dir, f"{session_id}.mp4"))
+        open(session.path, 'wb').close()
+        with self.server.lock:
+            self.server.sessions[session_id] = session
+        host, port = self.server.server_address[:2]
+        self._reply(200, headers={'Location': f"http://{host}:{port}/upload/{session_id}"})
+
+    def do_PUT(self):
+        session = self.server.sessions.get(self.path.rstrip('/').rsplit('/', 1)[-1])
+        data = self._read_body()
+        if session is None:
+            return self._reply(404, {'error': 'sesi upload tidak ditemukan'})
+        content_range = self.headers.get('Content-Range', '')
+        try:
+            span, total = content_range.split(' ', 1)[1].split('/')
+        except (IndexError, ValueError):
+            return self._reply(400, {'error': f"Content-Range tidak valid: {content_range}"})
+
+        with session.lock:
+            if session.video_id:
+                return self._reply(201, self._resource(session))
+            if span != '*':
+                start, end = (int(x) for x in span.split('-'))
+                if start != session.received:
+                    # Offset tidak berurutan: beri tahu byte yang sudah diterima
+                    return self._reply(308, headers=self._range_header(session))
+                if end - start + 1 != len(data):
+                    return self._reply(400, {'error': 'panjang chunk tidak sesuai Content-Range'})
+                final_chunk = total != '*' and end + 1 == int(total)
+                if not final_chunk and len(data) % CHUNK_ALIGN:
+                    return self._reply(400, {'error': f"chunk harus kelipatan {CHUNK_ALIGN} byte"})
+                with open(session.path, 'ab') as f:
+                    f.write(data)
+                session.received += len(data)
+                session.chunks += 1
+                session.first_chunk_at = session.first_chunk_at or time.time()
+            if total != '*' and int(total) <= session.received:
+                if int(total) != session.received:
+                    return self._reply(400, {'error': f"ukuran total {total}, diterima {session.received} byte"})
+                session.video_id = f"local-{session.session_id[:11]}"
+                session.completed_at = time.time()
+                self.server.log_callback(f"Upload selesai: {session.video_id} ({session.received} byte, "
+                                         f"{session.chunks} chunk) -> {session.path}")
+                return self._reply(201, self._resource(session))
+            self._reply(308, headers=self._range_header(session))
+
+    @staticmethod
+    def _range_header(session) -> dict:
+        return {'Range': f"bytes=0-{session.received - 1}"} if session.received else {}
+
+    @staticmethod
+    def _resource(session) -> dict:
+        return {'id': session.video_id, 'snippet': session.body.get('snippet', {}),
+                'status': session.body.get('status', {})}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Server upload resumable fake untuk pengujian upload streaming')
+    parser.add_argument('command', choices=['serve'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--dir', default=DEFAULT_SERVER_DIR, help='Folder penyimpanan hasil upload')
+    args = parser.parse_args(argv)
+
+    server = FakeUploadServer((args.host, args.port), args.dir)
+    print(f"Server upload fake berjalan di {server.upload_url} (hasil di {args.dir})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,285 @@
+#!/usr/bin/env python
+"""Timeline trace satu batch dalam format Chrome Trace Event.
+
+Setiap tahap (generate konten, gambar, TTS, render, validasi, upload),
+setiap request API lewat rate limiter, dan setiap subprocess (ffmpeg,
+ffprobe, imagefx) dicatat sebagai span dengan waktu mulai dan durasi.
+Span subprocess menyimpan pid, ringkasan argv, exit code, dan CPU time
+dari rusage proses anak. Setiap entri (atau worker render farm) mendapat
+track sendiri; thread background (upload, normalisasi gambar) mendapat
+track sesuai nama thread.
+
+Event ditulis langsung ke file sebagai JSON array (tanpa menyimpan semua
+event di memori) dan file yang terpotong karena crash tetap dapat dibuka.
+Tanpa `enable()`, span hanya memeriksa satu flag sehingga instrumentasi
+aman dibiarkan aktif di produksi.
+
+Buka hasilnya di https://ui.perfetto.dev atau chrome://tracing:
+    python cli.py --json data/example.json --generate-images --trace temp/trace.json
+
+Ringkasan durasi per nama span:
+    python tracing.py summary temp/trace.json
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import shlex
+import threading
+import subprocess
+from contextlib import contextmanager
+
+# Panjang maksimum ringkasan argv di span subprocess
+ARGV_SUMMARY_LIMIT = 200
+# Nilai opsi dengan nama ini (mis. --cookie imagefx) tidak ditulis ke trace
+SENSITIVE_OPTIONS = ('cookie', 'token', 'secret', 'password', 'key')
+
+_state = {
+    'file': None,
+    'path': None,
+    'first': True,
+    'root': None,
+}
+_lock = threading.Lock()
+_local = threading.local()
+_tracks = {}
+
+
+def enabled() -> bool:
+    return _state['file'] is not None
+
+
+def now_us() -> int:
+    return time.time_ns() // 1000
+
+
+def _write(event: dict):
+    line = json.dumps(event, ensure_ascii=False, separators=(',', ':'), default=str)
+    with _lock:
+        f = _state['file']
+        if f is None:
+            return
+        f.write(line if _state['first'] else ',\n' + line)
+        _state['first'] = False
+
+
+def _track_id(label: str) -> int:
+    """ID track (tid) untuk label; track baru diberi nama lewat event metadata."""
+    with _lock:
+        tid = _tracks.get(label)
+        if tid is not None:
+            return tid
+        tid = _tracks[label] = len(_tracks) + 1
+    _write({'ph': 'M', 'name': 'thread_name', 'pid': os.getpid(), 'tid': tid, 'args': {'name': label}})
+    _write({'ph': 'M', 'name': 'thread_sort_index', 'pid': os.getpid(), 'tid': tid, 'args': {'sort_index': tid}})
+    return tid
+
+
+def current_track() -> str:
+    return getattr(_local, 'track', None) or threading.current_thread().name
+
+
+def enable(path: str, process_name: str = None):
+    """Mulai menulis trace ke `path` (ditutup otomatis saat proses selesai)."""
+    output_dir = os.path.dirname(path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    with _lock:
+        if _state['file'] is not None:
+            return
+        _state['file'] = open(path, 'w', encoding='utf-8')
+        _state['file'].write('[\n')
+        _state['path'] = path
+        _state['first'] = True
+        _tracks.clear()
+    _write({'ph': 'M', 'name': 'process_name', 'pid': os.getpid(), 'tid': 0,
+            'args': {'name': process_name or os.path.basename(sys.argv[0]) or 'python'}})
+    _state['root'] = start('batch', 'main', argv=summarize_argv(sys.argv))
+    atexit.register(close)
+
+
+def close():
+    """Menutup span batch dan file trace."""
+    root, _state['root'] = _state['root'], None
+    end(root)
+    with _lock:
+        f, _state['file'] = _state['file'], None
+        if f is None:
+            return
+        f.write('\n]\n')
+        f.close()
+
+
+class Span:
+    """Span yang sedang berjalan; `args` dapat ditambah sebelum end()."""
+    __slots__ = ('name', 'cat', 'args', 'ts', 'start', 'tid')
+
+    def __init__(self, name: str, cat: str, args: dict):
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.ts = now_us()
+        self.start = time.perf_counter()
+        self.tid = _track_id(current_track())
+
+
+def start(name: str, cat: str = 'stage', **args):
+    """Memulai span; mengembalikan None jika trace tidak aktif."""
+    if _state['file'] is None:
+        return None
+    return Span(name, cat, args)
+
+
+def end(span, **args):
+    """Menutup span dari start() (None diabaikan)."""
+    if span is None:
+        return
+    span.args.update(args)
+    _write({
+        'ph': 'X', 'name': span.name, 'cat': span.cat, 'pid': os.getpid(), 'tid': span.tid,
+        'ts': span.ts, 'dur': max(1, int((time.perf_counter() - span.start) * 1e6)), 'args': span.args,
+    })
+
+
+@contextmanager
+def span(name: str, cat: str = 'stage', **args):
+    """Span untuk blok `with`; menghasilkan dict args yang dapat ditambah di dalam blok."""
+    current = start(name, cat, **args)
+    if current is None:
+        yield {}
+        return
+    try:
+        yield current.args
+    except BaseException as e:
+        current.args['error'] = f"{type(e).__name__}: {e}"[:200]
+        raise
+    finally:
+        end(current)
+
+
+@contextmanager
+def track(label: str):
+    """Span di thread ini selama blok `with` dicatat di track `label` (mis. satu entri)."""
+    previous = getattr(_local, 'track', None)
+    _local.track = label
+    try:
+        yield
+    finally:
+        _local.track = previous
+
+
+def _sensitive(option: str) -> bool:
+    return option.startswith('-') and any(word in option.lower() for word in SENSITIVE_OPTIONS)
+
+
+def summarize_argv(command, limit: int = ARGV_SUMMARY_LIMIT) -> str:
+    """Ringkasan perintah untuk span: path disingkat menjadi nama file, nilai opsi rahasia
+    disamarkan, dan dipotong di `limit`."""
+    if isinstance(command, str):
+        return command[:limit]
+    parts = []
+    previous = ''
+    for arg in command:
+        arg = str(arg)
+        option, previous = previous, arg
+        if _sensitive(option):
+            arg = '***'
+        elif '=' in arg and _sensitive(arg.split('=', 1)[0]):
+            arg = arg.split('=', 1)[0] + '=***'
+        elif os.path.isabs(arg) and '=' not in arg and ' ' not in arg:
+            arg = os.path.basename(arg.rstrip(os.sep)) or arg
+        parts.append(shlex.quote(arg))
+    text = ' '.join(parts)
+    return text if len(text) <= limit else text[:limit - 3] + '...'
+
+
+class TracedPopen(subprocess.Popen):
+    """Popen yang menyimpan rusage proses anak (os.wait4) saat proses ditunggu."""
+    rusage = None
+
+    def _try_wait(self, wait_flags):
+        if not hasattr(os, 'wait4'):
+            return super()._try_wait(wait_flags)
+        try:
+            pid, sts, rusage = os.wait4(self.pid, wait_flags)
+        except ChildProcessError:
+            return self.pid, 0
+        if pid:
+            self.rusage = rusage
+        return pid, sts
+
+
+def popen_class():
+    """Kelas Popen yang dipakai: TracedPopen hanya jika trace aktif."""
+    return TracedPopen if enabled() else subprocess.Popen
+
+
+def process_args(process) -> dict:
+    """Argumen span dari proses yang sudah selesai: exit code dan CPU time (jika tersedia)."""
+    args = {'returncode': process.returncode}
+    rusage = getattr(process, 'rusage', None)
+    if rusage is not None:
+        args['cpu_user_s'] = round(rusage.ru_utime, 3)
+        args['cpu_sys_s'] = round(rusage.ru_stime, 3)
+        # ru_maxrss dalam KB di Linux, byte di macOS
+        args['max_rss_mb'] = round(rusage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    return args
+
+
+def run(command, input=None, timeout=None, check=False, **kwargs) -> subprocess.CompletedProcess:
+    """Pengganti subprocess.run yang mencatat span subprocess (pid, argv, rusage)."""
+    if not enabled():
+        return subprocess.run(command, input=input, timeout=timeout, check=check, **kwargs)
+    if kwargs.pop('capture_output', False):
+        kwargs['stdout'] = kwargs['stderr'] = subprocess.PIPE
+    if input is not None:
+        kwargs['stdin'] = subprocess.PIPE
+    name = os.path.basename(str(command[0] if not isinstance(command, str) else command.split()[0]))
+    current = start(name, 'subprocess', argv=summarize_argv(command))
+    try:
+        with TracedPopen(command, **kwargs) as process:
+            current.args['pid'] = process.pid
+            try:
+                stdout, stderr = process.communicate(input, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                current.args['timeout'] = timeout
+                raise
+            except BaseException:
+                process.kill()
+                raise
+        current.args.update(process_args(process))
+    finally:
+        end(current)
+    if check and process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, process.args, output=stdout, stderr=stderr)
+    return subprocess.CompletedProcess(process.args, process.returncode, stdout, stderr)
+
+
+def summarize_trace(path: str) -> dict:
+    """Total durasi, jumlah, dan CPU time per (kategori, nama) span dari file trace."""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read().rstrip().rstrip(',')
+    events = json.loads(text if text.endswith(']') else text + ']')
+    summary = {}
+    for event in events:
+        if event.get('ph') != 'X':
+            continue
+        key = f"{event.get('cat')}:{event['name']}"
+        item = summary.setdefault(key, {'count': 0, 'seconds': 0.0, 'cpu_seconds': 0.0})
+        item['count'] += 1
+        item['seconds'] += event.get('dur', 0) / 1e6
+        args = event.get('args', {})
+        item['cpu_seconds'] += args.get('cpu_user_s', 0) + args.get('cpu_sys_s', 0)
+    return {key: {k: round(v, 3) if isinstance(v, float) else v for k, v in item.items()}
+            for key, item in sorted(summary.items(), key=lambda kv: -kv[1]['seconds'])}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3 or sys.argv[1] != 'summary':
+        print("Penggunaan: python tracing.py summary trace.json")
+        sys.exit(1)
+    print(json.dumps(summarize_trace(sys.argv[2]), indent=2))
+    sys.exit(0)